@@ -136,6 +136,13 @@ class MemoryConfig(BaseModel):
     database: str = Field(default="memory")
     character_id: str = Field(default="hiyori")  # Default character
 
+    # Cross-encoder rerank of hybrid search results (memory/rerank.py)
+    rerank_enabled: bool = Field(default=False)
+    rerank_model: str = Field(default="cross-encoder/ms-marco-MiniLM-L-6-v2")
+    rerank_candidates: int = Field(default=30)  # over-fetch from hybrid search
+    rerank_top_k: int = Field(default=5)  # kept for the prompt
+    rerank_budget_ms: int = Field(default=150)  # else keep hybrid (RRF) order
+
 class LLMConfig(BaseModel):
     api_key: str = Field(default="")
     base_url: str = Field(default="http://localhost:11434/v1")
@@ -151,6 +158,9 @@ class STTConfig(BaseModel):
 class TTSConfig(BaseModel):
     provider: str = "edge-tts"
     voice: str = "zh-CN-XiaoxiaoNeural"
+    # Server-side voice pipeline: synthesize in the backend and stream audio over the gateway
+    server_pipeline: bool = False
+    pipeline_concurrency: int = 3
 
 class AudioConfig(BaseModel):
     device_name: Optional[str] = None
@@ -166,6 +176,10 @@ class AudioConfig(BaseModel):
 class SearchConfig(BaseModel):
     provider: str = "brave" # or "duckduckgo"
     enabled: bool = True
+    cache_ttl_seconds: int = 600 # 0 = no result cache
+    hedge_provider: str = "" # e.g. "duckduckgo": query both, first good answer wins
+    hedge_delay_ms: int = 0 # head start for the primary provider
+    max_result_chars: int = 4000 # cap before results enter the prompt
 
 class BilibiliConfig(BaseModel):
     enabled: bool = False
@@ -12,14 +12,17 @@ class CoreServicesBootstrapper(Bootstrapper):
         # 1. LLM
         from llm.manager import LLMManager
         container.llm_manager = LLMManager()
+        # Warm provider connections in the background (TLS handshakes off the first request)
+        container.llm_manager.start_prewarm()
         
         # 2. Soul (Service)
         from services.soul_service import SoulService
         container.soul = SoulService() # No more character_id hardcoding here!
         
         # 3. Session
-        from services.session_manager import SessionManager
-        container.session_manager = SessionManager()
+        # Shared instance: sessions are cached in memory, so there must be only one store
+        from services.session_manager import session_manager
+        container.session_manager = session_manager
         
         # 4. Skills (Framework)
         from services.skill_manager import SkillManager
@@ -1,3 +1,4 @@
+import inspect
 from abc import ABC, abstractmethod
 from typing import Iterator, AsyncGenerator, Any, Optional, Dict, Tuple
 
@@ -181,6 +182,32 @@ class BaseLLMDriver(BaseDriver):
         """
         pass
 
+    async def stream_chat(self,
+                          messages: list,
+                          model: str,
+                          temperature: float = 0.7,
+                          stream: bool = True,
+                          **kwargs) -> AsyncGenerator[Any, None]:
+        """
+        Normalized streaming entry point used by the chat pipeline.
+        Yields text chunks (str) or event dicts:
+          {"content": str}
+          {"tool_calls": [...]}        complete OpenAI-style tool calls
+          {"tool_call_deltas": [...]}  partial tool calls (index/id/function.name/function.arguments fragments)
+          {"usage": {...}}             provider token usage (prompt/completion/total_tokens), if reported
+        Default adapts chat_completion(), whether it is an async generator or returns a value/stream.
+        """
+        result = self.chat_completion(messages, model=model, temperature=temperature, stream=stream, **kwargs)
+        if inspect.isawaitable(result):
+            result = await result
+        if result is None:
+            return
+        if isinstance(result, (str, dict)):
+            yield result
+            return
+        async for chunk in result:
+            yield chunk
+
     @abstractmethod
     async def list_models(self) -> list:
         """List available models."""
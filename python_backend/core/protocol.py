@@ -9,6 +9,7 @@ class EventType:
     INPUT_TEXT = "input_text"
     INPUT_AUDIO = "input_audio"        # Raw chunks
     INPUT_AUDIO_END = "input_audio_end" # VAD End
+    INPUT_TEXT_PARTIAL = "input_text_partial" # STT partial transcript / typing activity (speculative)
     
     # Brain (Source: Orchestrator/LLM)
     BRAIN_THINKING = "brain_thinking"  # "Lett me think..."
@@ -0,0 +1,160 @@
+"""
+Compiled Guardrail Scanner
+
+All guard patterns are compiled once into two matchers that each make a
+single pass over a message:
+- literal phrases (patterns that are plain words separated by `\\s+`) go into
+  an Aho-Corasick automaton (optional `pyahocorasick`; text is lowercased
+  and whitespace runs collapsed first, so `\\s+` equals a single space),
+- everything else is merged into one regex with a named group per rule,
+  behind a lookahead on the rules' possible first characters (CPython's `re`
+  otherwise tries every branch at every offset).
+Without pyahocorasick the literals join the combined regex as well.
+
+Approved messages are remembered by content hash (bounded LRU), so a chat
+history is only scanned once: each turn scans just the new messages.
+"""
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+try:
+    import ahocorasick  # optional: pyahocorasick
+except ImportError:
+    ahocorasick = None
+
+_WS_RE = re.compile(r"\s+")
+_WORD_GAP = r"\s+"
+_REGEX_META = set(".^$*+?{}[]|()\\")
+_LEADING_GROUP_RE = re.compile(r"\(([^()?]*)\)(\?)?")
+
+
+def normalize(text: str) -> str:
+    return _WS_RE.sub(" ", text.lower())
+
+
+def as_literal(pattern: str) -> Optional[str]:
+    """`word\\s+word` patterns -> 'word word'; None if the pattern needs the regex engine."""
+    candidate = pattern.replace(_WORD_GAP, " ")
+    if any(ch in _REGEX_META for ch in candidate):
+        return None
+    return normalize(candidate)
+
+
+def first_chars(pattern: str) -> Optional[Set[str]]:
+    """Characters a match can start with, for `word...` or `(alt|alt)...` patterns; else None."""
+    if pattern[:1].isalnum():
+        return {pattern[0]}
+    m = _LEADING_GROUP_RE.match(pattern)
+    if m and m.group(2) != "?":
+        alternatives = m.group(1).split("|")
+        if all(a[:1].isalnum() for a in alternatives):
+            return {a[0] for a in alternatives}
+    return None
+
+
+class GuardEngine:
+    def __init__(self, patterns: Sequence[Tuple[str, str]], approved_cache_size: int = 4096):
+        """`patterns`: (rule_name, regex) pairs, matched case-insensitively."""
+        self.approved_cache_size = approved_cache_size
+        self._approved: "OrderedDict[str, None]" = OrderedDict()
+        self._literal_rules: Dict[str, str] = {}
+        regex_rules: List[Tuple[str, str]] = []
+        for name, pattern in patterns:
+            literal = as_literal(pattern) if ahocorasick is not None else None
+            if literal:
+                self._literal_rules[literal] = name
+            else:
+                regex_rules.append((name, pattern))
+
+        self._automaton = None
+        if self._literal_rules:
+            self._automaton = ahocorasick.Automaton()
+            for literal, name in self._literal_rules.items():
+                self._automaton.add_word(literal, name)
+            self._automaton.make_automaton()
+
+        self._rule_names = {f"r{i}": name for i, (name, _) in enumerate(regex_rules)}
+        self._combined = None
+        if regex_rules:
+            combined = "|".join(f"(?P<r{i}>{pattern})" for i, (_, pattern) in enumerate(regex_rules))
+            starts: Optional[Set[str]] = set()
+            for _, pattern in regex_rules:
+                chars = first_chars(pattern)
+                if chars is None:
+                    starts = None
+                    break
+                starts |= chars
+            if starts:
+                combined = f"(?=[{re.escape(''.join(sorted(starts)))}])(?:{combined})"
+            self._combined = re.compile(combined, re.IGNORECASE)
+
+        # Stats
+        self.checks = 0
+        self.messages_scanned = 0
+        self.cache_hits = 0
+        self.blocked = 0
+        self.scan_seconds = 0.0
+
+    # ==================== MATCHING ====================
+
+    def match(self, text: str) -> Optional[str]:
+        """Rule name of the first match in `text`, or None."""
+        if self._automaton is not None:
+            for _, name in self._automaton.iter(normalize(text)):
+                return name
+        if self._combined is not None:
+            m = self._combined.search(text)
+            if m:
+                return self._rule_names[m.lastgroup]
+        return None
+
+    # ==================== INCREMENTAL SCAN ====================
+
+    @staticmethod
+    def _digest(content: str) -> str:
+        return hashlib.blake2b(content.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+
+    def scan_messages(self, messages: List[dict]) -> Optional[Tuple[int, str]]:
+        """
+        (index, rule_name) of the first offending message, or None if all pass.
+        Messages approved earlier (same content) are skipped.
+        """
+        self.checks += 1
+        started = time.perf_counter()
+        try:
+            for i, msg in enumerate(messages):
+                content = msg.get("content", "")
+                if not isinstance(content, str) or not content:
+                    continue
+                digest = self._digest(content)
+                if digest in self._approved:
+                    self._approved.move_to_end(digest)
+                    self.cache_hits += 1
+                    continue
+                self.messages_scanned += 1
+                rule = self.match(content)
+                if rule:
+                    self.blocked += 1
+                    return i, rule
+                self._approved[digest] = None
+                if len(self._approved) > self.approved_cache_size:
+                    self._approved.popitem(last=False)
+            return None
+        finally:
+            self.scan_seconds += time.perf_counter() - started
+
+    def get_stats(self) -> Dict[str, object]:
+        return {
+            "backend": "aho-corasick" if self._automaton is not None else "regex",
+            "literal_rules": len(self._literal_rules),
+            "regex_rules": len(self._rule_names),
+            "checks": self.checks,
+            "messages_scanned": self.messages_scanned,
+            "cache_hits": self.cache_hits,
+            "blocked": self.blocked,
+            "approved_cached": len(self._approved),
+            "avg_check_us": round(self.scan_seconds / self.checks * 1e6, 1) if self.checks else 0.0,
+        }
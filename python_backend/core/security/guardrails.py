@@ -6,6 +6,8 @@ import re
 import logging
 from typing import List, Tuple, Optional
 
+from core.security.guard_engine import GuardEngine
+
 logger = logging.getLogger("SystemGuard")
 
 class InputGuard:
@@ -19,8 +21,9 @@ class InputGuard:
         r"system\s+override"
     ]
     
-    # Simple compilation
-    COMPILED_PATTERNS = [re.compile(p, re.IGNORECASE) for p in JAILBREAK_PATTERNS]
+    # Compiled once: literal phrases -> Aho-Corasick, the rest -> one combined regex.
+    # Approved messages are cached by hash, so each turn only scans new messages.
+    ENGINE = GuardEngine([("jailbreak", p) for p in JAILBREAK_PATTERNS])
 
     @classmethod
     def validate_messages(cls, messages: List[dict]) -> Tuple[bool, Optional[str]]:
@@ -28,26 +31,17 @@ class InputGuard:
         Scan generic chat messages for malicious patterns.
         Returns: (is_safe, reason)
         """
-        for i, msg in enumerate(messages):
-            content = msg.get("content", "")
-            if not isinstance(content, str): continue
-            
-            # 1. Check Jailbreak Patterns
-            for pattern in cls.COMPILED_PATTERNS:
-                if pattern.search(content):
-                    logger.warning(f"🛡️ Guardrail Triggered: Jailbreak attempt detected in MSG[{i}]")
-                    return False, "Message rejected by security policy (Pattern: Jailbreak)."
-            
-            # 2. Check System Role Injection (Fake system prompts)
-            if msg.get("role") == "system" and i != 0:
-                 # Only allowed as first message? Or maybe allowed if strictly from backend?
-                 # If this validates frontend input, frontend should NOT send 'system' role usually.
-                 # But we might want to allow it for advanced users?
-                 # ideally system role should be stripped by router if user is not admin.
-                 pass
-                 
+        hit = cls.ENGINE.scan_messages(messages)
+        if hit:
+            i, _rule = hit
+            logger.warning(f"🛡️ Guardrail Triggered: Jailbreak attempt detected in MSG[{i}]")
+            return False, "Message rejected by security policy (Pattern: Jailbreak)."
         return True, None
 
+    @classmethod
+    def get_stats(cls) -> dict:
+        return cls.ENGINE.get_stats()
+
     @classmethod
     def sanitize(cls, text: str) -> str:
         """Basic text sanitization"""
@@ -0,0 +1,160 @@
+"""
+Bulk Completions for Offline LLM Jobs
+
+Runs thousands of independent prompts (dreaming, evolution, consolidation
+backlogs) with bounded concurrency through a route's driver, so the LLM
+scheduler still applies the provider's concurrency caps, rpm/tpm buckets
+and the background priority. Each result is appended to a JSONL checkpoint
+as soon as it completes; re-running with the same checkpoint skips every
+id that already succeeded, so a crash costs at most the in-flight requests.
+
+Item format: {"id": str, "messages": [...], optional "model", "temperature", "max_tokens"}
+Checkpoint line: {"id", "ok", "content" | "error", "attempts", "latency_ms"}
+"""
+import asyncio
+import json
+import logging
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Union
+
+logger = logging.getLogger("LLMBatch")
+
+
+def load_checkpoint(path: Path) -> Dict[str, Dict[str, Any]]:
+    """Latest record per id. A torn last line (crash mid-write) is ignored and cut."""
+    records: Dict[str, Dict[str, Any]] = {}
+    path = Path(path)
+    if not path.exists():
+        return records
+    good_offset = 0
+    with open(path, "rb") as f:
+        for raw in f:
+            try:
+                if not raw.endswith(b"\n"):
+                    raise ValueError("torn line")
+                record = json.loads(raw)
+            except ValueError:
+                logger.warning(f"Discarding torn checkpoint tail in {path.name}")
+                break
+            good_offset += len(raw)
+            records[record["id"]] = record
+    if good_offset < path.stat().st_size:
+        with open(path, "r+b") as f:
+            f.truncate(good_offset)
+    return records
+
+
+@dataclass
+class BatchReport:
+    total: int = 0
+    completed: int = 0
+    failed: int = 0
+    skipped: int = 0  # already done according to the checkpoint
+    elapsed_s: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Completed requests per second in this run."""
+        return self.completed / self.elapsed_s if self.elapsed_s else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "throughput_rps": round(self.throughput, 2)}
+
+
+class BatchRunner:
+    def __init__(self,
+                 driver,
+                 model: str,
+                 checkpoint: Union[str, Path],
+                 concurrency: int = 4,
+                 max_retries: int = 2,
+                 retry_backoff: float = 1.0,
+                 temperature: float = 0.7):
+        self.driver = driver
+        self.model = model
+        self.checkpoint = Path(checkpoint)
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.temperature = temperature
+
+    async def run(self, items: Union[Iterable[Dict[str, Any]], AsyncIterator[Dict[str, Any]]]) -> BatchReport:
+        """
+        Process `items` (any iterable, consumed lazily) and return a report.
+        Results are in the checkpoint file (see `load_checkpoint`).
+        """
+        done = {rid for rid, r in load_checkpoint(self.checkpoint).items() if r.get("ok")}
+        self.checkpoint.parent.mkdir(parents=True, exist_ok=True)
+        report = BatchReport()
+        started = time.monotonic()
+        source = self._aiter(items)
+        lock = asyncio.Lock()
+
+        with open(self.checkpoint, "a", encoding="utf-8") as out:
+            async def next_item() -> Optional[Dict[str, Any]]:
+                async with lock:
+                    async for item in source:
+                        report.total += 1
+                        if str(item["id"]) in done:
+                            report.skipped += 1
+                            continue
+                        return item
+                    return None
+
+            async def worker():
+                while (item := await next_item()) is not None:
+                    record = await self._complete(item)
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    out.flush()
+                    if record["ok"]:
+                        report.completed += 1
+                    else:
+                        report.failed += 1
+
+            await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+
+        report.elapsed_s = time.monotonic() - started
+        logger.info(f"📦 Batch finished: {report.to_dict()}")
+        return report
+
+    @staticmethod
+    async def _aiter(items):
+        if hasattr(items, "__aiter__"):
+            async for item in items:
+                yield item
+        else:
+            for item in items:
+                yield item
+
+    async def _complete(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        kwargs = {"max_tokens": item["max_tokens"]} if item.get("max_tokens") else {}
+        started = time.monotonic()
+        error = None
+        for attempt in range(1, self.max_retries + 2):
+            try:
+                parts = []
+                async for chunk in self.driver.stream_chat(
+                    item["messages"],
+                    model=item.get("model") or self.model,
+                    temperature=item.get("temperature", self.temperature),
+                    stream=False,
+                    **kwargs
+                ):
+                    parts.append(chunk if isinstance(chunk, str) else chunk.get("content") or "")
+                return {
+                    "id": str(item["id"]), "ok": True, "content": "".join(parts),
+                    "attempts": attempt, "latency_ms": round((time.monotonic() - started) * 1000, 1),
+                }
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                error = str(e)
+                if attempt <= self.max_retries:
+                    await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1))
+        logger.warning(f"Batch item {item['id']} failed after {self.max_retries + 1} attempts: {error}")
+        return {
+            "id": str(item["id"]), "ok": False, "error": error,
+            "attempts": self.max_retries + 1, "latency_ms": round((time.monotonic() - started) * 1000, 1),
+        }
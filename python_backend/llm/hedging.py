@@ -0,0 +1,166 @@
+"""
+Hedged LLM Requests (time-to-first-token)
+
+Per-route policy (FeatureRoute.hedge_provider_id / hedge_model / hedge_delay_ms).
+The primary stream starts immediately; if it has not produced its first chunk
+within the delay (or fails before producing one), the same request is sent to
+the fallback provider. The first stream to yield wins; the loser is cancelled
+and its generator closed so the driver can release the connection.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, AsyncGenerator, Deque, Dict, Optional
+
+from core.interfaces.driver import BaseLLMDriver
+
+logger = logging.getLogger("LLMHedging")
+
+
+class HedgeStats:
+    def __init__(self):
+        self.requests = 0
+        self.hedges_fired = 0
+        self.fallback_wins = 0
+        self.failovers = 0
+        self.ttft: Deque[float] = deque(maxlen=500)
+
+    def snapshot(self) -> Dict[str, Any]:
+        ordered = sorted(self.ttft)
+
+        def pct(p: float) -> float:
+            if not ordered:
+                return 0.0
+            return round(ordered[min(len(ordered) - 1, int(len(ordered) * p))] * 1000, 1)
+
+        return {
+            "requests": self.requests,
+            "hedges_fired": self.hedges_fired,
+            "fallback_wins": self.fallback_wins,
+            "failovers": self.failovers,
+            "ttft_p50_ms": pct(0.50),
+            "ttft_p95_ms": pct(0.95),
+            "ttft_p99_ms": pct(0.99),
+        }
+
+
+async def _close(gen: AsyncGenerator, task: Optional[asyncio.Task]):
+    if task and not task.done():
+        task.cancel()
+        try:
+            await task
+        except BaseException:
+            pass
+    try:
+        await gen.aclose()
+    except Exception as e:
+        logger.debug(f"Error closing losing stream: {e}")
+
+
+class HedgedLLMDriver(BaseLLMDriver):
+    """Wraps a primary driver with a delayed fallback for streaming calls (stream=True only)."""
+
+    def __init__(self, primary: BaseLLMDriver, fallback: BaseLLMDriver, fallback_model: str,
+                 delay: float, stats: Optional[HedgeStats] = None):
+        super().__init__(primary.id, primary.name, primary.description)
+        self._primary = primary
+        self._fallback = fallback
+        self._fallback_model = fallback_model
+        self.delay = delay
+        self.stats = stats or HedgeStats()
+        self.config = primary.config
+        self.enabled = primary.enabled
+        # Not hedged: expose the primary's method itself so its calling convention
+        # (coroutine vs async generator) stays visible to the response cache
+        self.chat_completion = primary.chat_completion
+
+    def __getattr__(self, name: str):
+        return getattr(self._primary, name)
+
+    async def load(self):
+        await self._primary.load()
+
+    async def list_models(self) -> list:
+        return await self._primary.list_models()
+
+    def chat_completion(self, messages: list, model: str, temperature: float = 0.7, stream: bool = False, **kwargs):
+        # Non-streaming / legacy calls are not hedged
+        return self._primary.chat_completion(messages, model=model, temperature=temperature, stream=stream, **kwargs)
+
+    async def stream_chat(self, messages: list, model: str, temperature: float = 0.7, stream: bool = True, **kwargs):
+        if not stream:
+            # The "first chunk" would be the whole completion: hedging only duplicates the request
+            async for chunk in self._primary.stream_chat(messages, model=model, temperature=temperature, stream=False, **kwargs):
+                yield chunk
+            return
+        self.stats.requests += 1
+        started = time.perf_counter()
+
+        primary = self._primary.stream_chat(messages, model=model, temperature=temperature, stream=stream, **kwargs)
+        p_first = asyncio.ensure_future(primary.__anext__())
+        streams = {p_first: primary}
+
+        try:
+            await asyncio.wait({p_first}, timeout=self.delay)
+        except asyncio.CancelledError:
+            # Caller went away during the hedge delay: release the primary (and its slot)
+            await _close(primary, p_first)
+            raise
+        if p_first.done() and p_first.exception() is not None and not isinstance(p_first.exception(), StopAsyncIteration):
+            self.stats.failovers += 1
+            logger.warning(f"⚠️ Primary {self._primary.id} failed before first token, failing over: {p_first.exception()}")
+
+        if not p_first.done() or self._failed(p_first):
+            self.stats.hedges_fired += 1
+            if not p_first.done():
+                logger.info(f"🪁 No first token from {self._primary.id} after {self.delay * 1000:.0f}ms, hedging to {self._fallback.id}")
+            fallback = self._fallback.stream_chat(messages, model=self._fallback_model, temperature=temperature, stream=stream, **kwargs)
+            streams[asyncio.ensure_future(fallback.__anext__())] = fallback
+
+        winner_task = await self._race(streams)
+        winner = streams.pop(winner_task)
+        for task, gen in streams.items():
+            await _close(gen, task)
+        if winner is not primary:
+            self.stats.fallback_wins += 1
+
+        try:
+            first = winner_task.result()
+        except StopAsyncIteration:
+            return
+        self.stats.ttft.append(time.perf_counter() - started)
+        yield first
+        try:
+            async for chunk in winner:
+                yield chunk
+        finally:
+            await winner.aclose()
+
+    @staticmethod
+    def _failed(task: asyncio.Task) -> bool:
+        exc = task.exception()
+        return exc is not None and not isinstance(exc, StopAsyncIteration)
+
+    async def _race(self, streams: Dict[asyncio.Task, AsyncGenerator]) -> asyncio.Task:
+        """First task to produce a chunk (or finish cleanly) wins; errors only win if everything failed."""
+        pending = set(streams)
+        failed = []
+        try:
+            while pending:
+                done = [t for t in pending if t.done()]
+                if not done:
+                    finished, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    done = list(finished)
+                for task in done:
+                    pending.discard(task)
+                    if self._failed(task):
+                        failed.append(task)
+                    else:
+                        return task
+        except asyncio.CancelledError:
+            for task, gen in streams.items():
+                await _close(gen, task)
+            raise
+        # All candidates failed: surface the primary's error
+        return failed[0]
@@ -0,0 +1,186 @@
+"""
+Shared HTTP Connection Pools for LLM Drivers
+
+One httpx.AsyncClient per origin (scheme://host:port), shared by every
+driver/route talking to that host, so keep-alive connections (and their TLS
+sessions) are reused instead of re-handshaking on each request.
+- HTTP/2 is negotiated when the optional `h2` package is installed.
+- Connections can be prewarmed at startup and re-warmed after idle periods
+  (before the keep-alive expiry drops them).
+- Per-provider stats: requests, new vs reused connections, open/idle counts.
+"""
+import asyncio
+import importlib.util
+import logging
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+logger = logging.getLogger("HttpPool")
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+def origin_of(url: str) -> str:
+    parts = urlsplit(url)
+    scheme = parts.scheme or "https"
+    port = parts.port or (443 if scheme == "https" else 80)
+    return f"{scheme}://{parts.hostname}:{port}"
+
+
+class _OriginStats:
+    def __init__(self):
+        self.requests = 0
+        self.new_connections = 0
+        self.prewarms = 0
+        self.last_used = 0.0
+        self.last_warmed = 0.0
+
+
+class HttpClientPool:
+    def __init__(self,
+                 max_connections: int = 20,
+                 max_keepalive_connections: int = 10,
+                 keepalive_expiry: float = 60.0,
+                 http2: bool = True,
+                 timeout: float = 120.0):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.timeout = timeout
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._stats: Dict[str, _OriginStats] = {}
+        self._providers: Dict[str, str] = {}  # provider_id -> origin
+        self._rewarm_task: Optional[asyncio.Task] = None
+
+    def configure(self, max_connections: int, max_keepalive_connections: int,
+                  keepalive_expiry: float, http2: bool):
+        """Applies to clients created afterwards (existing pools keep their limits)."""
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2 and HTTP2_AVAILABLE
+
+    # ==================== CLIENTS ====================
+
+    def get_client(self, url: str, provider_id: Optional[str] = None) -> httpx.AsyncClient:
+        """Shared client for the origin of `url`. Pass full URLs per request (no base_url is set)."""
+        origin = origin_of(url)
+        if provider_id:
+            self._providers[provider_id] = origin
+        client = self._clients.get(origin)
+        if client is None or client.is_closed:
+            stats = self._stats.setdefault(origin, _OriginStats())
+            client = httpx.AsyncClient(
+                http2=self.http2,
+                limits=self.limits,
+                timeout=self.timeout,
+                event_hooks={"request": [self._make_request_hook(stats)]},
+            )
+            self._clients[origin] = client
+            logger.info(f"🔌 HTTP pool created for {origin} (http2={self.http2})")
+        return client
+
+    @staticmethod
+    def _make_request_hook(stats: _OriginStats):
+        async def on_request(request: httpx.Request):
+            if request.extensions.get("prewarm"):
+                return
+            stats.requests += 1
+            stats.last_used = time.monotonic()
+            previous = request.extensions.get("trace")
+
+            # httpcore only emits connect_tcp when it has to open a new connection
+            async def trace(event_name: str, info: dict):
+                if event_name == "connection.connect_tcp.started":
+                    stats.new_connections += 1
+                if previous:
+                    await previous(event_name, info)
+
+            request.extensions["trace"] = trace
+        return on_request
+
+    # ==================== WARMING ====================
+
+    async def prewarm(self, url: str, provider_id: Optional[str] = None) -> bool:
+        """Open (or refresh) a connection to the origin. Any HTTP response counts as warm."""
+        origin = origin_of(url)
+        client = self.get_client(url, provider_id)
+        stats = self._stats[origin]
+        try:
+            await client.head(url, timeout=10.0, extensions={"prewarm": True})
+            stats.prewarms += 1
+            stats.last_warmed = time.monotonic()
+            return True
+        except Exception as e:
+            logger.debug(f"Prewarm of {origin} failed: {e}")
+            return False
+
+    def start_rewarming(self, interval: float = 15.0, active_window: float = 900.0):
+        """
+        Re-warm origins that were used within `active_window` seconds but have
+        been idle long enough that keep-alive would expire their connections.
+        """
+        if self._rewarm_task and not self._rewarm_task.done():
+            return
+        self._rewarm_task = asyncio.create_task(self._rewarm_loop(interval, active_window))
+
+    async def _rewarm_loop(self, interval: float, active_window: float):
+        threshold = max(1.0, self.keepalive_expiry * 0.75)
+        while True:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            for origin, stats in list(self._stats.items()):
+                idle = now - max(stats.last_used, stats.last_warmed)
+                if stats.last_used and idle >= threshold and now - stats.last_used <= active_window:
+                    await self.prewarm(origin + "/")
+
+    # ==================== STATS / SHUTDOWN ====================
+
+    @staticmethod
+    def _connection_counts(client: httpx.AsyncClient) -> Dict[str, int]:
+        # httpcore internals; best effort
+        try:
+            connections = client._transport._pool.connections
+            return {
+                "open": len(connections),
+                "idle": sum(1 for c in connections if c.is_idle()),
+            }
+        except Exception:
+            return {"open": -1, "idle": -1}
+
+    def get_stats(self) -> Dict[str, Any]:
+        per_origin = {}
+        for origin, client in self._clients.items():
+            stats = self._stats.get(origin, _OriginStats())
+            per_origin[origin] = {
+                **self._connection_counts(client),
+                "requests": stats.requests,
+                "new_connections": stats.new_connections,
+                "reused": max(0, stats.requests - stats.new_connections),
+                "prewarms": stats.prewarms,
+                "http2": self.http2,
+            }
+        return {
+            "providers": {pid: per_origin.get(origin, {}) | {"origin": origin} for pid, origin in self._providers.items()},
+            "origins": per_origin,
+        }
+
+    async def close(self):
+        if self._rewarm_task:
+            self._rewarm_task.cancel()
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+
+http_pool = HttpClientPool()
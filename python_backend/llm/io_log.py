@@ -0,0 +1,171 @@
+"""
+LLM I/O Logging (background sink)
+
+The request path only makes a sampling decision and enqueues references
+(constant time: the message list is recorded with its current length and
+sliced later, since the pipeline only appends to it). A daemon thread does
+the expensive part: slicing, redaction, truncation, JSON encoding and
+writing JSONL with size-based rotation.
+
+Modes:
+- sampled (default): `sample_rate` of requests, message contents truncated to `max_chars`
+- full capture (debugging): every request, no truncation
+"""
+import itertools
+import json
+import logging
+import queue
+import random
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("LLMIOLog")
+
+_REDACTIONS = [
+    (re.compile(r"sk-[A-Za-z0-9_\-]{16,}"), "sk-***"),
+    (re.compile(r"(?i)(bearer\s+)[A-Za-z0-9._\-]{12,}"), r"\1***"),
+    (re.compile(r"(?i)(\"?(?:api[_-]?key|password|secret|token)\"?\s*[:=]\s*\"?)[^\s\",]+"), r"\1***"),
+    (re.compile(r"[A-Za-z0-9._%+\-]+@[A-Za-z0-9.\-]+\.[A-Za-z]{2,}"), "***@***"),
+]
+
+
+def redact(text: str) -> str:
+    for pattern, replacement in _REDACTIONS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def truncate(text: str, max_chars: int) -> str:
+    """Keep head and tail so both the instructions and the latest content stay visible."""
+    if max_chars <= 0 or len(text) <= max_chars:
+        return text
+    half = max_chars // 2
+    return f"{text[:half]} …[{len(text) - max_chars} chars truncated]… {text[-half:]}"
+
+
+class LLMIOLogger:
+    def __init__(self,
+                 path: Optional[Path] = None,
+                 enabled: bool = True,
+                 sample_rate: float = 0.1,
+                 max_chars: int = 2000,
+                 redact: bool = True,
+                 full_capture: bool = False,
+                 max_file_bytes: int = 20 * 1024 * 1024,
+                 queue_size: int = 1000):
+        self.path = path
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.max_chars = max_chars
+        self.redact = redact
+        self.full_capture = full_capture
+        self.max_file_bytes = max_file_bytes
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._ids = itertools.count(1)
+        self._thread: Optional[threading.Thread] = None
+
+        # Stats
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+
+    def configure(self, **options):
+        for key, value in options.items():
+            if value is not None and hasattr(self, key):
+                setattr(self, key, value)
+
+    # ==================== REQUEST PATH (O(1)) ====================
+
+    def log_request(self, route: str, model: str, messages: List[Dict[str, Any]],
+                    tools: Optional[list] = None) -> Optional[int]:
+        """Returns a record id if this request was sampled (pass it to log_response)."""
+        if not self.enabled or self.path is None:
+            return None
+        if not self.full_capture and random.random() >= self.sample_rate:
+            return None
+        record_id = next(self._ids)
+        self._put(("request", record_id, time.time(), route, model, messages, len(messages), tools))
+        return record_id
+
+    def log_response(self, record_id: Optional[int], text: str, **meta):
+        if record_id is None:
+            return
+        self._put(("response", record_id, time.time(), text, meta))
+
+    def _put(self, item: tuple):
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(item)
+            self.enqueued += 1
+        except queue.Full:
+            self.dropped += 1
+
+    # ==================== WRITER THREAD ====================
+
+    def _ensure_writer(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._writer_loop, name="llm-io-log", daemon=True)
+            self._thread.start()
+
+    def _writer_loop(self):
+        while True:
+            item = self._queue.get()
+            try:
+                self._write(self._format(item))
+            except Exception as e:
+                logger.debug(f"LLM I/O log write failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _clean(self, text: Any) -> Any:
+        if not isinstance(text, str):
+            return text
+        if self.redact:
+            text = redact(text)
+        return text if self.full_capture else truncate(text, self.max_chars)
+
+    def _format(self, item: tuple) -> Dict[str, Any]:
+        kind, record_id, ts = item[:3]
+        if kind == "request":
+            _, _, _, route, model, messages, length, tools = item
+            return {
+                "id": record_id, "type": "request", "ts": ts, "route": route, "model": model,
+                "messages": [{**m, "content": self._clean(m.get("content"))} for m in messages[:length]],
+                "tools": [t.get("function", {}).get("name") for t in tools] if tools else None,
+            }
+        _, _, _, text, meta = item
+        return {"id": record_id, "type": "response", "ts": ts, "content": self._clean(text), **meta}
+
+    def _write(self, record: Dict[str, Any]):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.exists() and self.path.stat().st_size > self.max_file_bytes:
+            self.path.replace(self.path.with_suffix(self.path.suffix + ".1"))
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self.written += 1
+
+    def flush(self, timeout: float = 5.0):
+        """Wait until queued records are written (tests / shutdown)."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "full_capture": self.full_capture,
+            "sample_rate": self.sample_rate,
+            "max_chars": self.max_chars,
+            "redact": self.redact,
+            "path": str(self.path) if self.path else None,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "written": self.written,
+            "queued": self._queue.qsize(),
+        }
+
+
+llm_io_log = LLMIOLogger()
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import json
 import os
@@ -24,6 +25,13 @@ class ProviderConfig(BaseModel):
     api_key: str = ""
     models: List[str] = []
     enabled: bool = True
+    # Context window (tokens) for token-budgeted prompt assembly
+    context_window: int = 8192
+    model_context_windows: Dict[str, int] = {}
+    # Scheduler limits
+    max_concurrency: int = 4
+    requests_per_minute: Optional[int] = None
+    tokens_per_minute: Optional[int] = None
 
 class FeatureRoute(BaseModel):
     feature: str
@@ -33,10 +41,50 @@ class FeatureRoute(BaseModel):
     top_p: float = 1.0
     presence_penalty: float = 0.0
     frequency_penalty: float = 0.0
+    priority: Optional[int] = None  # Scheduler priority (0 = interactive); derived from the feature if unset
+    # Hedging: fire the same request at a fallback provider if no first token within the delay
+    hedge_provider_id: Optional[str] = None
+    hedge_model: Optional[str] = None
+    hedge_delay_ms: int = 1500
+    # Response cache (opt-in, background routes only)
+    cache_enabled: bool = False
+    cache_ttl_seconds: int = 86400
+    cache_similarity_threshold: Optional[float] = None  # e.g. 0.97 enables the embedding tier
+    # History selection: "recent" (newest messages that fit) or "relevant"
+    # (last N turns + older turns by embedding similarity to the input, within a token cap)
+    history_mode: str = "recent"
+    history_recent_turns: int = 4
+    history_max_tokens: int = 2048
+    history_min_similarity: float = 0.25
+    # Prompt layout: "default", or "stable" (byte-stable system prompt + history prefix,
+    # volatile context at the tail, so provider-side prefix caching can hit)
+    prompt_layout: str = "default"
+
+class ResponseCacheConfig(BaseModel):
+    max_entries: int = 5000
+    path: str = "cache/llm_responses.sqlite"  # relative to data root
+
+class HttpPoolConfig(BaseModel):
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 60.0
+    http2: bool = True  # used when the optional h2 package is installed
+    prewarm: bool = True
+
+class IOLogConfig(BaseModel):
+    enabled: bool = True
+    sample_rate: float = 0.1
+    max_chars: int = 2000      # per message content (head + tail kept)
+    redact: bool = True        # API keys, bearer tokens, emails
+    full_capture: bool = False # debugging: log every request untruncated
+    path: str = "logs/llm_io.jsonl"  # relative to data root
 
 class LLMConfig(BaseModel):
     providers: Dict[str, ProviderConfig] = {}
     routes: Dict[str, FeatureRoute] = {}
+    response_cache: ResponseCacheConfig = Field(default_factory=ResponseCacheConfig)
+    http_pool: HttpPoolConfig = Field(default_factory=HttpPoolConfig)
+    io_log: IOLogConfig = Field(default_factory=IOLogConfig)
 
 class LLMManager:
     def __init__(self):
@@ -44,10 +92,25 @@ class LLMManager:
         self.config_path = ConfigManager().config_root / "llm_registry.json"
             
         self.config: LLMConfig = self.load_config()
-        self.drivers: Dict[str, BaseLLMDriver] = {}
+        self.drivers: Dict[str, BaseLLMDriver] = {}  # instantiated lazily (see _get_provider_driver)
+        self._driver_classes: Optional[Dict[str, type]] = None
+        self._missing_drivers: Dict[str, str] = {}  # provider id -> reason (negative cache)
+        self._fallback_logged: set = set()
         self._parameter_calculator = None
+        self._response_cache = None
+        self._prewarm_task: Optional[asyncio.Task] = None
+
+        from llm.scheduler import LLMScheduler
+        self.scheduler = LLMScheduler()
+        self.hedge_stats: Dict[str, Any] = {}
         
-        self._initialize_drivers()
+        from llm.http_pool import http_pool
+        pool_conf = self.config.http_pool
+        http_pool.configure(pool_conf.max_connections, pool_conf.max_keepalive_connections,
+                            pool_conf.keepalive_expiry, pool_conf.http2)
+
+        self.configure_io_log()
+
         self._ensure_routes_exist()
 
     def _resolve_env_vars(self, config: LLMConfig) -> LLMConfig:
@@ -105,7 +168,8 @@ class LLMManager:
                 type="pollinations", # Use native driver now
                 base_url="", # Pollinations generic handling
                 api_key="none",
-                models=["gpt-4o-mini", "claude-3-haiku"]
+                models=["gpt-4o-mini", "claude-3-haiku"],
+                context_window=4096  # Keep free tier prompts small
             ),
             "custom_provider": ProviderConfig(
                 id="custom_provider",
@@ -128,20 +192,14 @@ class LLMManager:
         self.save_config(conf)
         return conf
 
-    def _initialize_drivers(self):
-        """Instantiate drivers from config using dynamic discovery"""
-        self.drivers.clear()
-        
-        # 1. Discover available driver classes via PluginLoader
+    def _discover_driver_classes(self) -> Dict[str, type]:
+        """Scan built-in and extension driver directories: driver type -> class."""
         from services.plugin_loader import PluginLoader
         
-        # Construct path: python_backend/plugins/drivers/llm
-        # We are in python_backend/llm/manager.py
-        # Construct path: python_backend/plugins/drivers/llm
         # We are in python_backend/llm/manager.py
         base_dir = os.path.dirname(os.path.abspath(__file__))
         
-        # 1. Built-in Drivers
+        # 1. Built-in Drivers (python_backend/plugins/drivers/llm)
         drivers_dir = os.path.join(base_dir, "..", "plugins", "drivers", "llm")
         logger.info(f"Scanning Built-in LLM Drivers: {drivers_dir}")
         prototypes = PluginLoader.load_plugins(drivers_dir, BaseLLMDriver)
@@ -163,26 +221,73 @@ class LLMManager:
             # key: default ID (e.g. "openai", "deepseek", "pollinations") -> value: Class
             driver_classes[proto.id] = proto.__class__
             logger.info(f"Discovered LLM Driver Type: {proto.id}")
+        return driver_classes
 
-        # 2. Instantiate providers based on Config
-        for p_id, p_conf in self.config.providers.items():
-            if not p_conf.enabled and p_id != "free_tier": 
-                continue
-                
-            driver_class = driver_classes.get(p_conf.type)
-            
-            if driver_class:
-                try:
-                    # Instantiate specific driver for this provider
-                    # We pass the provider ID as the driver ID so they match
-                    driver = driver_class(id=p_id)
-                    driver.load_config(p_conf.model_dump())
-                    self.drivers[p_id] = driver
-                    logger.info(f"Loaded Driver: {p_id} [Type: {p_conf.type}]")
-                except Exception as e:
-                    logger.error(f"Failed to instantiate LLM driver {p_id}: {e}")
-            else:
-                logger.warning(f"Unknown driver type '{p_conf.type}' for provider '{p_id}'. Available: {list(driver_classes.keys())}")
+    @property
+    def driver_classes(self) -> Dict[str, type]:
+        """Driver class registry, scanned once (see refresh_drivers)."""
+        if self._driver_classes is None:
+            self._driver_classes = self._discover_driver_classes()
+        return self._driver_classes
+
+    def refresh_drivers(self, rescan: bool = True):
+        """
+        Drop instantiated drivers and cached misses; with `rescan`, also
+        rediscover driver classes (e.g. after installing an extension).
+        Drivers are re-created lazily on next use.
+        """
+        if rescan:
+            self._driver_classes = None
+        self.drivers.clear()
+        self._missing_drivers.clear()
+        self._fallback_logged.clear()
+
+    def _get_provider_driver(self, provider_id: str) -> Optional[BaseLLMDriver]:
+        """Instantiated driver for a provider, created on first use; misses are cached."""
+        driver = self.drivers.get(provider_id)
+        if driver is not None or provider_id in self._missing_drivers:
+            return driver
+
+        p_conf = self.config.providers.get(provider_id)
+        if p_conf is None:
+            reason = "no such provider"
+        elif not p_conf.enabled and provider_id != "free_tier":
+            reason = "provider disabled"
+        elif p_conf.type not in self.driver_classes:
+            reason = f"unknown driver type '{p_conf.type}'. Available: {list(self.driver_classes.keys())}"
+        else:
+            try:
+                # Instantiate specific driver for this provider
+                # We pass the provider ID as the driver ID so they match
+                driver = self.driver_classes[p_conf.type](id=provider_id)
+                driver.load_config(p_conf.model_dump())
+                self.drivers[provider_id] = driver
+                self.scheduler.configure_provider(
+                    provider_id, p_conf.max_concurrency, p_conf.requests_per_minute, p_conf.tokens_per_minute
+                )
+                logger.info(f"Loaded Driver: {provider_id} [Type: {p_conf.type}]")
+                return driver
+            except Exception as e:
+                reason = f"failed to instantiate: {e}"
+
+        # Logged once; cleared by refresh_drivers / update_provider
+        self._missing_drivers[provider_id] = reason
+        logger.warning(f"LLM driver '{provider_id}' unavailable: {reason}")
+        return None
+
+    def get_driver_stats(self) -> Dict[str, Any]:
+        return {
+            "driver_types": sorted(self._driver_classes) if self._driver_classes is not None else None,
+            "instantiated": sorted(self.drivers),
+            "unavailable": dict(self._missing_drivers),
+        }
+
+    def _first_available_driver(self) -> Optional[BaseLLMDriver]:
+        for p_id in self.config.providers:
+            driver = self._get_provider_driver(p_id)
+            if driver is not None:
+                return driver
+        return None
 
     def _ensure_routes_exist(self):
         defaults = ["chat", "memory", "dreaming", "evolution", "proactive"]
@@ -200,23 +305,135 @@ class LLMManager:
 
     # --- Public API ---
 
+    def configure_io_log(self, **updates):
+        """Apply (and optionally update/persist) LLM I/O logging options."""
+        from app_config import ConfigManager
+        from llm.io_log import llm_io_log
+        if updates:
+            d = self.config.io_log.model_dump()
+            d.update({k: v for k, v in updates.items() if v is not None})
+            self.config.io_log = IOLogConfig(**d)
+            self.save_config()
+        conf = self.config.io_log
+        llm_io_log.configure(
+            path=ConfigManager().data_root / conf.path,
+            enabled=conf.enabled,
+            sample_rate=conf.sample_rate,
+            max_chars=conf.max_chars,
+            redact=conf.redact,
+            full_capture=conf.full_capture,
+        )
+
+    def start_prewarm(self):
+        """Run prewarm_connections in the background (task kept referenced, failures logged)."""
+        if self._prewarm_task and not self._prewarm_task.done():
+            return
+        self._prewarm_task = asyncio.create_task(self.prewarm_connections())
+        self._prewarm_task.add_done_callback(self._prewarm_done)
+
+    @staticmethod
+    def _prewarm_done(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Connection prewarm failed: {task.exception()}")
+
+    async def prewarm_connections(self):
+        """Open pooled connections to every provider a route uses and keep them warm while in use."""
+        from llm.http_pool import http_pool
+        if not self.config.http_pool.prewarm:
+            return
+        in_use = {r.provider_id for r in self.config.routes.values()}
+        in_use |= {r.hedge_provider_id for r in self.config.routes.values() if r.hedge_provider_id}
+        targets = {}
+        for p_id in in_use:
+            driver = self._get_provider_driver(p_id)
+            url = getattr(driver, "BASE_URL", None) or getattr(driver, "base_url", None)
+            if url:
+                targets[p_id] = url
+        results = await asyncio.gather(*(http_pool.prewarm(url, p_id) for p_id, url in targets.items()))
+        warmed = [p_id for p_id, ok in zip(targets, results) if ok]
+        logger.info(f"🔥 Prewarmed LLM connections: {warmed or 'none'}")
+        http_pool.start_rewarming()
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        from llm.http_pool import http_pool
+        return http_pool.get_stats()
+
     async def get_driver(self, feature: str = "chat") -> BaseLLMDriver:
         """Get high-level Driver for a feature"""
         provider_id = self._resolve_provider_id(feature)
+        driver = self._get_provider_driver(provider_id)
         
-        if provider_id not in self.drivers:
-             # Try refreshing?
-             self._initialize_drivers()
-             
-        if provider_id not in self.drivers:
+        if driver is None:
              # Fallback
-             fallback_id = list(self.drivers.keys())[0] if self.drivers else None
-             if fallback_id:
-                 logger.warning(f"Driver {provider_id} not active, fallback to {fallback_id}")
-                 return self.drivers[fallback_id]
-             raise ValueError("No LLM Drivers available.")
+             driver = self._first_available_driver()
+             if driver is None:
+                 raise ValueError("No LLM Drivers available.")
+             if provider_id not in self._fallback_logged:
+                 self._fallback_logged.add(provider_id)
+                 logger.warning(f"Driver {provider_id} not active, fallback to {driver.id}")
              
-        return self.drivers[provider_id]
+        return self._wrap_driver(feature, driver)
+
+    def _wrap_driver(self, feature: str, driver: BaseLLMDriver) -> BaseLLMDriver:
+        """Scheduler innermost, then hedging, cache outermost (cache hits never take a provider slot)."""
+        from llm.scheduler import ScheduledLLMDriver
+        priority = self.get_priority(feature)
+        wrapped = ScheduledLLMDriver(driver, self.scheduler, feature, priority)
+
+        route = self.config.routes.get(feature)
+        fallback = self._get_provider_driver(route.hedge_provider_id) if route and route.hedge_provider_id else None
+        if fallback and fallback is not driver:
+            from llm.hedging import HedgedLLMDriver, HedgeStats
+            wrapped = HedgedLLMDriver(
+                wrapped,
+                ScheduledLLMDriver(fallback, self.scheduler, feature, priority),
+                fallback_model=route.hedge_model or route.model,
+                delay=route.hedge_delay_ms / 1000.0,
+                stats=self.hedge_stats.setdefault(feature, HedgeStats())
+            )
+        return self._wrap_cached(feature, wrapped)
+
+    def get_priority(self, feature: str) -> int:
+        from llm.scheduler import DEFAULT_ROUTE_PRIORITIES, PRIORITY_BACKGROUND
+        route = self.config.routes.get(feature)
+        if route and route.priority is not None:
+            return route.priority
+        return DEFAULT_ROUTE_PRIORITIES.get(feature, PRIORITY_BACKGROUND)
+
+    # --- Response Cache ---
+
+    def _wrap_cached(self, feature: str, driver: BaseLLMDriver) -> BaseLLMDriver:
+        """Wrap the driver with the response cache if the route opted in."""
+        from llm.response_cache import CachingLLMDriver, INTERACTIVE_ROUTES
+        route = self.config.routes.get(feature)
+        if not route or not route.cache_enabled or feature in INTERACTIVE_ROUTES:
+            return driver
+        return CachingLLMDriver(driver, self.get_response_cache(), route)
+
+    def get_response_cache(self):
+        if self._response_cache is None:
+            from app_config import ConfigManager
+            from llm.response_cache import ResponseCache
+            conf = self.config.response_cache
+            self._response_cache = ResponseCache(
+                ConfigManager().data_root / conf.path,
+                max_entries=conf.max_entries
+            )
+            self._response_cache.embed_fn = self._embed_for_cache
+        return self._response_cache
+
+    @staticmethod
+    def _embed_for_cache(text: str) -> List[float]:
+        from model_manager import model_manager
+        model = model_manager.get_embedding_model("all-MiniLM-L6-v2")  # loaded once per process
+        if model is None:
+            raise RuntimeError("Embedding model all-MiniLM-L6-v2 unavailable")
+        return model.encode(text).tolist()
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        stats = self.get_response_cache().get_stats()
+        stats["routes"] = [r.feature for r in self.config.routes.values() if r.cache_enabled]
+        return stats
 
     def get_client(self, feature: str = "chat") -> Any:
         """
@@ -224,11 +441,11 @@ class LLMManager:
         Blocking (Sync) method to maintain compat with existing code.
         """
         provider_id = self._resolve_provider_id(feature)
-        driver = self.drivers.get(provider_id)
+        driver = self._get_provider_driver(provider_id)
         
         # Fallback
-        if not driver and self.drivers:
-            driver = list(self.drivers.values())[0]
+        if not driver:
+            driver = self._first_available_driver()
             
         if driver and hasattr(driver, 'client'):
              # Lazy Load check (Synchronously hacky or assume loaded)
@@ -239,23 +456,56 @@ class LLMManager:
              if driver.client is None:
                  # Emergency sync init
                  logger.warning(f"Lazy-loading client synchronously for {driver.id}")
+                 from llm.http_pool import http_pool
                  driver.client = AsyncOpenAI(
                     base_url=driver.config.get("base_url"),
                     api_key=driver.config.get("api_key"),
                     timeout=60.0,
-                    max_retries=2
+                    max_retries=2,
+                    http_client=http_pool.get_client(driver.config.get("base_url") or "https://api.openai.com/v1", driver.id)
                  )
-             return driver.client
+             from llm.scheduler import ScheduledClient
+             return ScheduledClient(driver.client, self.scheduler, driver.id, feature, self.get_priority(feature))
              
         # Emergency Fallback
         logger.error(f"Could not resolve client for {feature}, returning dumb client")
         return AsyncOpenAI(base_url="http://localhost:8000/free-llm/v1", api_key="none")
 
+    async def run_batch(self, feature: str, items, checkpoint=None, concurrency: Optional[int] = None, **options):
+        """
+        Bulk completions for offline jobs on `feature`'s route (see llm/batch.py).
+        `checkpoint` defaults to data_root/batches/{feature}.jsonl; pass the same
+        path again to resume. Concurrency defaults to the provider's max_concurrency.
+        """
+        from app_config import ConfigManager
+        from llm.batch import BatchRunner
+        if checkpoint is None:
+            checkpoint = ConfigManager().data_root / "batches" / f"{feature}.jsonl"
+        if concurrency is None:
+            provider = self.config.providers.get(self._resolve_provider_id(feature))
+            concurrency = provider.max_concurrency if provider else 4
+        runner = BatchRunner(
+            await self.get_driver(feature),
+            self.get_model_name(feature),
+            checkpoint,
+            concurrency=concurrency,
+            **options
+        )
+        return await runner.run(items)
+
     def get_model_name(self, feature: str) -> str:
         route = self.config.routes.get(feature)
         if route: return route.model
         return "gpt-4o-mini" 
     
+    def get_context_window(self, feature: str = "chat", model: Optional[str] = None) -> int:
+        """Context window (tokens) for the route's provider/model."""
+        provider = self.config.providers.get(self._resolve_provider_id(feature))
+        if not provider:
+            return 8192
+        model = model or self.get_model_name(feature)
+        return provider.model_context_windows.get(model, provider.context_window)
+
     def get_parameters(self, feature: str = "chat", soul_state: Optional[Dict] = None) -> Dict:
         """Get generation parameters (temperature, etc)"""
         route = self.config.routes.get(feature)
@@ -318,7 +568,7 @@ class LLMManager:
             self.config.providers[provider_id] = ProviderConfig(**updates)
             
         self.save_config()
-        self._initialize_drivers() # Reload drivers
+        self.refresh_drivers(rescan=False) # Re-create from the new config on next use
 
     def update_route(self, feature: str, **kwargs):
         if feature not in self.config.routes:
@@ -0,0 +1,80 @@
+"""
+Provider Prompt-Cache Instrumentation
+
+OpenAI and DeepSeek discount (and prefill faster) the part of a prompt that
+matches a recently seen prefix. Their usage payloads report it differently;
+`cached_prompt_tokens` normalizes them, and `PromptCacheStats` aggregates
+hit rate and TTFT per (route, prompt layout) so layouts can be compared.
+A request counts as a hit when at least half of its prompt was cached.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+def cached_prompt_tokens(usage: Dict[str, Any]) -> Optional[int]:
+    """Cached prompt tokens from a provider usage dict, or None if the provider doesn't report them."""
+    details = usage.get("prompt_tokens_details")
+    if isinstance(details, dict) and isinstance(details.get("cached_tokens"), int):
+        return details["cached_tokens"]  # OpenAI
+    for key in ("prompt_cache_hit_tokens", "cached_tokens", "cache_read_input_tokens"):  # DeepSeek / others
+        if isinstance(usage.get(key), int):
+            return usage[key]
+    return None
+
+
+def _percentile(samples: List[float], q: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+class _Bucket:
+    def __init__(self):
+        self.requests = 0
+        self.reported = 0  # requests whose usage included cached-token counts
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.ttft_hit: List[float] = []
+        self.ttft_miss: List[float] = []
+
+
+class PromptCacheStats:
+    def __init__(self, max_samples: int = 500):
+        self.max_samples = max_samples
+        self._buckets: Dict[Tuple[str, str], _Bucket] = {}
+
+    def record(self, route: str, layout: str, usage: Optional[Dict[str, Any]], ttft_ms: Optional[float] = None):
+        bucket = self._buckets.setdefault((route, layout), _Bucket())
+        bucket.requests += 1
+        usage = usage or {}
+        cached = cached_prompt_tokens(usage)
+        if cached is None or not isinstance(usage.get("prompt_tokens"), int):
+            return
+        bucket.reported += 1
+        bucket.prompt_tokens += usage["prompt_tokens"]
+        bucket.cached_tokens += cached
+        if ttft_ms is not None:
+            samples = bucket.ttft_hit if cached * 2 >= usage["prompt_tokens"] > 0 else bucket.ttft_miss
+            samples.append(ttft_ms)
+            if len(samples) > self.max_samples:
+                del samples[:self.max_samples // 2]
+
+    def get_stats(self) -> Dict[str, Any]:
+        routes: Dict[str, Dict[str, Any]] = {}
+        for (route, layout), b in sorted(self._buckets.items()):
+            hit_p50, miss_p50 = _percentile(b.ttft_hit, 0.5), _percentile(b.ttft_miss, 0.5)
+            all_p50 = _percentile(b.ttft_hit + b.ttft_miss, 0.5)
+            routes.setdefault(route, {})[layout] = {
+                "requests": b.requests,
+                "reported": b.reported,
+                "prompt_tokens": b.prompt_tokens,
+                "cached_tokens": b.cached_tokens,
+                "token_hit_rate": round(b.cached_tokens / b.prompt_tokens, 3) if b.prompt_tokens else 0.0,
+                "request_hit_rate": round(len(b.ttft_hit) / (len(b.ttft_hit) + len(b.ttft_miss)), 3)
+                                    if b.ttft_hit or b.ttft_miss else 0.0,
+                "ttft_ms_p50": {"all": all_p50, "hit": hit_p50, "miss": miss_p50},
+                "ttft_saved_ms_p50": round(miss_p50 - hit_p50, 1) if hit_p50 is not None and miss_p50 is not None else None,
+            }
+        return routes
+
+
+prompt_cache_stats = PromptCacheStats()
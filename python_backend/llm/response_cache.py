@@ -0,0 +1,300 @@
+"""
+LLM Response Cache (background routes)
+
+Opt-in per route (FeatureRoute.cache_enabled). Non-streaming completions are
+keyed by an exact hash of (model, messages, sampling params); an optional
+embedding-similarity tier catches near-identical prompts (same route, model
+and system prompt). Entries persist in SQLite with TTL and size limits.
+Interactive routes are never cached.
+"""
+import asyncio
+import hashlib
+import inspect
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from core.interfaces.driver import BaseLLMDriver
+
+logger = logging.getLogger("LLMResponseCache")
+
+# Routes that talk to the user directly: repeated prompts must produce fresh replies
+INTERACTIVE_ROUTES = {"chat", "proactive"}
+
+# Sampling params that change the answer and therefore belong in the key
+_KEY_PARAMS = ("temperature", "top_p", "presence_penalty", "frequency_penalty", "max_tokens", "response_format", "tools")
+
+
+def _estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 chars/token) for savings metrics."""
+    return max(1, len(text) // 4) if text else 0
+
+
+class ResponseCache:
+    def __init__(self, db_path: Path, max_entries: int = 5000):
+        self.db_path = Path(db_path)
+        self.max_entries = max_entries
+        self.embed_fn: Optional[Callable[[str], List[float]]] = None
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+        # Metrics
+        self.lookups = 0
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.stores = 0
+        self.tokens_saved = 0
+        self.seconds_saved = 0.0
+
+    # ==================== STORAGE ====================
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    route TEXT NOT NULL,
+                    scope TEXT NOT NULL,
+                    embedding TEXT,
+                    response TEXT NOT NULL,
+                    tokens INTEGER NOT NULL,
+                    latency REAL NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_hit_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_scope ON responses(scope)")
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def make_keys(route: str, model: str, messages: list, params: Dict[str, Any]) -> Tuple[str, str]:
+        """Returns (exact_key, scope). Scope groups entries eligible for the similarity tier."""
+        relevant = {k: params.get(k) for k in _KEY_PARAMS if params.get(k) is not None}
+        payload = json.dumps([model, messages, relevant], sort_keys=True, ensure_ascii=False, default=str)
+        exact = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+        system = "".join(str(m.get("content", "")) for m in messages if m.get("role") == "system")
+        scope_src = json.dumps([route, model, system, relevant], sort_keys=True, ensure_ascii=False, default=str)
+        scope = hashlib.sha256(scope_src.encode("utf-8")).hexdigest()[:32]
+        return exact, scope
+
+    @staticmethod
+    def _similarity_text(messages: list) -> str:
+        return "\n".join(str(m.get("content", "")) for m in messages if m.get("role") != "system")[-4000:]
+
+    # ==================== LOOKUP / STORE ====================
+
+    def lookup(self, route: str, model: str, messages: list, params: Dict[str, Any],
+               ttl_seconds: float, similarity_threshold: Optional[float] = None) -> Optional[str]:
+        exact, scope = self.make_keys(route, model, messages, params)
+        now = time.time()
+        self.lookups += 1
+        with self._lock:
+            db = self._db()
+            row = db.execute(
+                "SELECT response, tokens, latency, created_at FROM responses WHERE key = ?", (exact,)
+            ).fetchone()
+            if row and now - row[3] <= ttl_seconds:
+                db.execute("UPDATE responses SET last_hit_at = ? WHERE key = ?", (now, exact))
+                db.commit()
+                self.exact_hits += 1
+                self._record_saving(row[1], row[2])
+                return row[0]
+
+        if similarity_threshold and self.embed_fn:
+            return self._lookup_semantic(scope, messages, ttl_seconds, similarity_threshold)
+        return None
+
+    def _lookup_semantic(self, scope: str, messages: list, ttl_seconds: float, threshold: float) -> Optional[str]:
+        try:
+            import numpy as np
+            query = np.asarray(self.embed_fn(self._similarity_text(messages)), dtype=np.float32)
+        except Exception as e:
+            logger.debug(f"Semantic cache tier unavailable: {e}")
+            return None
+
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            rows = db.execute(
+                "SELECT key, embedding, response, tokens, latency FROM responses "
+                "WHERE scope = ? AND embedding IS NOT NULL AND created_at >= ?",
+                (scope, now - ttl_seconds)
+            ).fetchall()
+            if not rows:
+                return None
+            matrix = np.asarray([json.loads(r[1]) for r in rows], dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1) * (np.linalg.norm(query) or 1.0)
+            scores = matrix @ query / np.where(norms == 0, 1.0, norms)
+            best = int(np.argmax(scores))
+            if scores[best] < threshold:
+                return None
+            key, _, response, tokens, latency = rows[best]
+            db.execute("UPDATE responses SET last_hit_at = ? WHERE key = ?", (now, key))
+            db.commit()
+        self.semantic_hits += 1
+        self._record_saving(tokens, latency)
+        logger.info(f"🧠 Semantic cache hit (score {scores[best]:.3f})")
+        return response
+
+    def store(self, route: str, model: str, messages: list, params: Dict[str, Any],
+              response: str, latency: float, with_embedding: bool = False):
+        if not isinstance(response, str) or not response:
+            return
+        exact, scope = self.make_keys(route, model, messages, params)
+        embedding = None
+        if with_embedding and self.embed_fn:
+            try:
+                vec = self.embed_fn(self._similarity_text(messages))
+                embedding = json.dumps([float(x) for x in vec])
+            except Exception as e:
+                logger.debug(f"Failed to embed cache entry: {e}")
+
+        prompt_chars = sum(len(str(m.get("content", ""))) for m in messages)
+        tokens = prompt_chars // 4 + _estimate_tokens(response)
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (exact, route, scope, embedding, response, tokens, latency, now, now)
+            )
+            self._evict(db)
+            db.commit()
+        self.stores += 1
+
+    def _evict(self, db: sqlite3.Connection):
+        (count,) = db.execute("SELECT COUNT(*) FROM responses").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            db.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_hit_at ASC LIMIT ?)",
+                (overflow,)
+            )
+
+    def purge_expired(self, ttl_seconds: float, route: Optional[str] = None):
+        with self._lock:
+            db = self._db()
+            if route:
+                db.execute("DELETE FROM responses WHERE route = ? AND created_at < ?", (route, time.time() - ttl_seconds))
+            else:
+                db.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - ttl_seconds,))
+            db.commit()
+
+    def clear(self):
+        with self._lock:
+            db = self._db()
+            db.execute("DELETE FROM responses")
+            db.commit()
+
+    def _record_saving(self, tokens: int, latency: float):
+        self.tokens_saved += tokens
+        self.seconds_saved += latency
+
+    def get_stats(self) -> Dict[str, Any]:
+        hits = self.exact_hits + self.semantic_hits
+        with self._lock:
+            (entries,) = self._db().execute("SELECT COUNT(*) FROM responses").fetchone()
+        return {
+            "entries": entries,
+            "lookups": self.lookups,
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "hit_rate": round(hits / self.lookups, 3) if self.lookups else 0.0,
+            "stores": self.stores,
+            "tokens_saved_est": self.tokens_saved,
+            "seconds_saved": round(self.seconds_saved, 2),
+        }
+
+
+class CachingLLMDriver(BaseLLMDriver):
+    """
+    Wraps a provider driver for one route. Non-streaming calls go through the
+    cache; streaming calls pass straight through. Preserves the wrapped
+    driver's calling convention (coroutine vs async generator).
+    """
+
+    def __init__(self, inner: BaseLLMDriver, cache: ResponseCache, route: Any):
+        super().__init__(inner.id, inner.name, inner.description)
+        self._inner = inner
+        self._cache = cache
+        self._route = route
+        self.config = inner.config
+        self.enabled = inner.enabled
+
+    def __getattr__(self, name: str):
+        # Legacy access (e.g. .client for get_client) falls through to the wrapped driver
+        return getattr(self._inner, name)
+
+    async def load(self):
+        await self._inner.load()
+
+    async def list_models(self) -> list:
+        return await self._inner.list_models()
+
+    def chat_completion(self, messages: list, model: str, temperature: float = 0.7, stream: bool = False, **kwargs):
+        is_generator = inspect.isasyncgenfunction(self._inner.chat_completion)
+        if stream:
+            return self._inner.chat_completion(messages, model=model, temperature=temperature, stream=stream, **kwargs)
+        if is_generator:
+            return self._cached_generator(messages, model, temperature, kwargs)
+        return self._cached_call(messages, model, temperature, kwargs)
+
+    def stream_chat(self, messages: list, model: str, temperature: float = 0.7, stream: bool = True, **kwargs):
+        if stream:
+            return self._inner.stream_chat(messages, model=model, temperature=temperature, stream=True, **kwargs)
+        return super().stream_chat(messages, model=model, temperature=temperature, stream=False, **kwargs)
+
+    async def _cached_call(self, messages, model, temperature, kwargs) -> Any:
+        params = {"temperature": temperature, **kwargs}
+        hit = await self._lookup(messages, model, params)
+        if hit is not None:
+            return hit
+        started = time.perf_counter()
+        result = await self._inner.chat_completion(messages, model=model, temperature=temperature, stream=False, **kwargs)
+        await self._store(messages, model, params, result, time.perf_counter() - started)
+        return result
+
+    async def _cached_generator(self, messages, model, temperature, kwargs):
+        params = {"temperature": temperature, **kwargs}
+        hit = await self._lookup(messages, model, params)
+        if hit is not None:
+            yield hit
+            return
+        started = time.perf_counter()
+        parts = []
+        async for chunk in self._inner.chat_completion(messages, model=model, temperature=temperature, stream=False, **kwargs):
+            if isinstance(chunk, str):
+                parts.append(chunk)
+            yield chunk
+        await self._store(messages, model, params, "".join(parts), time.perf_counter() - started)
+
+    # SQLite and the optional embedding tier are blocking; keep them off the event loop
+    async def _lookup(self, messages, model, params) -> Optional[str]:
+        try:
+            return await asyncio.to_thread(
+                self._cache.lookup,
+                self._route.feature, model, messages, params,
+                ttl_seconds=self._route.cache_ttl_seconds,
+                similarity_threshold=self._route.cache_similarity_threshold
+            )
+        except Exception as e:
+            logger.warning(f"Response cache lookup failed: {e}")
+            return None
+
+    async def _store(self, messages, model, params, result, latency):
+        try:
+            await asyncio.to_thread(
+                self._cache.store,
+                self._route.feature, model, messages, params, result, latency,
+                with_embedding=bool(self._route.cache_similarity_threshold)
+            )
+        except Exception as e:
+            logger.warning(f"Response cache store failed: {e}")
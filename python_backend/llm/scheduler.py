@@ -0,0 +1,367 @@
+"""
+LLM Request Scheduler
+
+Central admission control in front of every provider:
+- Route priorities: interactive chat > summarization > background jobs.
+  Queued requests are granted strictly by priority, so a chat turn jumps
+  ahead of any queued consolidation/dreaming work.
+- Per-provider concurrency caps (one slot is held back for interactive traffic).
+- Token buckets for requests/min and tokens/min per provider.
+- Queue-wait metrics per route.
+"""
+import asyncio
+import heapq
+import inspect
+import itertools
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, List, Optional
+
+from core.interfaces.driver import BaseLLMDriver
+
+logger = logging.getLogger("LLMScheduler")
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_SUMMARY = 1
+PRIORITY_BACKGROUND = 2
+
+DEFAULT_ROUTE_PRIORITIES = {
+    "chat": PRIORITY_INTERACTIVE,
+    "proactive": PRIORITY_INTERACTIVE,
+    "memory": PRIORITY_SUMMARY,
+}
+
+# Per-request timing sink: callers set a dict here before calling a driver and
+# acquire() adds its queue wait ("queue_ms"). Tasks spawned by wrappers (hedging)
+# inherit the same dict.
+request_timing: ContextVar[Optional[Dict[str, float]]] = ContextVar("llm_request_timing", default=None)
+
+# Completion budget assumed when the caller does not pass max_tokens
+DEFAULT_COMPLETION_TOKENS = 512
+
+
+def estimate_request_tokens(messages: list, max_tokens: Optional[int] = None) -> int:
+    """Rough prompt + completion estimate (~4 chars/token) for the token bucket."""
+    prompt_chars = sum(len(str(m.get("content") or "")) for m in messages or [])
+    return prompt_chars // 4 + (max_tokens or DEFAULT_COMPLETION_TOKENS)
+
+
+class TokenBucket:
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` is available (0 if available now)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float):
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+    def resize(self, per_minute: int):
+        """New rate; the current level carries over (clamped to the new capacity)."""
+        self._refill()
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = min(self.level, self.capacity)
+
+
+class _ProviderQueue:
+    def __init__(self, provider_id: str, max_concurrency: int, rpm: Optional[int], tpm: Optional[int]):
+        self.provider_id = provider_id
+        self.max_concurrency = max(1, max_concurrency)
+        self.in_flight = 0
+        self.waiters: List[tuple] = []  # heap of (priority, seq, tokens, route, future)
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.retry_handle: Optional[asyncio.TimerHandle] = None
+
+    def apply_limits(self, max_concurrency: int, rpm: Optional[int], tpm: Optional[int]):
+        self.max_concurrency = max(1, max_concurrency)
+        self.requests = self._bucket(self.requests, rpm)
+        self.tokens = self._bucket(self.tokens, tpm)
+
+    @staticmethod
+    def _bucket(bucket: Optional[TokenBucket], per_minute: Optional[int]) -> Optional[TokenBucket]:
+        if not per_minute:
+            return None
+        if bucket is None:
+            return TokenBucket(per_minute)
+        bucket.resize(per_minute)
+        return bucket
+
+    def background_limit(self) -> int:
+        # Keep one slot free for interactive traffic when there is more than one
+        return self.max_concurrency - 1 if self.max_concurrency > 1 else 1
+
+
+class _RouteWaitStats:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent: Deque[float] = deque(maxlen=200)
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        ordered = sorted(self.recent)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] if ordered else 0.0
+        return {
+            "requests": self.count,
+            "avg_wait_ms": round(self.total / self.count * 1000, 1) if self.count else 0.0,
+            "p95_wait_ms": round(p95 * 1000, 1),
+            "max_wait_ms": round(self.max * 1000, 1),
+        }
+
+
+class LLMScheduler:
+    def __init__(self):
+        self._queues: Dict[str, _ProviderQueue] = {}
+        self._route_stats: Dict[str, _RouteWaitStats] = {}
+        self._seq = itertools.count()
+        self.preemptions = 0
+
+    def configure_provider(self, provider_id: str, max_concurrency: int = 4,
+                           rpm: Optional[int] = None, tpm: Optional[int] = None):
+        """
+        (Re)apply limits. The existing queue is updated in place, so in-flight
+        requests release their slots on the same queue they acquired from.
+        """
+        queue = self._queues.get(provider_id)
+        if queue is None:
+            self._queues[provider_id] = _ProviderQueue(provider_id, max_concurrency, rpm, tpm)
+            return
+        queue.apply_limits(max_concurrency, rpm, tpm)
+        if queue.retry_handle:
+            queue.retry_handle.cancel()
+            queue.retry_handle = None
+        self._dispatch(queue)
+
+    def _queue(self, provider_id: str) -> _ProviderQueue:
+        if provider_id not in self._queues:
+            self.configure_provider(provider_id)
+        return self._queues[provider_id]
+
+    # ==================== ADMISSION ====================
+
+    @asynccontextmanager
+    async def slot(self, provider_id: str, route: str, priority: int, tokens: int = 0):
+        """Hold a provider slot for the duration of the block (including streaming)."""
+        queue = await self.acquire(provider_id, route, priority, tokens)
+        try:
+            yield
+        finally:
+            self.release(queue)
+
+    async def acquire(self, provider_id: str, route: str, priority: int, tokens: int = 0) -> _ProviderQueue:
+        queue = self._queue(provider_id)
+        future = asyncio.get_running_loop().create_future()
+        queued_at = time.monotonic()
+        heapq.heappush(queue.waiters, (priority, next(self._seq), tokens, route, future))
+        self._dispatch(queue)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted at the same moment we were cancelled: give the slot back
+                self.release(queue)
+            else:
+                future.cancel()
+                self._dispatch(queue)
+            raise
+
+        waited = time.monotonic() - queued_at
+        self._route_stats.setdefault(route, _RouteWaitStats()).add(waited)
+        timing = request_timing.get()
+        if timing is not None:
+            timing["queue_ms"] = round(timing.get("queue_ms", 0.0) + waited * 1000, 2)
+        if waited > 1.0:
+            logger.info(f"⏳ LLM request for '{route}' waited {waited:.2f}s on {provider_id}")
+        return queue
+
+    def release(self, queue: _ProviderQueue):
+        queue.in_flight -= 1
+        self._dispatch(queue)
+
+    def _dispatch(self, queue: _ProviderQueue):
+        while queue.waiters:
+            priority, seq, tokens, route, future = queue.waiters[0]
+            if future.done():  # cancelled while queued
+                heapq.heappop(queue.waiters)
+                continue
+
+            limit = queue.max_concurrency if priority == PRIORITY_INTERACTIVE else queue.background_limit()
+            if queue.in_flight >= limit:
+                return
+
+            delay = max(
+                queue.requests.wait_time(1) if queue.requests else 0.0,
+                queue.tokens.wait_time(tokens) if queue.tokens else 0.0,
+            )
+            if delay > 0:
+                if queue.retry_handle is None or queue.retry_handle.cancelled():
+                    queue.retry_handle = asyncio.get_running_loop().call_later(delay, self._retry, queue)
+                return
+
+            heapq.heappop(queue.waiters)
+            if queue.requests:
+                queue.requests.take(1)
+            if queue.tokens:
+                queue.tokens.take(tokens)
+            if priority == PRIORITY_INTERACTIVE and any(
+                    w[0] > priority and w[1] < seq and not w[4].done() for w in queue.waiters):
+                self.preemptions += 1
+            queue.in_flight += 1
+            future.set_result(None)
+
+    def _retry(self, queue: _ProviderQueue):
+        queue.retry_handle = None
+        self._dispatch(queue)
+
+    # ==================== METRICS ====================
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "providers": {
+                pid: {
+                    "in_flight": q.in_flight,
+                    "queued": sum(1 for w in q.waiters if not w[4].done()),
+                    "max_concurrency": q.max_concurrency,
+                }
+                for pid, q in self._queues.items()
+            },
+            "routes": {route: s.snapshot() for route, s in self._route_stats.items()},
+            "interactive_preemptions": self.preemptions,
+        }
+
+
+class ScheduledLLMDriver(BaseLLMDriver):
+    """
+    Wraps a provider driver so every call goes through the scheduler.
+    Streaming calls hold their slot until the stream is exhausted or closed.
+    """
+
+    def __init__(self, inner: BaseLLMDriver, scheduler: LLMScheduler, route: str, priority: int):
+        super().__init__(inner.id, inner.name, inner.description)
+        self._inner = inner
+        self._scheduler = scheduler
+        self._route = route
+        self._priority = priority
+        self.config = inner.config
+        self.enabled = inner.enabled
+        # Keep the inner driver's calling convention (async generator vs coroutine):
+        # callers await or iterate chat_completion, and the response cache inspects it
+        if inspect.isasyncgenfunction(inner.chat_completion):
+            self.chat_completion = self._generator_completion
+
+    def __getattr__(self, name: str):
+        return getattr(self._inner, name)
+
+    async def load(self):
+        await self._inner.load()
+
+    async def list_models(self) -> list:
+        return await self._inner.list_models()
+
+    def _slot(self, messages: list, kwargs: dict):
+        tokens = estimate_request_tokens(messages, kwargs.get("max_tokens"))
+        return self._scheduler.slot(self._inner.id, self._route, self._priority, tokens)
+
+    async def chat_completion(self, messages: list, model: str, temperature: float = 0.7, stream: bool = False, **kwargs):
+        """Coroutine drivers: awaited as before; a stream comes back as a generator that holds the slot."""
+        if stream:
+            return self._scheduled_stream(messages, model, temperature, kwargs)
+        async with self._slot(messages, kwargs):
+            return await self._inner.chat_completion(messages, model=model, temperature=temperature, stream=False, **kwargs)
+
+    async def _generator_completion(self, messages: list, model: str, temperature: float = 0.7, stream: bool = False, **kwargs):
+        """chat_completion for async-generator drivers (e.g. pollinations)."""
+        async with self._slot(messages, kwargs):
+            async for chunk in self._inner.chat_completion(messages, model=model, temperature=temperature, stream=stream, **kwargs):
+                yield chunk
+
+    async def _scheduled_stream(self, messages, model, temperature, kwargs):
+        async with self._slot(messages, kwargs):
+            result = await self._inner.chat_completion(messages, model=model, temperature=temperature, stream=True, **kwargs)
+            async for chunk in result:
+                yield chunk
+
+    async def stream_chat(self, messages: list, model: str, temperature: float = 0.7, stream: bool = True, **kwargs):
+        async with self._slot(messages, kwargs):
+            async for chunk in self._inner.stream_chat(messages, model=model, temperature=temperature, stream=stream, **kwargs):
+                yield chunk
+
+
+class ScheduledClient:
+    """
+    Proxy for raw AsyncOpenAI clients handed out by LLMManager.get_client().
+    Only `chat.completions.create` is scheduled; everything else passes through.
+    """
+
+    def __init__(self, client: Any, scheduler: LLMScheduler, provider_id: str, route: str, priority: int):
+        self._client = client
+        self.chat = _ScheduledChat(client, scheduler, provider_id, route, priority)
+
+    def __getattr__(self, name: str):
+        return getattr(self._client, name)
+
+
+class _ScheduledChat:
+    def __init__(self, client, scheduler, provider_id, route, priority):
+        self._chat = client.chat
+        self.completions = _ScheduledCompletions(client, scheduler, provider_id, route, priority)
+
+    def __getattr__(self, name: str):
+        return getattr(self._chat, name)
+
+
+class _ScheduledCompletions:
+    def __init__(self, client, scheduler, provider_id, route, priority):
+        self._completions = client.chat.completions
+        self._scheduler = scheduler
+        self._provider_id = provider_id
+        self._route = route
+        self._priority = priority
+
+    def __getattr__(self, name: str):
+        return getattr(self._completions, name)
+
+    async def create(self, **kwargs):
+        tokens = estimate_request_tokens(kwargs.get("messages"), kwargs.get("max_tokens"))
+        queue = await self._scheduler.acquire(self._provider_id, self._route, self._priority, tokens)
+        try:
+            response = await self._completions.create(**kwargs)
+        except BaseException:
+            self._scheduler.release(queue)
+            raise
+        if kwargs.get("stream"):
+            return self._release_after(response, queue)
+        self._scheduler.release(queue)
+        return response
+
+    async def _release_after(self, stream, queue):
+        try:
+            async for chunk in stream:
+                yield chunk
+        finally:
+            self._scheduler.release(queue)
@@ -6,6 +6,7 @@ from threading import Thread
 from typing import List, Dict, Optional, Any
 from app_config import config
 from memory.vector_store import VectorStore
+from memory.rerank import memory_reranker
 # from memory.connection import DBConnection # Deprecated
 from memory.factory import MemoryDriverFactory, NoOpDriver # Use Factory and shared NoOp
 # Concrete drivers loaded dynamically
@@ -33,7 +34,7 @@ class SurrealMemory:
              self.driver = NoOpDriver()
          
          # Components
-         self.vector_store = VectorStore(self.driver)
+         self.vector_store = VectorStore(self.driver, reranker=memory_reranker if config.memory.rerank_enabled else None)
          
          # Background Queue
          self.queue = Queue()
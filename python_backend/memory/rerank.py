@@ -0,0 +1,148 @@
+"""
+Cross-Encoder Reranking (retrieved memories)
+
+Optional stage after hybrid search (MemoryConfig.rerank_enabled): the search
+over-fetches `candidates` rows, a small cross-encoder scores every
+(query, memory) pair in one CPU batch, and only the best `top_k` reach the
+prompt. Scoring runs in a worker thread under `budget_ms`; on timeout, on
+error, while the model is still loading in the background, or while a
+previous batch is still running, the hybrid (RRF) order is kept instead.
+"""
+import asyncio
+import logging
+import time
+from collections import Counter, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from app_config import config
+
+logger = logging.getLogger("memory.rerank")
+
+# Latency is reported per candidate-count bucket
+_BUCKETS = (20, 50, 100)
+
+
+def _bucket(n: int) -> str:
+    return next((f"<={b}" for b in _BUCKETS if n <= b), f">{_BUCKETS[-1]}")
+
+
+def memory_text(row: Dict[str, Any]) -> str:
+    return str(row.get("content") or row.get("narrative") or "")
+
+
+class CrossEncoderReranker:
+    def __init__(self,
+                 model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+                 candidates: int = 30,
+                 top_k: int = 5,
+                 budget_ms: int = 150,
+                 max_chars: int = 512,
+                 score_fn: Optional[Callable[[List[Tuple[str, str]]], Sequence[float]]] = None):
+        """`score_fn(pairs) -> scores` runs in a worker thread (default: model_manager cross-encoder)."""
+        self.model_name = model_name
+        self.candidates = candidates
+        self.top_k = top_k
+        self.budget_ms = budget_ms
+        self.max_chars = max_chars
+        self.score_fn = score_fn
+        self._load_task: Optional[asyncio.Task] = None
+        self._load_failed = False
+        self._busy = False
+
+        # Stats
+        self.requests = 0
+        self.reranked = 0
+        self.fallbacks: Counter = Counter()
+        self.latency: Dict[str, Deque[float]] = {}
+
+    # ==================== MODEL ====================
+
+    def _ready_score_fn(self) -> Optional[Callable]:
+        """Scorer if loaded; otherwise starts the load once in the background."""
+        if self.score_fn is not None or self._load_failed:
+            return self.score_fn
+        if self._load_task is None:
+            self._load_task = asyncio.create_task(asyncio.to_thread(self._load))
+        return None
+
+    def _load(self):
+        try:
+            from model_manager import model_manager
+            model = model_manager.get_reranker_model(self.model_name)
+        except Exception as e:
+            logger.error(f"Reranker load error: {e}")
+            model = None
+        if model is None:
+            self._load_failed = True
+            logger.warning(f"Reranker {self.model_name} unavailable, keeping hybrid search order")
+            return
+        self.score_fn = lambda pairs: model.predict(pairs, batch_size=len(pairs), show_progress_bar=False)
+
+    # ==================== RERANK ====================
+
+    async def rerank(self, query: str, rows: List[Dict[str, Any]], top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Best `top_k` rows by cross-encoder score (each gets `rerank_score`), or the first `top_k` on fallback."""
+        top_k = top_k or self.top_k
+        self.requests += 1
+        if len(rows) <= 1:
+            return rows[:top_k]
+
+        score_fn = self._ready_score_fn()
+        if score_fn is None:
+            return self._fallback("unavailable" if self._load_failed else "loading", rows, top_k)
+        if self._busy:
+            # A timed-out batch still holds the CPU; don't queue another behind it
+            return self._fallback("busy", rows, top_k)
+
+        pairs = [(query, memory_text(r)[:self.max_chars]) for r in rows]
+        started = time.perf_counter()
+        self._busy = True
+        work = asyncio.ensure_future(asyncio.to_thread(score_fn, pairs))
+        work.add_done_callback(self._release)
+        try:
+            scores = await asyncio.wait_for(asyncio.shield(work), self.budget_ms / 1000.0)
+        except asyncio.TimeoutError:
+            return self._fallback("timeout", rows, top_k)
+        except Exception as e:
+            logger.warning(f"Rerank failed, keeping hybrid order: {e}")
+            return self._fallback("error", rows, top_k)
+
+        self.latency.setdefault(_bucket(len(rows)), deque(maxlen=500)).append(time.perf_counter() - started)
+        self.reranked += 1
+        order = sorted(range(len(rows)), key=lambda i: scores[i], reverse=True)[:top_k]
+        return [{**rows[i], "rerank_score": float(scores[i])} for i in order]
+
+    def _release(self, task: asyncio.Future):
+        self._busy = False
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Rerank batch error: {task.exception()}")
+
+    def _fallback(self, reason: str, rows: List[Dict[str, Any]], top_k: int) -> List[Dict[str, Any]]:
+        self.fallbacks[reason] += 1
+        return rows[:top_k]
+
+    def get_stats(self) -> Dict[str, Any]:
+        def pct(values, p):
+            ordered = sorted(values)
+            return round(ordered[min(len(ordered) - 1, int(len(ordered) * p))] * 1000, 1)
+
+        return {
+            "model": self.model_name,
+            "state": "ready" if self.score_fn else ("unavailable" if self._load_failed else "lazy"),
+            "requests": self.requests,
+            "reranked": self.reranked,
+            "fallbacks": dict(self.fallbacks),
+            "budget_ms": self.budget_ms,
+            "latency_ms": {
+                bucket: {"p50": pct(values, 0.5), "p95": pct(values, 0.95), "n": len(values)}
+                for bucket, values in sorted(self.latency.items())
+            },
+        }
+
+
+memory_reranker = CrossEncoderReranker(
+    model_name=config.memory.rerank_model,
+    candidates=config.memory.rerank_candidates,
+    top_k=config.memory.rerank_top_k,
+    budget_ms=config.memory.rerank_budget_ms,
+)
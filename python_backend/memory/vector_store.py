@@ -11,8 +11,9 @@ class VectorStore:
     Database-agnostic implementation.
     """
 
-    def __init__(self, driver: VectorDBInterface):
+    def __init__(self, driver: VectorDBInterface, reranker: Optional[Any] = None):
         self.driver = driver
+        self.reranker = reranker  # memory.rerank.CrossEncoderReranker (optional stage)
 
     async def add_episodic_memory(self, 
                                   character_id: str, 
@@ -92,13 +93,23 @@ class VectorStore:
                            vector_weight: float = 0.4,
                            initial_threshold: float = 0.45,
                            min_results: int = 3,
-                           target_table: str = "episodic_memory") -> List[Dict]:
-        """Hybrid Search (Delegated to Driver)"""
+                           target_table: str = "episodic_memory",
+                           rerank: bool = False) -> List[Dict]:
+        """
+        Hybrid Search (Delegated to Driver)
+        With `rerank` (and a reranker configured), over-fetches candidates and
+        keeps the reranker's top-k (at most `limit`).
+        """
         try:
             filters = {"character_id": character_id}
             if target_table == "episodic_memory":
                 filters["status"] = "active"
 
+            rerank = rerank and self.reranker is not None
+            keep = min(limit, self.reranker.top_k) if rerank else limit
+            if rerank:
+                limit = max(limit, self.reranker.candidates)
+
             results = []
             current_threshold = initial_threshold
             
@@ -123,6 +134,9 @@ class VectorStore:
                     
                 logger.info(f"📉 Hybrid Search: Not enough results ({len(results)}/{min_results}). Lowering threshold {current_threshold:.2f} -> {current_threshold - 0.1:.2f}")
                 current_threshold -= 0.1
+
+            if rerank and len(results) > keep:
+                results = await self.reranker.rerank(query, results, keep)
             
             # Optimization: Mark hits
             if results:
@@ -1,5 +1,6 @@
 import os
 import sys
+import threading
 import time
 import requests
 import logging
@@ -24,6 +25,10 @@ class ModelManager:
             os.makedirs(self.base_dir)
             
         self.original_env = {}
+        self._embedding_models = {}
+        self._embedding_failed = set()
+        self._reranker_models = {}
+        self._embedding_lock = threading.Lock()
 
     def display_progress_bar(self, percent, message="", mb_downloaded=None, mb_total=None):
         """Display simple progress bar"""
@@ -146,6 +151,56 @@ class ModelManager:
             return model
         except Exception as e:
             logger.error(f"Failed to load embedding model: {e}")
+
+    def get_embedding_model(self, model_name: str = "all-MiniLM-L6-v2"):
+        """
+        Shared, loaded-once embedding model (ensure + load are expensive).
+        Returns None if it cannot be downloaded or loaded. The failure is
+        remembered for the process, so callers on the hot path don't retry
+        the download on every request.
+        """
+        model = self._embedding_models.get(model_name)
+        if model is not None or model_name in self._embedding_failed:
+            return model
+        with self._embedding_lock:
+            model = self._embedding_models.get(model_name)
+            if model is None and model_name not in self._embedding_failed:
+                try:
+                    model = self.load_embedding_model(self.ensure_embedding_model(model_name))
+                except Exception:
+                    model = None  # ensure_embedding_model already logged why
+                if model is not None:
+                    self._embedding_models[model_name] = model
+                else:
+                    self._embedding_failed.add(model_name)
+                    logger.warning(f"Embedding model {model_name} unavailable for this session")
+            return model
+
+    def get_reranker_model(self, model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2", max_length: int = 256):
+        """
+        Shared CPU cross-encoder for memory reranking (ONNX Runtime backend
+        when the installed sentence-transformers supports it, else torch).
+        Returns None if it cannot be loaded.
+        """
+        model = self._reranker_models.get(model_name)
+        if model is not None:
+            return model
+        with self._embedding_lock:
+            model = self._reranker_models.get(model_name)
+            if model is None:
+                try:
+                    from sentence_transformers import CrossEncoder
+                    try:
+                        model = CrossEncoder(model_name, device="cpu", max_length=max_length, backend="onnx")
+                    except Exception as e:
+                        logger.info(f"ONNX backend unavailable for {model_name} ({e}), using torch on CPU")
+                        model = CrossEncoder(model_name, device="cpu", max_length=max_length)
+                    self._reranker_models[model_name] = model
+                    logger.info(f"Reranker {model_name} loaded on cpu")
+                except Exception as e:
+                    logger.error(f"Failed to load reranker model: {e}")
+            return model
+
     def ensure_embedding_model(self, model_name: str) -> str:
         """
         Ensure the embedding model exists locally.
@@ -2,6 +2,7 @@ import logging
 from openai import AsyncOpenAI
 from typing import Any, List, Optional
 from core.interfaces.driver import BaseLLMDriver
+from llm.http_pool import http_pool
 
 logger = logging.getLogger("OpenAIDriver")
 
@@ -21,10 +22,16 @@ class OpenAIDriver(BaseLLMDriver):
             base_url=self.config.get("base_url"),
             api_key=self.config.get("api_key"),
             timeout=self.config.get("timeout", 60.0),
-            max_retries=self.config.get("max_retries", 2)
+            max_retries=self.config.get("max_retries", 2),
+            # Shared per-host pool: keep-alive/TLS reuse across drivers and routes
+            http_client=http_pool.get_client(self.base_url, self.id)
         )
         logger.info(f"OpenAIDriver initialized with BaseURL: {self.config.get('base_url')}")
 
+    @property
+    def base_url(self) -> str:
+        return self.config.get("base_url") or "https://api.openai.com/v1"
+
     async def chat_completion(self, 
                             messages: list, 
                             model: str, 
@@ -55,6 +62,60 @@ class OpenAIDriver(BaseLLMDriver):
             logger.error(f"OpenAI Chat Completion Error: {e}")
             raise
 
+    async def stream_chat(self,
+                          messages: list,
+                          model: str,
+                          temperature: float = 0.7,
+                          stream: bool = True,
+                          **kwargs):
+        """Normalize OpenAI SDK output to text chunks + tool-call events (see BaseLLMDriver.stream_chat)."""
+        if not self.client:
+            await self.load()
+            
+        # Explicit None (e.g. tools=None) must not be sent as JSON null
+        kwargs = {k: v for k, v in kwargs.items() if v is not None}
+        if stream and self.config.get("stream_usage", True):
+            # Final chunk carries token usage (set stream_usage: false for providers that reject it)
+            kwargs.setdefault("stream_options", {"include_usage": True})
+        
+        try:
+            response = await self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                stream=stream,
+                **kwargs
+            )
+        except Exception as e:
+            logger.error(f"OpenAI Chat Completion Error: {e}")
+            raise
+            
+        if not stream:
+            message = response.choices[0].message
+            if message.tool_calls:
+                yield {"tool_calls": [tc.model_dump(exclude_none=True) for tc in message.tool_calls]}
+            if message.content:
+                yield message.content
+            if response.usage:
+                yield {"usage": response.usage.model_dump(exclude_none=True)}
+            return
+            
+        try:
+            async for chunk in response:
+                if getattr(chunk, "usage", None):
+                    yield {"usage": chunk.usage.model_dump(exclude_none=True)}
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                if delta.tool_calls:
+                    # Forward fragments as they arrive so tools can start before the stream ends
+                    yield {"tool_call_deltas": [tc.model_dump(exclude_none=True) for tc in delta.tool_calls]}
+                if delta.content:
+                    yield delta.content
+        finally:
+            # Abandoned streams (cancelled / lost hedge race) must release the HTTP connection
+            await response.close()
+
     async def list_models(self) -> list:
         if not self.client:
              await self.load()
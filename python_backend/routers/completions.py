@@ -4,7 +4,8 @@ import json
 import httpx
 import asyncio
 import time
-from fastapi import APIRouter, Request, HTTPException
+import uuid
+from fastapi import APIRouter, Request, Response, HTTPException
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
@@ -42,6 +43,13 @@ class ChatCompletionRequest(BaseModel):
     stream: bool = False
     max_tokens: Optional[int] = None
     temperature: Optional[float] = 0.7
+    stream_options: Optional[Dict[str, Any]] = None # {"include_usage": true} -> final usage chunk
+
+class PrefetchRequest(BaseModel):
+    text: str
+    user_id: str = "default_user" # must match the completions turn that claims it
+    character_id: Optional[str] = None
+    origin: str = "typing" # "typing" | "stt_partial"
 
 # --- Tool Definitions ---
 
@@ -68,19 +76,10 @@ WEB_SEARCH_TOOL = {
 async def handle_tool_call(tool_name: str, args: dict) -> str:
     """Execute tool and return string result"""
     if tool_name == "web_search":
-        from services.container import services
-        provider_id = app_config.search.provider # "brave" or "duckduckgo"
-        
-        provider = services.get_search_provider(provider_id)
-        if not provider:
-             return f"Error: Search provider '{provider_id}' is not active or installed."
-
-        logger.info(f"[UnifiedLLM] Web Search requested via provider: {provider_id}")
-        
-        try:
-             return await provider.search(args.get("query", ""))
-        except Exception as e:
-             return f"Error executing search with {provider_id}: {e}"
+        # Same path as the chat pipeline: result cache, optional hedge provider, size cap
+        from services.chat.tools.search import WebSearchTool
+        logger.info(f"[UnifiedLLM] Web Search requested via provider: {app_config.search.provider}")
+        return await WebSearchTool().execute(args)
     
     return f"Error: Unknown tool '{tool_name}'"
 
@@ -100,7 +99,7 @@ def mask_log(text: str) -> str:
 # --- Main Logic ---
 
 @router.post("/v1/chat/completions")
-async def chat_completions(request: ChatCompletionRequest):
+async def chat_completions(request: ChatCompletionRequest, response: Response):
     """
     Unified Chat Endpoint (Phase 19).
     Delegates to UnifiedChatProcessor for RAG, Tools, and LLM.
@@ -136,39 +135,64 @@ async def chat_completions(request: ChatCompletionRequest):
     if soul_client:
         character_id = soul_client.character_id or character_id
     
+    # Single-flight: a duplicate of an in-flight turn (double-click, client
+    # retry) follows the same generation instead of starting another
+    from services.chat.single_flight import chat_single_flight, make_key
+    flight_key = make_key((user_id, character_id), messages, request.model)
+
+    trace: Dict[str, Any] = {} # filled by the pipeline: timing + provider usage
+
+    def generate():
+        return unified_chat.process(
+            messages=messages,
+            user_id=user_id,
+            character_id=character_id,
+            enable_rag=True,
+            enable_tools=True,
+            model=request.model,
+            temperature=request.temperature,
+            stream=request.stream,
+            trace=trace,
+        )
+
+    # Joiners of an in-flight turn report the leader's trace (usage, Server-Timing)
+    tokens, trace = chat_single_flight.join(flight_key, generate, shared=trace)
+
     try:
         if request.stream:
+            encoder = _ChunkEncoder(request.model)
+            frames = _batched(tokens, SSE_BATCH_WINDOW)
+            include_usage = bool((request.stream_options or {}).get("include_usage"))
+            
+            # Wait for the first frame so queue/TTFT can go into the response headers
+            # (and a failure before any output is a proper HTTP error)
+            try:
+                first = await frames.__anext__()
+            except StopAsyncIteration:
+                first = None
+            
             async def stream_generator():
-                async for token in unified_chat.process(
-                    messages=messages,
-                    user_id=user_id,
-                    character_id=character_id,
-                    enable_rag=True,
-                    enable_tools=True,
-                    model=request.model,
-                    temperature=request.temperature,
-                    stream=True,
-                ):
-                    yield _mock_chunk(token, request.model)
-                yield "data: [DONE]\n\n"
+                try:
+                    if first is not None:
+                        yield encoder.content(first)
+                    async for text in frames:
+                        yield encoder.content(text)
+                    yield encoder.finish
+                    if include_usage and trace.get("usage"):
+                        yield encoder.usage(trace["usage"])
+                    yield SSE_DONE
+                finally:
+                    await frames.aclose()
             
-            return StreamingResponse(stream_generator(), media_type="text/event-stream")
+            return StreamingResponse(stream_generator(), media_type="text/event-stream",
+                                     headers={"Server-Timing": _server_timing(trace)})
         else:
             # Non-streaming: collect full response
-            full_response = ""
-            async for token in unified_chat.process(
-                messages=messages,
-                user_id=user_id,
-                character_id=character_id,
-                enable_rag=True,
-                enable_tools=True,
-                model=request.model,
-                temperature=request.temperature,
-                stream=False,
-            ):
-                full_response += token
+            parts = [token async for token in tokens]
+            full_response = "".join(parts)
+            response.headers["Server-Timing"] = _server_timing(trace)
             
-            return {
+            result = {
                 "id": "chatcmpl-unified",
                 "object": "chat.completion",
                 "created": int(time.time()),
@@ -182,10 +206,29 @@ async def chat_completions(request: ChatCompletionRequest):
                     "finish_reason": "stop"
                 }]
             }
+            if trace.get("usage"):
+                result["usage"] = trace["usage"]
+            return result
     except Exception as e:
         logger.error(f"[UnifiedChat] Generation Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/v1/chat/prefetch")
+async def chat_prefetch(request: PrefetchRequest):
+    """
+    Speculative RAG prefetch from partial input (typing activity / STT partials).
+    Fire-and-forget: the next /v1/chat/completions turn reuses the results if its text is close enough.
+    """
+    from services.chat.providers import rag_prefetcher
+    
+    character_id = request.character_id
+    if not character_id:
+        soul_client = getattr(services, "soul_client", None)
+        character_id = (soul_client.character_id if soul_client else None) or "default_char"
+    
+    scheduled = rag_prefetcher.prefetch(request.user_id, character_id, request.text)
+    return {"scheduled": scheduled, "origin": request.origin}
+
 async def _sse_formatter(generator):
     """Ensure output is SSE format"""
     async for chunk in generator:
@@ -209,6 +252,86 @@ async def _sse_formatter(generator):
                 
     yield "data: [DONE]\n\n"
 
+# --- SSE Relay ---
+
+SSE_BATCH_WINDOW = 0.015 # seconds; tokens arriving within one window share an SSE frame
+SSE_DONE = b"data: [DONE]\n\n"
+
+
+class _ChunkEncoder:
+    """
+    chat.completion.chunk frames for one response. The JSON around the delta
+    text is constant, so it is serialized once; each frame only encodes its text.
+    """
+    def __init__(self, model: str):
+        head = json.dumps({
+            "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+        })[:-1]
+        self._head = head
+        self._prefix = f'data: {head}, "choices": [{{"index": 0, "delta": {{"content": '.encode()
+        self._suffix = b'}, "finish_reason": null}]}\n\n'
+        self.finish = f'data: {head}, "choices": [{{"index": 0, "delta": {{}}, "finish_reason": "stop"}}]}}\n\n'.encode()
+
+    def content(self, text: str) -> bytes:
+        return self._prefix + json.dumps(text).encode() + self._suffix
+
+    def usage(self, usage: Dict[str, Any]) -> bytes:
+        return f'data: {self._head}, "choices": [], "usage": {json.dumps(usage)}}}\n\n'.encode()
+
+
+async def _batched(tokens, window: float):
+    """
+    Re-chunk a token stream into frames: the first token goes out at once
+    (TTFT), later tokens are collected for up to `window` seconds per frame.
+    A pump task reads tokens, so per-token cost is a list append.
+    """
+    buffer: List[str] = []
+    wake = asyncio.Event()
+    done = False
+    error: Optional[BaseException] = None
+
+    async def pump():
+        nonlocal done, error
+        try:
+            async for token in tokens:
+                buffer.append(token)
+                wake.set()
+        except Exception as e:
+            error = e
+        finally:
+            done = True
+            wake.set()
+
+    task = asyncio.create_task(pump())
+    first = True
+    try:
+        while True:
+            await wake.wait()
+            wake.clear()
+            if buffer and not first and not done:
+                await asyncio.sleep(window)
+            if buffer:
+                text = "".join(buffer)
+                buffer.clear()
+                first = False
+                yield text
+            if done and not buffer:
+                break
+        if error is not None:
+            raise error
+    finally:
+        task.cancel()
+
+
+def _server_timing(trace: Dict[str, Any]) -> str:
+    timing = trace.get("timing", {})
+    return ", ".join(f"{name};dur={timing[key]}" for name, key in
+                     (("prep", "prep_ms"), ("queue", "queue_ms"), ("ttft", "ttft_ms")) if key in timing)
+
+
 def _mock_chunk(content: str, model: str) -> str:
     """Helper to create OpenAI-compatible delta chunk"""
     return "data: " + json.dumps({
@@ -124,6 +124,82 @@ async def brain_dump(character_id: str = "hiyori"):
         }
 
 
+@router.get("/summaries/stats")
+async def get_summary_stats():
+    """Session summarization runs vs. coalesced triggers."""
+    from services.chat.summary_scheduler import summary_scheduler
+    return summary_scheduler.get_stats()
+
+@router.get("/chat_bridge/stats")
+async def get_chat_bridge_stats():
+    """Per-session turn registry: active/queued turns, interrupts, slot wait."""
+    from services.container import services
+    bridge = getattr(services, "chat_bridge", None)
+    if not bridge:
+        raise HTTPException(status_code=503, detail="Chat bridge not running")
+    return bridge.get_stats()
+
+@router.get("/single_flight/stats")
+async def get_single_flight_stats():
+    """Duplicate chat requests joined to an in-flight generation."""
+    from services.chat.single_flight import chat_single_flight
+    return chat_single_flight.get_stats()
+
+@router.get("/voice/stats")
+async def get_voice_stats():
+    """Server-side voice pipeline: time-to-first-audio and inter-sentence gaps."""
+    from services.voice_pipeline import voice_stats
+    return voice_stats.get_stats()
+
+@router.get("/guard/stats")
+async def get_guard_stats():
+    """Input guardrail scanner: messages scanned vs. skipped as already approved."""
+    from core.security.guardrails import InputGuard
+    return InputGuard.get_stats()
+
+@router.get("/history_select/stats")
+async def get_history_select_stats():
+    """Relevant-history selection: turns scored, embedding cache hits."""
+    from services.chat.history_select import history_selector
+    return history_selector.get_stats()
+
+@router.get("/prompt_cache/stats")
+async def get_prompt_cache_stats():
+    """Provider prompt-cache hit rate and TTFT (hit vs. miss) per route and prompt layout."""
+    from llm.prompt_cache import prompt_cache_stats
+    return prompt_cache_stats.get_stats()
+
+@router.get("/intent_gate/stats")
+async def get_intent_gate_stats():
+    """Intent gate decisions (label/source) and RAG/tool passes skipped."""
+    from services.chat.intent_gate import intent_gate
+    return intent_gate.get_stats()
+
+@router.get("/tool_select/stats")
+async def get_tool_select_stats():
+    """Per-turn tool subset selection: tools available vs. sent."""
+    from services.chat.tool_select import tool_selector
+    return tool_selector.get_stats()
+
+@router.get("/search/stats")
+async def get_search_stats():
+    """Web search result cache hit rate, hedge wins and truncations."""
+    from services.chat.tools import search
+    return search.get_stats()
+
+@router.get("/rerank/stats")
+async def get_rerank_stats():
+    """Memory rerank stage: latency per candidate count and fallbacks to hybrid order."""
+    from memory.rerank import memory_reranker
+    return memory_reranker.get_stats()
+
+@router.get("/prefetch/stats")
+async def get_prefetch_stats():
+    """Speculative RAG prefetch hit rate and TTFT saved."""
+    from services.chat.providers import rag_prefetcher
+    return rag_prefetcher.get_stats()
+
+
 @router.get("/processing_status")
 async def get_processing_status(character_id: str = "hiyori"):
     """Get real-time status of memory processing pipeline"""
@@ -27,6 +27,7 @@ class GatewayService:
             EventType.BRAIN_THINKING,
             EventType.BRAIN_RESPONSE,
             "brain_response_end", # Custom string type
+            EventType.OUTPUT_AUDIO, # Server-side voice pipeline
             EventType.COGNITIVE_STATE,
             EventType.SYSTEM_STATUS,
             EventType.CONTROL_SESSION,
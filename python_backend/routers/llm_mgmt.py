@@ -27,7 +27,7 @@ async def get_providers():
 async def update_provider_config(provider_id: str, config: Dict[str, Any]):
     try:
         # Filter allowed keys
-        allowed = {"base_url", "api_key", "models", "type", "enabled"}
+        allowed = {"base_url", "api_key", "models", "type", "enabled", "context_window", "model_context_windows"}
         updates = {k: v for k, v in config.items() if k in allowed}
         _get_llm_manager().update_provider(provider_id, updates)
         return {"status": "ok", "provider": _get_llm_manager().config.providers[provider_id]}
@@ -54,6 +54,11 @@ async def update_route(feature: str, payload: Dict[str, Any]):
         top_p = payload.get("top_p")
         presence_penalty = payload.get("presence_penalty")
         frequency_penalty = payload.get("frequency_penalty")
+        cache_enabled = payload.get("cache_enabled")
+        cache_ttl_seconds = payload.get("cache_ttl_seconds")
+        hedge_provider_id = payload.get("hedge_provider_id")
+        hedge_model = payload.get("hedge_model")
+        hedge_delay_ms = payload.get("hedge_delay_ms")
         
         if not provider_id or not model:
             raise HTTPException(status_code=400, detail="Missing provider_id or model")
@@ -64,7 +69,12 @@ async def update_route(feature: str, payload: Dict[str, Any]):
             "temperature": temperature,
             "top_p": top_p,
             "presence_penalty": presence_penalty,
-            "frequency_penalty": frequency_penalty
+            "frequency_penalty": frequency_penalty,
+            "cache_enabled": cache_enabled,
+            "cache_ttl_seconds": cache_ttl_seconds,
+            "hedge_provider_id": hedge_provider_id,
+            "hedge_model": hedge_model,
+            "hedge_delay_ms": hedge_delay_ms
         }
         # Filter out None values to allow partial updates (and prevent Pydantic validation errors)
         clean_updates = {k: v for k, v in updates.items() if v is not None}
@@ -76,6 +86,59 @@ async def update_route(feature: str, payload: Dict[str, Any]):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """Response cache metrics for background routes (hits, tokens/seconds saved)"""
+    return _get_llm_manager().get_cache_stats()
+
+@router.post("/cache/clear")
+async def clear_cache():
+    _get_llm_manager().get_response_cache().clear()
+    return {"status": "ok"}
+
+@router.get("/scheduler/stats")
+async def get_scheduler_stats():
+    """Per-provider slots/queue depth and per-route queue wait"""
+    return _get_llm_manager().scheduler.get_stats()
+
+@router.get("/hedging/stats")
+async def get_hedging_stats():
+    """Per-route hedge counts and TTFT percentiles"""
+    return {feature: stats.snapshot() for feature, stats in _get_llm_manager().hedge_stats.items()}
+
+@router.get("/pool/stats")
+async def get_pool_stats():
+    """Shared HTTP pool: open/idle connections, requests, new vs reused, per provider"""
+    return _get_llm_manager().get_pool_stats()
+
+@router.get("/drivers")
+async def get_drivers():
+    """Discovered driver types, instantiated providers and cached misses (with reason)"""
+    return _get_llm_manager().get_driver_stats()
+
+@router.post("/drivers/refresh")
+async def refresh_drivers():
+    """Rescan driver directories (e.g. after installing an extension); drivers re-create on next use"""
+    manager = _get_llm_manager()
+    manager.refresh_drivers()
+    return {"status": "ok", "driver_types": sorted(manager.driver_classes)}
+
+@router.get("/io-log")
+async def get_io_log_settings():
+    from llm.io_log import llm_io_log
+    return llm_io_log.get_stats()
+
+@router.post("/io-log")
+async def update_io_log_settings(payload: Dict[str, Any]):
+    """Payload: { "enabled", "sample_rate", "max_chars", "redact", "full_capture" } (all optional)"""
+    allowed = {"enabled", "sample_rate", "max_chars", "redact", "full_capture"}
+    try:
+        _get_llm_manager().configure_io_log(**{k: v for k, v in payload.items() if k in allowed})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    from llm.io_log import llm_io_log
+    return {"status": "ok", "settings": llm_io_log.get_stats()}
+
 @router.get("/params/{feature}")
 async def get_feature_params(feature: str):
     """Fetch all generation parameters for a specific feature, with dynamic soul-based adjustments"""
@@ -0,0 +1,65 @@
+"""
+Embedding Cache
+
+Normalized sentence embeddings keyed by content hash (bounded LRU), shared
+shape for the pipeline's local selectors (history turns, tool descriptions).
+Encoding runs in a worker thread; only texts not seen before are encoded.
+"""
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+
+def default_encode(texts: List[str]):
+    """Shared MiniLM encoder (loaded once by model_manager)."""
+    from model_manager import model_manager
+    model = model_manager.get_embedding_model(EMBEDDING_MODEL)
+    if model is None:
+        raise RuntimeError(f"Embedding model {EMBEDDING_MODEL} unavailable")
+    return model.encode(texts)
+
+
+class EmbeddingCache:
+    def __init__(self, encode_fn: Optional[Callable[[List[str]], Any]] = None, max_entries: int = 20000):
+        """`encode_fn(texts) -> array (n, dim)`, called in a worker thread."""
+        self.encode_fn = encode_fn or default_encode
+        self.max_entries = max_entries
+        self._vectors: "OrderedDict[str, np.ndarray]" = OrderedDict()
+
+        # Stats
+        self.embedded = 0
+        self.cache_hits = 0
+
+    def __len__(self) -> int:
+        return len(self._vectors)
+
+    async def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Unit-length vectors, one row per text."""
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        keys = [hashlib.sha1(t.encode("utf-8", "surrogatepass")).hexdigest() for t in texts]
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key in self._vectors:
+                self._vectors.move_to_end(key)
+                self.cache_hits += 1
+            else:
+                missing[key] = text
+
+        if missing:
+            encoded = np.asarray(await asyncio.to_thread(self.encode_fn, list(missing.values())), dtype=np.float32)
+            encoded = encoded / np.maximum(np.linalg.norm(encoded, axis=1, keepdims=True), 1e-12)
+            for key, vector in zip(missing, encoded):
+                self._vectors[key] = vector
+            self.embedded += len(missing)
+
+        # Read back before evicting, so this batch is always complete
+        vectors = np.stack([self._vectors[k] for k in keys])
+        while len(self._vectors) > self.max_entries:
+            self._vectors.popitem(last=False)
+        return vectors
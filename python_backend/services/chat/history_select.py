@@ -0,0 +1,78 @@
+"""
+Relevant-History Selection
+
+Route option `history_mode: "relevant"`: instead of the newest messages that
+fit, the prompt gets the last `history_recent_turns` turns plus older turns
+ranked by embedding similarity to the current input, within
+`history_max_tokens` (selection itself: `token_budget.select_history`).
+
+Turn embeddings are cached by content hash (bounded LRU), so each request of
+a long session only embeds the turn that was added since the last one.
+"""
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from services.chat.embedding_cache import EmbeddingCache
+from services.chat.token_budget import split_turns
+
+logger = logging.getLogger("HistorySelect")
+
+
+def turn_text(turn: List[Dict[str, Any]], max_chars: int = 1000) -> str:
+    """User + assistant text of a turn (tool payloads skipped), head-truncated for the encoder."""
+    parts = [str(m.get("content") or "") for m in turn if m.get("role") in ("user", "assistant")]
+    return "\n".join(p for p in parts if p)[:max_chars]
+
+
+class HistorySelector:
+    def __init__(self, encode_fn: Optional[Callable[[List[str]], Any]] = None, max_cached: int = 20000):
+        """`encode_fn(texts) -> array (n, dim)`, called in a worker thread (default: shared MiniLM)."""
+        self.cache = EmbeddingCache(encode_fn, max_entries=max_cached)
+
+        # Stats
+        self.requests = 0
+        self.turns_scored = 0
+        self.failures = 0
+        self.seconds = 0.0
+
+    async def score(self, history: List[Dict[str, Any]], query: str, recent_turns: int) -> Optional[List[Optional[float]]]:
+        """
+        Cosine similarity of each older turn to `query`, aligned with
+        `split_turns(history)[1]`; recent turns get None (always kept anyway).
+        Returns None if embedding fails, so the caller falls back to recent-only.
+        """
+        self.requests += 1
+        _, turns = split_turns(history)
+        older = max(0, len(turns) - recent_turns)
+        if not older or not query:
+            return [None] * len(turns)
+
+        started = time.perf_counter()
+        try:
+            vectors = await self.cache.embed([turn_text(t) for t in turns[:older]] + [query])
+        except Exception as e:
+            self.failures += 1
+            log = logger.warning if self.failures == 1 else logger.debug
+            log(f"History embedding failed, using recent history only: {e}")
+            return None
+        finally:
+            self.seconds += time.perf_counter() - started
+
+        self.turns_scored += older
+        similarities = vectors[:-1] @ vectors[-1]
+        return [float(s) for s in similarities] + [None] * (len(turns) - older)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "turns_scored": self.turns_scored,
+            "embedded": self.cache.embedded,
+            "cache_hits": self.cache.cache_hits,
+            "cached_vectors": len(self.cache),
+            "failures": self.failures,
+            "avg_ms": round(self.seconds / self.requests * 1000, 2) if self.requests else 0.0,
+        }
+
+
+history_selector = HistorySelector()
@@ -0,0 +1,216 @@
+"""
+Intent Gate
+
+Cheap local classification of the user's turn before the pipeline pays for
+retrieval (embedding + hybrid search) and tool definitions in the prompt:
+- rules first: acknowledgements / greetings / laughter / bare emoji are
+  "chitchat"; explicit recall cues are "memory"; action or lookup cues are
+  "task",
+- otherwise, when the shared MiniLM encoder is available, nearest centroid
+  over a few seed phrases per label,
+- anything undecided stays "full" (RAG + tools), so the gate only ever
+  removes work it is confident is not needed; so does any reply to a turn
+  where the assistant offered an action or called tools.
+
+Labels -> needs: chitchat (nothing), memory (RAG), task (RAG + tools), full.
+"""
+import asyncio
+import logging
+import re
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from services.chat.embedding_cache import default_encode
+from services.chat.single_flight import normalize_input
+
+logger = logging.getLogger("IntentGate")
+
+NEEDS = {
+    "chitchat": (False, False),
+    "memory": (True, False),
+    "task": (True, True),
+    "full": (True, True),
+}
+
+# Greetings, thanks, laughter, sign-offs. Affirmatives/negatives ("yes", "ok",
+# "好的", "不是") are deliberately absent: they often answer an offer ("want
+# me to check the weather?") and then need tools.
+TRIVIAL = {
+    "hi", "hey", "hello", "yo", "cool", "nice", "great", "thanks", "thank you", "thx", "ty", "lol", "lmao",
+    "haha", "hahaha", "hehe", "wow", "oh", "ah", "hmm", "mm", "good night", "night", "gn", "bye", "see you",
+    "good morning", "morning", "i see", "got it",
+    "嗯", "嗯嗯", "哦", "噢", "谢谢", "谢啦", "你好", "早", "早安", "早上好", "晚安", "拜拜", "再见", "哈哈", "哈哈哈",
+    "嘿嘿", "呵呵", "知道了", "明白", "厉害",
+}
+_LAUGHTER_RE = re.compile(r"^(?:(?:ha|he|hi|ho|lo|l)+|(?:哈|呵|嘿|嘻)+|[wW]+|23{2,})$")
+_NO_WORDS_RE = re.compile(r"^[\W_]*$")  # emoji / punctuation only
+_MEMORY_RE = re.compile(
+    r"\b(remember|recall|last time|you said|i told you|did i (tell|mention)|earlier|yesterday|my (name|birthday))\b"
+    r"|记得|上次|之前|你说过|我说过|我告诉过你|昨天|还记",
+    re.IGNORECASE
+)
+_TASK_RE = re.compile(
+    r"\b(search|look up|google|find|weather|forecast|news|what time|price|open|play|launch|set (a|an) "
+    r"(timer|alarm|reminder)|remind me|calculate|translate|screenshot|latest)\b"
+    r"|搜索|搜一下|查一下|查查|天气|新闻|几点|打开|播放|提醒我|计算|翻译|截图|最新",
+    re.IGNORECASE
+)
+
+# The assistant offered to do something; the reply may be the go-ahead
+_OFFER_RE = re.compile(
+    r"\b(want me to|should i|shall i|do you want|would you like|i can|let me know if)\b"
+    r"|要不要|需要我|要我|我可以|我来帮你|帮你",
+    re.IGNORECASE
+)
+
+SEED_PHRASES = {
+    "chitchat": [
+        "hi there", "that's cool", "haha that's funny", "thanks a lot", "good night", "how are you",
+        "I'm bored", "you're cute", "that's nice", "lol", "嗯嗯", "哈哈哈", "晚安", "你好呀", "我好无聊",
+    ],
+    "memory": [
+        "do you remember what I told you", "what's my favorite food", "what did we talk about yesterday",
+        "when is my birthday", "what's my sister's name", "你还记得我说过什么吗", "我上次跟你说的事",
+    ],
+    "task": [
+        "search the web for this", "what's the weather tomorrow", "open the browser", "play some music",
+        "what's the latest news", "set a timer for ten minutes", "帮我搜一下", "明天天气怎么样", "打开音乐",
+    ],
+}
+
+
+@dataclass
+class IntentDecision:
+    label: str
+    confidence: float
+    source: str  # "rules" | "centroid" | "context" | "default"
+    needs_rag: bool = True
+    needs_tools: bool = True
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _decision(label: str, confidence: float, source: str) -> IntentDecision:
+    rag, tools = NEEDS[label]
+    return IntentDecision(label, round(confidence, 3), source, rag, tools)
+
+
+def follows_action(messages: List[Dict[str, Any]]) -> bool:
+    """True if the previous assistant turn made tool calls or offered to do something."""
+    last_user = next((i for i in range(len(messages) - 1, -1, -1) if messages[i].get("role") == "user"), None)
+    if last_user is None:
+        return False
+    for message in reversed(messages[:last_user]):
+        role = message.get("role")
+        if role == "user":
+            break
+        if role == "tool" or message.get("tool_calls"):
+            return True
+        if role == "assistant" and _OFFER_RE.search(str(message.get("content") or "")):
+            return True
+    return False
+
+
+class IntentGate:
+    def __init__(self,
+                 encode_fn: Optional[Callable[[List[str]], Any]] = None,
+                 use_embeddings: bool = True,
+                 min_margin: float = 0.08):
+        """
+        `encode_fn(texts) -> array (n, dim)` (default: shared MiniLM, called in a worker thread).
+        Centroid decisions need the best label to beat the runner-up by `min_margin` cosine.
+        """
+        self.encode_fn = encode_fn or default_encode
+        self.use_embeddings = use_embeddings
+        self.min_margin = min_margin
+        self._centroids: Optional[np.ndarray] = None
+        self._labels = list(SEED_PHRASES)
+        self._embeddings_failed = False
+
+        # Stats
+        self.decisions: Counter = Counter()
+        self.skipped_rag = 0
+        self.skipped_tools = 0
+        self.seconds = 0.0
+
+    # ==================== CLASSIFY ====================
+
+    def classify_rules(self, text: str) -> Optional[IntentDecision]:
+        norm = normalize_input(text)
+        if not norm or _NO_WORDS_RE.match(norm) or norm in TRIVIAL or _LAUGHTER_RE.match(norm.replace(" ", "")):
+            return _decision("chitchat", 0.95, "rules")
+        if _TASK_RE.search(norm):
+            return _decision("task", 0.9, "rules")
+        if _MEMORY_RE.search(norm):
+            return _decision("memory", 0.9, "rules")
+        return None
+
+    async def classify(self, text: str, messages: Optional[List[Dict[str, Any]]] = None) -> IntentDecision:
+        """`messages` (the conversation so far) lets replies to an offer or tool use keep the full turn."""
+        started = time.perf_counter()
+        try:
+            if messages and follows_action(messages):
+                decision = _decision("full", 0.0, "context")
+            else:
+                decision = self.classify_rules(text)
+                if decision is None and self.use_embeddings and not self._embeddings_failed:
+                    decision = await self._classify_centroid(text)
+            decision = decision or _decision("full", 0.0, "default")
+        finally:
+            self.seconds += time.perf_counter() - started
+        self.decisions[(decision.label, decision.source)] += 1
+        return decision
+
+    async def _classify_centroid(self, text: str) -> Optional[IntentDecision]:
+        try:
+            if self._centroids is None:
+                self._centroids = await asyncio.to_thread(self._build_centroids)
+            vector = self._normalize(np.asarray(await asyncio.to_thread(self.encode_fn, [text]), dtype=np.float32))[0]
+        except Exception as e:
+            # Don't retry a missing model on every turn
+            self._embeddings_failed = True
+            logger.warning(f"Intent gate embeddings unavailable, rules only: {e}")
+            return None
+        scores = self._centroids @ vector
+        order = np.argsort(scores)[::-1]
+        best, runner_up = float(scores[order[0]]), float(scores[order[1]])
+        if best - runner_up < self.min_margin:
+            return None
+        # Margin mapped to a 0.5..1 confidence
+        return _decision(self._labels[order[0]], min(1.0, 0.5 + (best - runner_up) * 2), "centroid")
+
+    def _build_centroids(self) -> np.ndarray:
+        centroids = []
+        for label in self._labels:
+            vectors = self._normalize(np.asarray(self.encode_fn(SEED_PHRASES[label]), dtype=np.float32))
+            centroids.append(vectors.mean(axis=0))
+        return self._normalize(np.stack(centroids))
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+    # ==================== APPLY ====================
+
+    def record_applied(self, skipped_rag: bool, skipped_tools: bool):
+        self.skipped_rag += skipped_rag
+        self.skipped_tools += skipped_tools
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = sum(self.decisions.values())
+        return {
+            "turns": total,
+            "decisions": {f"{label}/{source}": n for (label, source), n in self.decisions.most_common()},
+            "skipped_rag": self.skipped_rag,
+            "skipped_tools": self.skipped_tools,
+            "embeddings": "unavailable" if self._embeddings_failed else ("ready" if self._centroids is not None else "lazy"),
+            "avg_classify_us": round(self.seconds / total * 1e6, 1) if total else 0.0,
+        }
+
+
+intent_gate = IntentGate()
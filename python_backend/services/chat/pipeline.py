@@ -2,11 +2,20 @@
 import logging
 import json
 import asyncio
+import time
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from typing import List, Dict, Any, Optional, AsyncGenerator
 
 from services.container import services
+from services.chat.tool_stream import ToolCallAssembler
+from services.chat.token_budget import ContextBudgeter
+from services.chat.history_select import history_selector
+from services.chat.intent_gate import intent_gate
+from services.chat.tool_select import tool_selector
+from llm.io_log import llm_io_log
+from llm.scheduler import request_timing
+from llm.prompt_cache import cached_prompt_tokens, prompt_cache_stats
 
 logger = logging.getLogger("ChatPipeline")
 
@@ -24,6 +33,7 @@ class PipelineContext:
     model_override: Optional[str]
     temperature: float
     stream: bool
+    history_trimmed: bool = False  # history already slid upstream (session store trim / summary)
     
     # Computed State
     rag_context: str = ""
@@ -35,6 +45,10 @@ class PipelineContext:
     llm_driver: Any = None
     target_model: str = ""
     tool_calls_buffer: List[Dict] = field(default_factory=list)
+    
+    # Turn Trace (timings / decisions / usage, for logging, debugging and Server-Timing)
+    trace: Dict[str, Any] = field(default_factory=dict)
+    started_at: float = field(default_factory=time.monotonic)
 
 # ==================== STEP INTERFACE ====================
 
@@ -49,15 +63,29 @@ class PipelineStep(ABC):
 class ContextBuilderStep(PipelineStep):
     """
     Step 1: Enhances context using registered ContextProviders.
+    
+    Sections are fitted to the model's token budget (see token_budget.py):
+    system prompt and current input are fixed, provider/RAG context is
+    capped, and history keeps the newest messages that fit — or, on routes
+    with `history_mode: "relevant"`, the newest turns plus the older turns
+    most similar to the input (see history_select.py).
+
+    Routes with `prompt_layout: "stable"` keep the system message byte-stable
+    (provider sections go into a system message after the history) and trim
+    history at content-defined cut points, so provider prompt caches can reuse
+    the system + history prefix across turns.
     """
+    RESERVE_OUTPUT_TOKENS = 1024
+    STABLE_CUT_EVERY = 4  # turns between history cut points in the stable layout
+
     async def execute(self, ctx: PipelineContext):
-        prompts = []
+        dynamic = {}
         
         # Iterate over all registered providers (RAG, Soul, etc.)
         for provider in services.get_context_providers():
             try:
                 if content := await provider.provide(ctx):
-                    prompts.append(content)
+                    dynamic[self._section_name(provider)] = content
             except Exception as e:
                 logger.warning(f"ContextProvider {provider.__class__.__name__} failed: {e}")
 
@@ -69,37 +97,95 @@ class ContextBuilderStep(PipelineStep):
                  # Use unified prompt system
                  base_system = await services.soul.get_system_prompt({"pipeline": "context_builder"})
              except: pass
-             
+
+        # Split history from the current turn (last user message)
+        history = [m for m in ctx.original_messages if m.get("role") != "system"]
+        current = history.pop() if history and history[-1].get("role") == "user" else None
+        if ctx.rag_context:
+            dynamic["rag"] = ctx.rag_context
+
+        selection = {}
+        route = self._route()
+        stable = bool(route and route.prompt_layout == "stable")
+        ctx.trace["layout"] = "stable" if stable else "default"
+        if stable:
+            # The persona is already the system prompt; don't repeat it at the tail
+            dynamic = {k: v for k, v in dynamic.items() if v.strip() != base_system.strip()}
+            selection["stable_every"] = self.STABLE_CUT_EVERY
+            selection["history_trimmed"] = ctx.history_trimmed
+        if route and route.history_mode == "relevant" and current:
+            scores = await history_selector.score(history, str(current.get("content") or ""), route.history_recent_turns)
+            if scores is not None:
+                selection = {
+                    "history_scores": scores,
+                    "recent_turns": route.history_recent_turns,
+                    "history_cap": route.history_max_tokens,
+                    "min_score": route.history_min_similarity,
+                }
+
+        budgeter = ContextBudgeter(self._context_window(ctx), reserve_output=self.RESERVE_OUTPUT_TOKENS)
+        fitted, history, report = budgeter.assemble(
+            system=base_system, dynamic=dynamic, history=history, current=current, tools=ctx.tools_def,
+            **selection
+        )
+        ctx.trace["tokens"] = report.to_dict()
+        logger.info(f"[Pipeline] Context tokens: {report.summary()}")
+
+        rag_context = fitted.pop("rag", "")
         ctx.system_prompt = base_system
-        
-        if prompts:
+        if fitted and not stable:
             # Append dynamic context
-            ctx.system_prompt += "\n\n" + "\n\n".join(prompts)
+            ctx.system_prompt += "\n\n" + "\n\n".join(fitted.values())
             
         # Finalize Messages
         ctx.final_messages = [{"role": "system", "content": ctx.system_prompt}]
-        
-        # Add History
-        for i, msg in enumerate(ctx.original_messages):
-            if msg.get("role") != "system":
-                # Inject RAG Context into the LAST User Message
-                if ctx.rag_context and i == len(ctx.original_messages) - 1 and msg.get("role") == "user":
-                    enhanced_content = f"{msg.get('content')}\n\n## Relevant Memories/Context:\n{ctx.rag_context}"
-                    ctx.final_messages.append({"role": "user", "content": enhanced_content})
-                else: 
-                    ctx.final_messages.append(msg)
+        ctx.final_messages.extend(history)
+        if fitted and stable:
+            # Volatile context after the cacheable prefix
+            ctx.final_messages.append({"role": "system", "content": "\n\n".join(fitted.values())})
+        if current:
+            # Inject RAG Context into the current User Message
+            if rag_context:
+                current = {"role": "user", "content": f"{current.get('content')}\n\n## Relevant Memories/Context:\n{rag_context}"}
+            ctx.final_messages.append(current)
 
+    @staticmethod
+    def _section_name(provider) -> str:
+        name = provider.__class__.__name__
+        return name[:-len("ContextProvider")].lower() if name.endswith("ContextProvider") else name
 
+    @staticmethod
+    def _route():
+        try:
+            return services.get_llm_manager().get_route("chat")
+        except Exception:
+            return None
+
+    @staticmethod
+    def _context_window(ctx: PipelineContext) -> int:
+        try:
+            return services.get_llm_manager().get_context_window("chat", ctx.target_model or None)
+        except Exception:
+            return 8192
 
 
 class ToolPreparationStep(PipelineStep):
     """
     Step 2: Prepares tools definitions and LLM driver.
+    
+    With SELECT_TOOLS, large tool sets are narrowed per turn to pinned,
+    recently used and most relevant tools (see tool_select.py).
     """
+    SELECT_TOOLS = True
+
     async def execute(self, ctx: PipelineContext):
         # 1. Prepare Tools
         if ctx.enable_tools:
             ctx.tools_def = [t.get_definition() for t in services.get_all_tools()]
+            if self.SELECT_TOOLS:
+                available = len(ctx.tools_def)
+                ctx.tools_def = await tool_selector.select(ctx.tools_def, ctx.original_messages)
+                ctx.trace["tools_offered"] = {"available": available, "sent": len(ctx.tools_def)}
             
         # 2. Prepare Driver
         llm_manager = services.get_llm_manager()
@@ -110,7 +196,17 @@ class ToolPreparationStep(PipelineStep):
 class LLMExecutionStep(PipelineStep):
     """
     Step 3: Streaming Execution & Tool Loop.
+    
+    Tool calls from one assistant turn run concurrently (starting mid-stream
+    as soon as their arguments are complete), each bounded by
+    TOOL_TIMEOUT and all of them by TOOL_TURN_BUDGET. Up to MAX_TOOL_ROUNDS
+    rounds of tool calls are allowed before a final pass without tools.
     """
+    MAX_TOOL_ROUNDS = 3
+    TOOL_TIMEOUT = 15.0      # seconds, per tool call
+    TOOL_TURN_BUDGET = 30.0  # seconds, all tool calls in one turn
+    EARLY_TOOL_EXECUTION = True # Start tools mid-stream once their arguments are complete
+
     async def execute(self, ctx: PipelineContext):
         pass
         
@@ -120,71 +216,172 @@ class LLMExecutionStep(PipelineStep):
 
         logger.info(f"[Pipeline] Streaming: {ctx.target_model}, Tools: {bool(ctx.tools_def)}")
         
-        # --- LOGGING: INPUT ---
-        try:
-            from copy import deepcopy
-            log_msgs = deepcopy(ctx.final_messages)
-            logger.info(f"\n========= 📤 LLM INPUT ({ctx.target_model}) =========\n{json.dumps(log_msgs, indent=2, ensure_ascii=False)}\n================================================")
-        except Exception as e:
-            logger.warning(f"Failed to log LLM input: {e}")
+        # --- LOGGING: INPUT (sampled, written off the request path) ---
+        io_log_id = llm_io_log.log_request("chat", ctx.target_model, ctx.final_messages, ctx.tools_def)
+        
+        loop = asyncio.get_running_loop()
+        budget_deadline = loop.time() + self.TOOL_TURN_BUDGET
+        ctx.trace.setdefault("tools", [])
+        # prep: request -> first LLM call; queue: scheduler wait (filled in by
+        # the scheduler); ttft: request -> first content token
+        timing = ctx.trace.setdefault("timing", {})
+        timing["prep_ms"] = round((time.monotonic() - ctx.started_at) * 1000, 2)
+        request_timing.set(timing)
+        
+        round_idx = 0
+        while True:
+            # Tools stay enabled until the round limit or the turn budget is spent
+            tools_allowed = (
+                ctx.enable_tools and bool(ctx.tools_def)
+                and round_idx < self.MAX_TOOL_ROUNDS
+                and loop.time() < budget_deadline
+            )
+            ctx.tool_calls_buffer = []
+            tool_tasks: List[asyncio.Task] = []
+            collected_response = ""
+            
+            try:
+                async for content in self._stream_pass(
+                    ctx,
+                    tools=ctx.tools_def if tools_allowed else None,
+                    tool_tasks=tool_tasks,
+                    round_idx=round_idx + 1,
+                    budget_deadline=budget_deadline
+                ):
+                    collected_response += content
+                    yield content
+                
+                # --- LOGGING: OUTPUT ---
+                llm_io_log.log_response(io_log_id, collected_response, round=round_idx + 1,
+                                        tool_calls=len(ctx.tool_calls_buffer))
+                logger.info(f"[Pipeline] Pass {round_idx + 1} done: {len(collected_response)} chars, {len(ctx.tool_calls_buffer)} tool calls")
+                
+                if not (tools_allowed and ctx.tool_calls_buffer):
+                    break
+                
+                # Tool Execution (concurrent; some calls may already be running since mid-stream)
+                round_idx += 1
+                tool_calls = ctx.tool_calls_buffer
+                logger.info(f"[Pipeline] Round {round_idx}: awaiting {len(tool_calls)} tool calls...")
+                results = await asyncio.gather(*tool_tasks)
+            finally:
+                # Interrupted turn (client disconnect / cancel): don't leave tools running
+                for task in tool_tasks:
+                    if not task.done():
+                        task.cancel()
+            
+            # Append Context (one assistant message carrying all calls, then one result per call)
+            ctx.final_messages.append({
+                "role": "assistant",
+                "content": collected_response or None,
+                "tool_calls": tool_calls
+            })
+            for tool_call, result in zip(tool_calls, results):
+                ctx.final_messages.append({
+                    "role": "tool",
+                    "tool_call_id": tool_call.get("id"),
+                    "content": result
+                })
+
+    async def _stream_pass(self,
+                           ctx: PipelineContext,
+                           tools: Optional[List[Dict]],
+                           tool_tasks: List[asyncio.Task],
+                           round_idx: int,
+                           budget_deadline: float) -> AsyncGenerator[str, None]:
+        """
+        One LLM pass. Yields text; tool calls are collected into ctx.tool_calls_buffer.
+        Each call is started (tool_tasks) as soon as its arguments are complete JSON,
+        while the rest of the stream is still arriving.
+        """
+        assembler = ToolCallAssembler()
         
-        # 1. First Pass
-        collected_response = ""
+        def start(calls: List[Dict]):
+            if not tools:
+                return # Tools were not offered for this pass; ignore stray calls
+            for tc in calls:
+                ctx.tool_calls_buffer.append(tc)
+                if self.EARLY_TOOL_EXECUTION:
+                    tool_tasks.append(asyncio.create_task(
+                        self._execute_tool_timed(ctx, tc, round_idx, budget_deadline)
+                    ))
         
-        async for chunk in ctx.llm_driver.chat_completion(
+        async for chunk in ctx.llm_driver.stream_chat(
             ctx.final_messages,
             model=ctx.target_model,
             stream=ctx.stream,
             temperature=ctx.temperature,
-            tools=ctx.tools_def if ctx.enable_tools else None
+            tools=tools
         ):
             if isinstance(chunk, dict):
+                if "usage" in chunk:
+                    self._add_usage(ctx, chunk["usage"])
+                    continue
+                if "tool_call_deltas" in chunk:
+                    start(assembler.feed(chunk["tool_call_deltas"]))
+                    continue
                 if "tool_calls" in chunk:
-                    ctx.tool_calls_buffer.extend(chunk["tool_calls"])
+                    start(chunk["tool_calls"])
                     continue
                 content = chunk.get("content", "")
                 if content:
-                    collected_response += content
+                    self._mark_first_token(ctx)
                     yield content
             else:
-                collected_response += chunk
+                self._mark_first_token(ctx)
                 yield chunk
         
-        # --- LOGGING: OUTPUT ---
-        logger.info(f"\n========= 📥 LLM OUTPUT ({ctx.target_model}) =========\n{collected_response}\n================================================")
+        start(assembler.finish())
+        if not self.EARLY_TOOL_EXECUTION:
+            tool_tasks.extend(
+                asyncio.create_task(self._execute_tool_timed(ctx, tc, round_idx, budget_deadline))
+                for tc in ctx.tool_calls_buffer
+            )
+
+    @staticmethod
+    def _mark_first_token(ctx: PipelineContext):
+        timing = ctx.trace.get("timing")
+        if timing is not None and "ttft_ms" not in timing:
+            timing["ttft_ms"] = round((time.monotonic() - ctx.started_at) * 1000, 2)
+
+    @staticmethod
+    def _add_usage(ctx: PipelineContext, usage: Dict[str, Any]):
+        """Sum provider token usage across tool rounds."""
+        total = ctx.trace.setdefault("usage", {})
+        for key in ("prompt_tokens", "completion_tokens", "total_tokens"):
+            if isinstance(usage.get(key), int):
+                total[key] = total.get(key, 0) + usage[key]
+        cached = cached_prompt_tokens(usage)
+        if cached is not None:
+            # OpenAI shape, whatever the provider reported (passed through by /v1/chat/completions)
+            details = total.setdefault("prompt_tokens_details", {"cached_tokens": 0})
+            details["cached_tokens"] += cached
+
+    async def _execute_tool_timed(self, ctx: PipelineContext, tool_call: dict, round_idx: int, budget_deadline: float) -> str:
+        """Run one tool under min(per-tool timeout, remaining turn budget) and record timing in ctx.trace."""
+        func_name = tool_call.get("function", {}).get("name")
+        loop = asyncio.get_running_loop()
+        timeout = max(0.0, min(self.TOOL_TIMEOUT, budget_deadline - loop.time()))
         
-        # 2. Tool Execution Loop
-        if ctx.tool_calls_buffer:
-            logger.info(f"[Pipeline] Processing {len(ctx.tool_calls_buffer)} tool calls...")
-            
-            for tool_call in ctx.tool_calls_buffer:
-                result = await self._execute_tool(tool_call)
-                
-                # Append Context
-                ctx.final_messages.append({
-                    "role": "assistant",
-                    "content": None,
-                    "tool_calls": [tool_call]
-                })
-                ctx.final_messages.append({
-                    "role": "tool",
-                    "tool_call_id": tool_call.get("id"),
-                    "content": result
-                })
-            
-            # 3. Second Pass (Final Answer)
-            async for chunk in ctx.llm_driver.chat_completion(
-                ctx.final_messages,
-                model=ctx.target_model,
-                stream=ctx.stream,
-                temperature=ctx.temperature,
-                tools=None # Disable tools to force answer
-            ):
-                 if isinstance(chunk, dict):
-                    content = chunk.get("content", "")
-                    if content: yield content
-                 else:
-                    yield chunk
+        started = loop.time()
+        status = "ok"
+        try:
+            result = await asyncio.wait_for(self._execute_tool(tool_call), timeout=timeout)
+        except asyncio.TimeoutError:
+            status = "timeout"
+            logger.warning(f"Tool {func_name} timed out after {timeout:.1f}s")
+            result = f"Error: Tool '{func_name}' timed out after {timeout:.1f}s"
+        
+        elapsed = loop.time() - started
+        ctx.trace["tools"].append({
+            "name": func_name,
+            "id": tool_call.get("id"),
+            "round": round_idx,
+            "duration_ms": round(elapsed * 1000, 1),
+            "status": status
+        })
+        logger.info(f"[Pipeline] Tool {func_name} ({status}) took {elapsed * 1000:.0f}ms")
+        return result
 
     async def _execute_tool(self, tool_call: dict) -> str:
         func_name = tool_call.get("function", {}).get("name")
@@ -210,7 +407,14 @@ class LLMExecutionStep(PipelineStep):
 class ChatPipeline:
     """
     Orchestrator.
+
+    With INTENT_GATE, a local classifier (intent_gate.py) runs first and
+    turns off RAG and/or tools for turns like "ok" / "haha" when its
+    confidence is at least INTENT_MIN_CONFIDENCE. It never turns them on.
     """
+    INTENT_GATE = True
+    INTENT_MIN_CONFIDENCE = 0.7
+
     def __init__(self):
         self.context_step = ContextBuilderStep()
         self.tool_step = ToolPreparationStep()
@@ -226,8 +430,13 @@ class ChatPipeline:
             enable_tools=kwargs.get("enable_tools", True),
             model_override=kwargs.get("model", None),
             temperature=kwargs.get("temperature", 0.7),
-            stream=kwargs.get("stream", True)
+            stream=kwargs.get("stream", True),
+            history_trimmed=kwargs.get("history_trimmed", False)
         )
+        if kwargs.get("trace") is not None:
+            ctx.trace = kwargs["trace"]  # caller-owned (usage / Server-Timing)
+        if self.INTENT_GATE and (ctx.enable_rag or ctx.enable_tools):
+            await self._apply_intent_gate(ctx)
         
         # 2. Run Preparation Steps
         # Run Tool Step first to resolve LLM Driver & Target Model (needed for RAG Tier logic)
@@ -237,3 +446,24 @@ class ChatPipeline:
         # 3. Yield Execution
         async for token in self.exec_step.run_stream(ctx):
             yield token
+        prompt_cache_stats.record("chat", ctx.trace.get("layout", "default"), ctx.trace.get("usage"),
+                                  ctx.trace.get("timing", {}).get("ttft_ms"))
+        
+        if ctx.trace.get("tools"):
+            logger.info(f"[Pipeline] Turn trace: {json.dumps(ctx.trace, ensure_ascii=False)}")
+
+    async def _apply_intent_gate(self, ctx: PipelineContext):
+        """Skip retrieval / tool definitions for turns the gate is confident don't need them."""
+        user_text = next((str(m.get("content") or "") for m in reversed(ctx.original_messages) if m.get("role") == "user"), "")
+        decision = await intent_gate.classify(user_text, ctx.original_messages)
+        ctx.trace["intent"] = decision.to_dict()
+        if decision.confidence < self.INTENT_MIN_CONFIDENCE:
+            logger.info(f"[Pipeline] Intent '{decision.label}' ({decision.source}, {decision.confidence:.2f}): below threshold, full turn")
+            return
+        skip_rag = ctx.enable_rag and not decision.needs_rag
+        skip_tools = ctx.enable_tools and not decision.needs_tools
+        ctx.enable_rag = ctx.enable_rag and decision.needs_rag
+        ctx.enable_tools = ctx.enable_tools and decision.needs_tools
+        intent_gate.record_applied(skip_rag, skip_tools)
+        logger.info(f"[Pipeline] Intent '{decision.label}' ({decision.source}, {decision.confidence:.2f}): "
+                    f"rag={'skip' if skip_rag else 'keep'}, tools={'skip' if skip_tools else 'keep'}")
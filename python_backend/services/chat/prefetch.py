@@ -0,0 +1,170 @@
+"""
+Speculative RAG Prefetch
+
+Starts embedding + hybrid search while the user is still speaking/typing
+(STT `partial` transcripts, input box activity), so the final turn can reuse
+the results instead of paying retrieval latency before the first token.
+"""
+import asyncio
+import difflib
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("RAGPrefetch")
+
+_PUNCT_RE = re.compile(r"[\s\.,!?;:，。！？；：、…~\-\"'“”‘’]+")
+
+
+def normalize_query(text: str) -> str:
+    """Lowercase and strip whitespace/punctuation so partial and final transcripts compare cleanly."""
+    return _PUNCT_RE.sub(" ", (text or "").lower()).strip()
+
+
+@dataclass
+class PrefetchEntry:
+    user_id: str
+    character_id: str
+    text: str
+    norm: str
+    task: asyncio.Task
+    created_at: float = field(default_factory=time.monotonic)
+    finished_at: Optional[float] = None
+
+
+class SpeculativePrefetcher:
+    """
+    Cache of in-flight / finished speculative retrievals, keyed by
+    (user_id, character_id) so users talking to the same character never
+    receive each other's results.
+
+    - `prefetch()` is fire-and-forget: it schedules `search_fn(character_id, text)`.
+    - `claim()` is called by the final turn; if a prefetched query is close enough
+      to the final text its result is reused (awaiting it if still running).
+    """
+
+    def __init__(self,
+                 search_fn: Callable[[str, str], Awaitable[Any]],
+                 similarity_threshold: float = 0.85,
+                 ttl_seconds: float = 30.0,
+                 max_entries_per_session: int = 4,
+                 min_chars: int = 3):
+        self._search_fn = search_fn
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries_per_session = max_entries_per_session
+        self.min_chars = min_chars
+        self._entries: Dict[Tuple[str, str], List[PrefetchEntry]] = {}
+
+        # Stats
+        self.prefetches = 0
+        self.claims = 0
+        self.hits = 0
+        self.saved_seconds = 0.0
+
+    # ==================== PRODUCER ====================
+
+    def prefetch(self, user_id: str, character_id: str, text: str) -> bool:
+        """Schedule a speculative search. Returns False if skipped (too short / duplicate)."""
+        norm = normalize_query(text)
+        if len(norm) < self.min_chars:
+            return False
+
+        self._evict_expired()
+        entries = self._entries.setdefault((user_id, character_id), [])
+        if any(e.norm == norm for e in entries):
+            return False
+
+        entry = PrefetchEntry(user_id=user_id, character_id=character_id, text=text, norm=norm, task=None)  # type: ignore[arg-type]
+        entry.task = asyncio.create_task(self._run(entry))
+        entries.append(entry)
+        self.prefetches += 1
+
+        # Bound memory: drop (and cancel) the oldest speculative queries first
+        while len(entries) > self.max_entries_per_session:
+            old = entries.pop(0)
+            if not old.task.done():
+                old.task.cancel()
+        return True
+
+    async def _run(self, entry: PrefetchEntry) -> Any:
+        try:
+            return await self._search_fn(entry.character_id, entry.text)
+        finally:
+            entry.finished_at = time.monotonic()
+
+    # ==================== CONSUMER ====================
+
+    async def claim(self, user_id: str, character_id: str, text: str) -> Optional[Any]:
+        """
+        Return prefetched results for `text` if a close enough speculative query exists.
+        Returns None on miss; caller should fall back to a live search.
+        """
+        self.claims += 1
+        self._evict_expired()
+        entry = self._best_match((user_id, character_id), normalize_query(text))
+        if entry is None:
+            return None
+
+        # The utterance is final now: other partials for it are stale
+        for other in self._entries.pop((user_id, character_id), []):
+            if other is not entry and not other.task.done():
+                other.task.cancel()
+        wait_start = time.monotonic()
+        try:
+            results = await entry.task
+        except (asyncio.CancelledError, Exception) as e:
+            logger.debug(f"Prefetch for '{entry.text[:30]}' unusable: {e}")
+            return None
+
+        # Saved = retrieval time already elapsed before the final turn asked for it
+        waited = time.monotonic() - wait_start
+        duration = (entry.finished_at or time.monotonic()) - entry.created_at
+        saved = max(0.0, duration - waited)
+        self.hits += 1
+        self.saved_seconds += saved
+        logger.info(f"⚡ RAG prefetch hit (saved {saved * 1000:.0f}ms, waited {waited * 1000:.0f}ms)")
+        return results
+
+    def _best_match(self, key: Tuple[str, str], norm: str) -> Optional[PrefetchEntry]:
+        best, best_key = None, None
+        for entry in self._entries.get(key, []):
+            if entry.task.cancelled():
+                continue
+            score = difflib.SequenceMatcher(None, entry.norm, norm).ratio()
+            if score < self.similarity_threshold:
+                continue
+            # Closest text first; among equal scores prefer results already
+            # available, and later entries (more complete partials) win ties.
+            rank = (score, entry.task.done())
+            if best_key is None or rank >= best_key:
+                best, best_key = entry, rank
+        return best
+
+    def _evict_expired(self):
+        now = time.monotonic()
+        for key in list(self._entries.keys()):
+            kept = []
+            for entry in self._entries[key]:
+                if now - entry.created_at > self.ttl_seconds:
+                    if not entry.task.done():
+                        entry.task.cancel()
+                else:
+                    kept.append(entry)
+            if kept:
+                self._entries[key] = kept
+            else:
+                del self._entries[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "prefetches": self.prefetches,
+            "claims": self.claims,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.claims, 3) if self.claims else 0.0,
+            "saved_seconds_total": round(self.saved_seconds, 3),
+            "avg_saved_ms": round(self.saved_seconds / self.hits * 1000, 1) if self.hits else 0.0,
+            "pending": sum(len(v) for v in self._entries.values()),
+        }
@@ -1,8 +1,10 @@
 
+import asyncio
 import logging
 from typing import Optional, Any
 from core.interfaces.context import ContextProvider
 from services.container import services
+from services.chat.prefetch import SpeculativePrefetcher
 
 logger = logging.getLogger("ContextProviders")
 
@@ -30,36 +32,10 @@ class RAGContextProvider(ContextProvider):
         
         if not user_text or len(user_text) < 3: return None
 
-        # 2. Embedding + Search
-        # Note: Ideally moving embedding logic out, but maintaining functionality for now
-        from model_manager import model_manager
-        path = model_manager.ensure_embedding_model("all-MiniLM-L6-v2")
-        emb_model = model_manager.load_embedding_model(path)
-        
-        vector = emb_model.encode(user_text).tolist()
-        
-        llm_manager = services.get_llm_manager()
-        route = llm_manager.get_route("chat")
-        
-        # Default: Paid/Local Tier -> Episodic Memory (High Context)
-        target_table = "episodic_memory"
-        limit = 10
-        min_results = 3
-        
-        # Free Tier -> Conversation Logs (Low Context)
-        if route and route.provider_id == "free_tier":
-            target_table = "conversation_log"
-            limit = 3
-            min_results = 1
-        
-        results = await services.surreal_system.search_hybrid(
-            query=user_text,
-            query_vector=vector,
-            character_id=ctx.character_id,
-            limit=limit,
-            target_table=target_table,
-            min_results=min_results
-        )
+        # 2. Reuse speculative results (partial transcript / typing) if close enough
+        results = await rag_prefetcher.claim(ctx.user_id, ctx.character_id, user_text)
+        if results is None:
+            results = await search_memories(ctx.character_id, user_text)
         
         if results:
             content = "\n".join([f"- {r.get('content') or r.get('narrative', '')} ({r.get('created_at','')})" for r in results])
@@ -71,6 +47,49 @@ class RAGContextProvider(ContextProvider):
         return None
 
 
+async def search_memories(character_id: str, user_text: str) -> list:
+    """Embedding + hybrid search for a user query (shared by live and speculative retrieval)."""
+    if not services.surreal_system:
+        return []
+
+    # Shared, loaded-once model. The first load (and every encode) is blocking;
+    # keep both off the event loop
+    from model_manager import model_manager
+    emb_model = await asyncio.to_thread(model_manager.get_embedding_model, "all-MiniLM-L6-v2")
+    if emb_model is None:
+        return []
+    
+    vector = (await asyncio.to_thread(emb_model.encode, user_text)).tolist()
+    
+    llm_manager = services.get_llm_manager()
+    route = llm_manager.get_route("chat")
+    
+    # Default: Paid/Local Tier -> Episodic Memory (High Context)
+    target_table = "episodic_memory"
+    limit = 10
+    min_results = 3
+    
+    # Free Tier -> Conversation Logs (Low Context)
+    if route and route.provider_id == "free_tier":
+        target_table = "conversation_log"
+        limit = 3
+        min_results = 1
+    
+    return await services.surreal_system.search_hybrid(
+        query=user_text,
+        query_vector=vector,
+        character_id=character_id,
+        limit=limit,
+        target_table=target_table,
+        min_results=min_results,
+        rerank=target_table == "episodic_memory"  # applies when MemoryConfig.rerank_enabled
+    )
+
+
+# Speculative retrieval fed by partial transcripts / typing (see services.chat.prefetch)
+rag_prefetcher = SpeculativePrefetcher(search_fn=search_memories)
+
+
 class SoulContextProvider(ContextProvider):
     """
     Renders personality and dynamic state (Short-Term Mood/State).
@@ -0,0 +1,154 @@
+"""
+Single-Flight Chat Generation
+
+Duplicate submissions of the same turn (double-click, client retry, STT
+repeating a phrase) arriving within a short window share one LLM
+generation: the first request drives the stream, later ones attach as
+listeners and receive every token from the start (buffered), so no second
+generation, no second history write.
+
+Key: (session, normalized input, hash of the preceding messages, model).
+A flight is joinable for `window` seconds after it started; the generation
+is cancelled only once every listener has gone away.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import time
+from typing import Any, AsyncGenerator, AsyncIterator, Callable, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger("SingleFlight")
+
+_WS_RE = re.compile(r"\s+")
+_TRAILING_PUNCT = " .,!?;:~。，！？；：…"
+
+
+def normalize_input(text: str) -> str:
+    """Case/whitespace/trailing-punctuation insensitive form of a user input."""
+    return _WS_RE.sub(" ", (text or "").casefold()).strip().rstrip(_TRAILING_PUNCT)
+
+
+def make_key(session: Hashable, messages: List[Dict[str, Any]], model: Optional[str] = None) -> tuple:
+    """Key for a chat turn: the last message is the input, the rest is context."""
+    last = messages[-1].get("content", "") if messages else ""
+    context = json.dumps(messages[:-1], ensure_ascii=False, sort_keys=True, default=str)
+    context_hash = hashlib.sha1(context.encode("utf-8")).hexdigest()
+    return (session, normalize_input(str(last)), context_hash, model)
+
+
+class _Flight:
+    def __init__(self):
+        self.started = time.monotonic()
+        self.tokens: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.listeners = 0
+        self.abandoned = False
+        self.task: Optional[asyncio.Task] = None
+        self.shared: Any = None  # leader's per-request state (e.g. trace), handed to joiners
+        self._changed = asyncio.Event()
+
+    def notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait(self):
+        await self._changed.wait()
+
+
+class ChatSingleFlight:
+    def __init__(self, window: float = 2.0):
+        self.window = window
+        self._flights: Dict[Hashable, _Flight] = {}
+
+        # Stats
+        self.requests = 0
+        self.generations = 0
+        self.joined = 0
+
+    def stream(self, key: Hashable, factory: Callable[[], AsyncIterator[str]]) -> AsyncGenerator[str, None]:
+        """
+        Token stream for `key`. Starts `factory()` unless a joinable flight
+        for the same key exists, in which case its tokens are replayed/followed.
+        """
+        return self.join(key, factory)[0]
+
+    def join(self, key: Hashable, factory: Callable[[], AsyncIterator[str]],
+             shared: Any = None) -> Tuple[AsyncGenerator[str, None], Any]:
+        """
+        Like `stream`, also returning the flight's shared state: `shared` if
+        this request starts the generation, else the leader's object (the
+        same instance, so values the leader fills in later are visible).
+        """
+        self.requests += 1
+        flight = self._flights.get(key)
+        if flight is None or flight.abandoned or flight.error is not None or time.monotonic() - flight.started > self.window:
+            flight = self._start(key, factory)
+            flight.shared = shared
+        else:
+            self.joined += 1
+            logger.info(f"🔗 Duplicate chat request joined in-flight generation ({flight.listeners} listener(s))")
+        flight.listeners += 1
+        return self._listen(key, flight), flight.shared
+
+    def _start(self, key: Hashable, factory: Callable[[], AsyncIterator[str]]) -> _Flight:
+        flight = _Flight()
+        self._flights[key] = flight
+        self.generations += 1
+        flight.task = asyncio.create_task(self._drive(flight, factory))
+        return flight
+
+    async def _drive(self, flight: _Flight, factory: Callable[[], AsyncIterator[str]]):
+        try:
+            async for token in factory():
+                flight.tokens.append(token)
+                flight.notify()
+        except asyncio.CancelledError:
+            flight.error = asyncio.CancelledError()
+        except Exception as e:
+            flight.error = e
+        finally:
+            flight.done = True
+            flight.notify()
+
+    async def _listen(self, key: Hashable, flight: _Flight) -> AsyncGenerator[str, None]:
+        i = 0
+        try:
+            while True:
+                if i < len(flight.tokens):
+                    yield flight.tokens[i]
+                    i += 1
+                elif flight.done:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+                else:
+                    await flight.wait()
+        finally:
+            flight.listeners -= 1
+            if flight.listeners == 0:
+                if not flight.done and flight.task:
+                    flight.abandoned = True
+                    flight.task.cancel()
+                # Finished flights stay joinable until the window ends
+                asyncio.get_running_loop().call_later(
+                    max(0.0, self.window - (time.monotonic() - flight.started)),
+                    self._expire, key, flight)
+
+    def _expire(self, key: Hashable, flight: _Flight):
+        if self._flights.get(key) is flight and flight.listeners == 0:
+            del self._flights[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "window_seconds": self.window,
+            "requests": self.requests,
+            "generations": self.generations,
+            "generations_saved": self.joined,
+            "in_flight": sum(1 for f in self._flights.values() if not f.done),
+        }
+
+
+chat_single_flight = ChatSingleFlight()
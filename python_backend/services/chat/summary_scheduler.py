@@ -0,0 +1,94 @@
+"""
+Single-Flight Session Summarization
+
+Turns over the history threshold call `trigger(session_key, job)`. Per session:
+- triggers are debounced (the job runs once `debounce_seconds` pass without
+  a new trigger; each trigger restarts the wait),
+- at most one summarization runs at a time,
+- triggers arriving while one runs are merged into a single follow-up run.
+The job itself calls the LLM on the "memory" route, which the LLM scheduler
+ranks below interactive chat.
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger("SummaryScheduler")
+
+
+class _SessionJob:
+    def __init__(self, job: Callable[[], Awaitable[Any]]):
+        self.job = job
+        self.task: Optional[asyncio.Task] = None
+        self.deadline = 0.0  # loop time the pending run may start at
+        self.running = False
+        self.rerun = False
+
+
+class SummaryScheduler:
+    def __init__(self, debounce_seconds: float = 3.0):
+        self.debounce_seconds = debounce_seconds
+        self._jobs: Dict[Hashable, _SessionJob] = {}
+
+        # Stats
+        self.triggers = 0
+        self.coalesced = 0
+        self.runs = 0
+        self.failures = 0
+
+    def trigger(self, key: Hashable, job: Callable[[], Awaitable[Any]]):
+        """Request a summarization for `key`. `job` is a zero-arg coroutine factory (latest wins)."""
+        self.triggers += 1
+        deadline = asyncio.get_running_loop().time() + self.debounce_seconds
+        entry = self._jobs.get(key)
+        if entry is None:
+            entry = self._jobs[key] = _SessionJob(job)
+            entry.deadline = deadline
+            entry.task = asyncio.create_task(self._drive(key, entry))
+            return
+
+        entry.job = job
+        entry.deadline = deadline
+        if entry.running and not entry.rerun:
+            # Owns the single follow-up run after the current one
+            entry.rerun = True
+        else:
+            # Absorbed by the pending (debouncing) or already-scheduled follow-up run
+            self.coalesced += 1
+
+    async def _drive(self, key: Hashable, entry: _SessionJob):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                # Quiet period, pushed back by every trigger that arrives meanwhile
+                delay = entry.deadline - loop.time()
+                while delay > 0:
+                    await asyncio.sleep(delay)
+                    delay = entry.deadline - loop.time()
+                entry.running = True
+                entry.rerun = False
+                self.runs += 1
+                try:
+                    await entry.job()
+                except Exception as e:
+                    self.failures += 1
+                    logger.error(f"Summarization for {key} failed: {e}")
+                finally:
+                    entry.running = False
+                if not entry.rerun:
+                    break
+        finally:
+            if self._jobs.get(key) is entry:
+                del self._jobs[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "triggers": self.triggers,
+            "runs": self.runs,
+            "coalesced": self.coalesced,
+            "failures": self.failures,
+            "active_sessions": len(self._jobs),
+        }
+
+
+summary_scheduler = SummaryScheduler()
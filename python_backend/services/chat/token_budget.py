@@ -0,0 +1,277 @@
+"""
+Token-Budgeted Context Assembly
+
+Counts tokens locally (tiktoken cl100k_base when installed, otherwise a
+CJK-aware estimate) and fits a turn's sections into the model's context
+window: system prompt and the current input are always kept, dynamic context
+(soul state, RAG) is truncated to a share of the budget, and history is
+filled newest-first until the budget is spent (or, with `select_history`,
+the newest turns plus the older turns most relevant to the input). A leading
+summary message is kept pinned so compressed history survives trimming.
+"""
+import json
+import logging
+import re
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("TokenBudget")
+
+# Per-message framing overhead in chat formats (role, separators)
+MESSAGE_OVERHEAD = 4
+SUMMARY_PREFIX = "## Previous Summary"
+
+_CJK_RE = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uff00-\uffef]")
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:  # optional dependency / offline
+    _ENCODING = None
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    # Fallback: ~1 token per CJK char, ~4 chars per token otherwise
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def count_message_tokens(message: Dict[str, Any]) -> int:
+    content = message.get("content")
+    if not isinstance(content, str):
+        content = json.dumps(content, ensure_ascii=False) if content else ""
+    tokens = count_tokens(content) + MESSAGE_OVERHEAD
+    if message.get("tool_calls"):
+        tokens += count_tokens(json.dumps(message["tool_calls"], ensure_ascii=False))
+    return tokens
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Keep the head of `text` within max_tokens."""
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    if _ENCODING is not None:
+        return _ENCODING.decode(_ENCODING.encode(text, disallowed_special=())[:max_tokens]) + " …"
+    # Binary search on character length for the estimator
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if count_tokens(text[:mid]) <= max_tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo] + " …"
+
+
+def is_summary_message(message: Dict[str, Any]) -> bool:
+    return message.get("role") == "system" and str(message.get("content", "")).startswith(SUMMARY_PREFIX)
+
+
+def is_cut_point(message: Dict[str, Any], every: int) -> bool:
+    """Content-defined turn boundary: about one user message in `every` qualifies."""
+    if message.get("role") != "user":
+        return False
+    return zlib.crc32(str(message.get("content", "")).encode("utf-8", "surrogatepass")) % every == 0
+
+
+def fit_history(history: List[Dict[str, Any]], budget: int, stable_every: int = 0,
+                trimmed: bool = False) -> Tuple[List[Dict[str, Any]], int, int]:
+    """
+    Newest-first fill of `history` within `budget` tokens, keeping a leading
+    summary message pinned. Returns (kept_messages, tokens_used, dropped_count).
+
+    With `stable_every`, once the history slides (trimmed by `budget` here,
+    or `trimmed` upstream, e.g. by the session store), the kept history
+    starts at the first content-defined cut point (see `is_cut_point`), so
+    its start only moves every few turns instead of on every turn. That keeps
+    the prompt prefix stable for provider prompt caches. A history that has
+    not slid starts at the session's first message, which is stable already,
+    and is kept whole.
+    """
+    pinned = [m for m in history[:1] if is_summary_message(m)]
+    rest = history[len(pinned):]
+    used = sum(count_message_tokens(m) for m in pinned)
+    if used > budget:
+        pinned, used = [], 0
+
+    kept: List[Dict[str, Any]] = []
+    for message in reversed(rest):
+        cost = count_message_tokens(message)
+        if used + cost > budget:
+            break
+        kept.append(message)
+        used += cost
+    kept.reverse()
+
+    if stable_every > 1 and (trimmed or len(kept) < len(rest)):
+        # Give up at most half of what fits to reach a cut point
+        cut = next((i for i, m in enumerate(kept[:len(kept) // 2 + 1]) if is_cut_point(m, stable_every)), 0)
+        used -= sum(count_message_tokens(m) for m in kept[:cut])
+        kept = kept[cut:]
+
+    # Never start on an orphaned tool result (its assistant tool_calls message was dropped)
+    while kept and kept[0].get("role") == "tool":
+        used -= count_message_tokens(kept.pop(0))
+    return pinned + kept, used, len(history) - len(pinned) - len(kept)
+
+
+def split_turns(history: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[List[Dict[str, Any]]]]:
+    """(pinned summary, turns): a turn is a user message plus the assistant/tool messages after it."""
+    pinned = [m for m in history[:1] if is_summary_message(m)]
+    turns: List[List[Dict[str, Any]]] = []
+    for message in history[len(pinned):]:
+        if message.get("role") == "user" or not turns:
+            turns.append([message])
+        else:
+            turns[-1].append(message)
+    return pinned, turns
+
+
+def select_history(history: List[Dict[str, Any]],
+                   budget: int,
+                   turn_scores: Sequence[Optional[float]],
+                   recent_turns: int = 4,
+                   min_score: float = 0.0) -> Tuple[List[Dict[str, Any]], int, int]:
+    """
+    Keep the newest `recent_turns` turns that fit, then add older turns by
+    descending score (`turn_scores` aligns with `split_turns(history)[1]`;
+    None = not a candidate) while they fit. Output stays chronological.
+    Returns (kept_messages, tokens_used, dropped_count) like `fit_history`.
+    """
+    pinned, turns = split_turns(history)
+    used = sum(count_message_tokens(m) for m in pinned)
+    if used > budget:
+        pinned, used = [], 0
+    costs = [sum(count_message_tokens(m) for m in turn) for turn in turns]
+
+    chosen = set()
+    for i in range(len(turns) - 1, len(turns) - 1 - recent_turns, -1):
+        if i < 0 or used + costs[i] > budget:
+            break
+        chosen.add(i)
+        used += costs[i]
+
+    candidates = [
+        i for i, score in enumerate(turn_scores)
+        # A leading turn that starts with a tool result lost its call; never use it
+        if i not in chosen and score is not None and score >= min_score and turns[i][0].get("role") != "tool"
+    ]
+    for i in sorted(candidates, key=lambda i: turn_scores[i], reverse=True):
+        if used + costs[i] <= budget:
+            chosen.add(i)
+            used += costs[i]
+
+    kept = [m for i in sorted(chosen) for m in turns[i]]
+    while kept and kept[0].get("role") == "tool":
+        used -= count_message_tokens(kept.pop(0))
+    return pinned + kept, used, len(history) - len(pinned) - len(kept)
+
+
+@dataclass
+class BudgetReport:
+    budget: int
+    sections: Dict[str, int] = field(default_factory=dict)
+    history_messages: int = 0
+    dropped_messages: int = 0
+    truncated: List[str] = field(default_factory=list)
+    history_mode: str = "recent"
+
+    @property
+    def total(self) -> int:
+        return sum(self.sections.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "budget": self.budget,
+            "total": self.total,
+            "sections": dict(self.sections),
+            "history_messages": self.history_messages,
+            "dropped_messages": self.dropped_messages,
+            "truncated": list(self.truncated),
+            "history_mode": self.history_mode,
+        }
+
+    def summary(self) -> str:
+        parts = " ".join(f"{k}={v}" for k, v in self.sections.items())
+        return (f"{parts} | total={self.total}/{self.budget}"
+                f" history={self.history_messages} dropped={self.dropped_messages}")
+
+
+class ContextBudgeter:
+    """
+    Allocates a model's input budget across prompt sections.
+
+    `context_window` is the model's window; `reserve_output` is kept free for
+    the completion. Dynamic sections may use at most `dynamic_share` of the
+    input budget between them; history gets whatever is left.
+    """
+
+    def __init__(self, context_window: int, reserve_output: int = 1024, dynamic_share: float = 0.35):
+        self.budget = max(256, context_window - reserve_output)
+        self.dynamic_share = dynamic_share
+
+    def assemble(self,
+                 system: str,
+                 dynamic: Dict[str, str],
+                 history: List[Dict[str, Any]],
+                 current: Optional[Dict[str, Any]] = None,
+                 tools: Optional[List[Dict[str, Any]]] = None,
+                 history_scores: Optional[Sequence[Optional[float]]] = None,
+                 recent_turns: int = 4,
+                 history_cap: Optional[int] = None,
+                 min_score: float = 0.0,
+                 stable_every: int = 0,
+                 history_trimmed: bool = False) -> Tuple[Dict[str, str], List[Dict[str, Any]], BudgetReport]:
+        """
+        Returns (fitted dynamic sections in `dynamic` order, fitted history, report).
+        System prompt, tools and current input are fixed costs and never trimmed here.
+        With `history_scores` (per turn, see `select_history`) history is the
+        newest `recent_turns` turns plus the best-scoring older ones, within
+        `history_cap` tokens if given. Otherwise `stable_every` and
+        `history_trimmed` are passed to `fit_history`.
+        """
+        report = BudgetReport(budget=self.budget)
+        report.sections["system"] = count_tokens(system) + MESSAGE_OVERHEAD
+        if tools:
+            report.sections["tools"] = count_tokens(json.dumps(tools, ensure_ascii=False))
+        if current:
+            report.sections["input"] = count_message_tokens(current)
+        remaining = self.budget - sum(report.sections.values())
+
+        # Dynamic context: budget smallest sections first so one huge section cannot
+        # starve the rest; the result keeps the caller's (provider) order
+        allotted: Dict[str, str] = {}
+        dynamic_cap = max(0, min(remaining, int(self.budget * self.dynamic_share)))
+        items = sorted(((k, v) for k, v in dynamic.items() if v), key=lambda kv: count_tokens(kv[1]))
+        for i, (name, text) in enumerate(items):
+            share = dynamic_cap // (len(items) - i)
+            cost = count_tokens(text)
+            if cost > share:
+                text = truncate_to_tokens(text, share)
+                cost = count_tokens(text)
+                report.truncated.append(name)
+            allotted[name] = text
+            report.sections[name] = cost
+            dynamic_cap -= cost
+            remaining -= cost
+        fitted = {name: allotted[name] for name in dynamic if name in allotted}
+
+        history_budget = max(0, remaining)
+        if history_scores is not None:
+            if history_cap is not None:
+                history_budget = min(history_budget, history_cap)
+            kept, used, dropped = select_history(history, history_budget, history_scores, recent_turns, min_score)
+            report.history_mode = "relevant"
+        else:
+            kept, used, dropped = fit_history(history, history_budget, stable_every, history_trimmed)
+        report.sections["history"] = used
+        report.history_messages = len(kept)
+        report.dropped_messages = dropped
+        return fitted, kept, report
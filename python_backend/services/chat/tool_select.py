@@ -0,0 +1,109 @@
+"""
+Tool Subset Selection
+
+With web search, skills, MCP servers and plugin tools all registered, the
+full tool definitions cost thousands of prompt tokens per turn. Above
+`min_tools`, a turn is offered only:
+- pinned tools (always available),
+- tools called in the recent conversation (follow-ups keep working),
+- the `top_k` tools whose name + description embed closest to the input.
+Descriptions are embedded once (content-hash cache), so a turn costs one
+query embedding. If embedding fails, every tool is sent as before.
+"""
+import logging
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from services.chat.embedding_cache import EmbeddingCache
+
+logger = logging.getLogger("ToolSelect")
+
+
+def tool_name(definition: Dict[str, Any]) -> str:
+    return definition.get("function", {}).get("name", "")
+
+
+def tool_text(definition: Dict[str, Any], max_chars: int = 1000) -> str:
+    """Name (as words), description and parameter descriptions, for the encoder."""
+    function = definition.get("function", {})
+    parts = [function.get("name", "").replace("_", " ").replace(".", " "), function.get("description", "")]
+    for param, spec in (function.get("parameters", {}).get("properties") or {}).items():
+        parts.append(f"{param}: {spec.get('description', '')}" if isinstance(spec, dict) else param)
+    return "\n".join(p for p in parts if p)[:max_chars]
+
+
+def recent_tool_names(messages: List[Dict[str, Any]], lookback: int = 6) -> Set[str]:
+    names = set()
+    for message in messages[-lookback:]:
+        for call in message.get("tool_calls") or []:
+            names.add(call.get("function", {}).get("name", ""))
+    return names
+
+
+class ToolSelector:
+    def __init__(self,
+                 encode_fn: Optional[Callable[[List[str]], Any]] = None,
+                 top_k: int = 5,
+                 min_tools: int = 8,
+                 pinned: Iterable[str] = ("web_search",)):
+        self.cache = EmbeddingCache(encode_fn, max_entries=5000)
+        self.top_k = top_k
+        self.min_tools = min_tools
+        self.pinned = set(pinned)
+
+        # Stats
+        self.requests = 0
+        self.applied = 0
+        self.failures = 0
+        self.tools_available = 0
+        self.tools_sent = 0
+        self.seconds = 0.0
+
+    async def select(self, tool_defs: List[Dict[str, Any]], messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Subset of `tool_defs` (original order) for this turn."""
+        self.requests += 1
+        self.tools_available += len(tool_defs)
+        query = next((str(m.get("content") or "") for m in reversed(messages) if m.get("role") == "user"), "")
+        if len(tool_defs) <= self.min_tools or not query:
+            self.tools_sent += len(tool_defs)
+            return tool_defs
+
+        names = [tool_name(d) for d in tool_defs]
+        keep = {n for n in names if n in self.pinned} | recent_tool_names(messages)
+        candidates = [i for i, n in enumerate(names) if n not in keep]
+
+        started = time.perf_counter()
+        try:
+            vectors = await self.cache.embed([tool_text(tool_defs[i]) for i in candidates] + [query])
+        except Exception as e:
+            self.failures += 1
+            self.tools_sent += len(tool_defs)
+            log = logger.warning if self.failures == 1 else logger.debug
+            log(f"Tool selection failed, sending all {len(tool_defs)} tools: {e}")
+            return tool_defs
+        finally:
+            self.seconds += time.perf_counter() - started
+
+        scores = vectors[:-1] @ vectors[-1]
+        ranked = sorted(range(len(candidates)), key=lambda j: scores[j], reverse=True)
+        keep |= {names[candidates[j]] for j in ranked[:self.top_k]}
+        selected = [d for d, n in zip(tool_defs, names) if n in keep]
+
+        self.applied += 1
+        self.tools_sent += len(selected)
+        logger.debug(f"Tools offered: {len(selected)}/{len(tool_defs)} {sorted(keep)}")
+        return selected
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "applied": self.applied,
+            "failures": self.failures,
+            "avg_tools_available": round(self.tools_available / self.requests, 1) if self.requests else 0.0,
+            "avg_tools_sent": round(self.tools_sent / self.requests, 1) if self.requests else 0.0,
+            "embedded_descriptions": self.cache.embedded,
+            "avg_select_ms": round(self.seconds / self.applied * 1000, 2) if self.applied else 0.0,
+        }
+
+
+tool_selector = ToolSelector()
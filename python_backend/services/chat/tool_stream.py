@@ -0,0 +1,71 @@
+"""
+Incremental Tool-Call Assembly
+
+OpenAI-compatible streams deliver tool calls as fragments:
+    {"index": 0, "id": "call_x", "function": {"name": "web_search", "arguments": ""}}
+    {"index": 0, "function": {"arguments": "{\"query\": \"tok"}}
+    {"index": 0, "function": {"arguments": "yo weather\"}"}}
+The assembler merges fragments per index and reports a call as soon as its
+arguments form a complete JSON object, so the pipeline can start the tool
+while the rest of the stream is still arriving.
+"""
+import json
+from typing import Any, Dict, List
+
+
+class ToolCallAssembler:
+    def __init__(self):
+        self._calls: Dict[int, Dict[str, Any]] = {}
+        self._ready: set = set()
+
+    def feed(self, deltas: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Merge fragments. Returns calls that became complete with this batch (each returned once)."""
+        for delta in deltas:
+            index = delta.get("index", len(self._calls))
+            call = self._calls.setdefault(index, {
+                "id": None,
+                "type": "function",
+                "function": {"name": "", "arguments": ""}
+            })
+            if delta.get("id"):
+                call["id"] = delta["id"]
+            if delta.get("type"):
+                call["type"] = delta["type"]
+            fn = delta.get("function") or {}
+            if fn.get("name"):
+                call["function"]["name"] += fn["name"]
+            if fn.get("arguments"):
+                call["function"]["arguments"] += fn["arguments"]
+
+        completed = []
+        for index in sorted(self._calls):
+            if index not in self._ready and self._is_complete(self._calls[index]):
+                self._ready.add(index)
+                completed.append(self._calls[index])
+        return completed
+
+    def finish(self) -> List[Dict[str, Any]]:
+        """End of stream: return the calls not yet reported (arguments defaulted to '{}' if empty)."""
+        remaining = []
+        for index in sorted(self._calls):
+            if index in self._ready:
+                continue
+            call = self._calls[index]
+            if not call["function"]["arguments"].strip():
+                call["function"]["arguments"] = "{}"
+            self._ready.add(index)
+            remaining.append(call)
+        return remaining
+
+    @staticmethod
+    def _is_complete(call: Dict[str, Any]) -> bool:
+        if not call["id"] or not call["function"]["name"]:
+            return False
+        args = call["function"]["arguments"]
+        # Cheap pre-check before parsing: a finished object ends with '}'
+        if not args.rstrip().endswith("}"):
+            return False
+        try:
+            return isinstance(json.loads(args), dict)
+        except ValueError:
+            return False
@@ -1,6 +1,123 @@
+"""
+Web Search Tool
+
+Results go through a TTL cache keyed by (provider, normalized query), so a
+repeated or follow-up search within `search.cache_ttl_seconds` does not hit
+the network again. With `search.hedge_provider` set, the configured provider
+and the hedge provider are queried concurrently (the hedge after
+`search.hedge_delay_ms`) and the first good answer wins. Results are capped
+at `search.max_result_chars` before they reach the prompt.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
 
-from typing import Dict, Any
 from core.interfaces.tool import ToolProvider
+from services.chat.single_flight import normalize_input
+
+logger = logging.getLogger("WebSearch")
+
+
+def cap_result(text: str, max_chars: int) -> str:
+    """Cut at the last line break before `max_chars` (hard cut if there is none)."""
+    if max_chars <= 0 or len(text) <= max_chars:
+        return text
+    cut = text.rfind("\n", 0, max_chars)
+    return text[:cut if cut > max_chars // 2 else max_chars].rstrip() + "\n...(truncated)"
+
+
+def is_good_result(text: Any) -> bool:
+    return isinstance(text, str) and bool(text.strip()) and not text.startswith("Error")
+
+
+class SearchResultCache:
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, str]]" = OrderedDict()
+
+        # Stats
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, provider_key: str, query: str, ttl: float) -> Optional[str]:
+        key = (provider_key, normalize_input(query))
+        entry = self._entries.get(key)
+        if entry and time.monotonic() - entry[0] <= ttl:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        if entry:
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, provider_key: str, query: str, result: str):
+        key = (provider_key, normalize_input(query))
+        self._entries[key] = (time.monotonic(), result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SearchStats:
+    def __init__(self):
+        self.searches = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.failures = 0
+        self.truncated = 0
+        self.network_seconds = 0.0
+
+
+search_cache = SearchResultCache()
+search_stats = SearchStats()
+
+
+async def _query(provider, query: str, delay: float = 0.0) -> str:
+    if delay:
+        await asyncio.sleep(delay)
+    return await provider.search(query)
+
+
+async def hedged_search(providers: List[Tuple[str, Any]], query: str, hedge_delay: float) -> Tuple[str, str]:
+    """
+    Query all providers (every one after the first delayed by `hedge_delay`);
+    returns (provider_id, result) of the first good answer, or the primary's
+    error text if none is good. Losers are cancelled.
+    """
+    tasks = {
+        asyncio.create_task(_query(p, query, hedge_delay if i else 0.0)): pid
+        for i, (pid, p) in enumerate(providers)
+    }
+    errors: Dict[str, str] = {}
+    try:
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                pid = tasks[task]
+                try:
+                    result = task.result()
+                except Exception as e:
+                    errors[pid] = f"Error executing search with {pid}: {e}"
+                    continue
+                if is_good_result(result):
+                    return pid, result
+                errors[pid] = result or f"Error: {pid} returned no results"
+    finally:
+        for task in tasks:
+            task.cancel()
+    primary = providers[0][0]
+    return primary, errors.get(primary) or next(iter(errors.values()))
+
 
 class WebSearchTool(ToolProvider):
     @property
@@ -27,18 +144,67 @@ class WebSearchTool(ToolProvider):
         query = args.get("query", "")
         if not query:
             return "Error: No query provided"
-            
+
         # Dynamic Lookup via ServiceContainer
         from services.container import services
         from app_config import config as app_config
-        
-        provider_id = app_config.search.provider # e.g. "brave" or "duckduckgo"
+
+        cfg = app_config.search
+        provider_id = cfg.provider # e.g. "brave" or "duckduckgo"
         provider = services.get_search_provider(provider_id)
-        
+
         if not provider:
              return f"Error: Search provider '{provider_id}' is not active or installed."
 
+        providers = [(provider_id, provider)]
+        hedge = services.get_search_provider(cfg.hedge_provider) if cfg.hedge_provider not in ("", provider_id) else None
+        if hedge:
+            providers.append((cfg.hedge_provider, hedge))
+        provider_key = "+".join(pid for pid, _ in providers)
+
+        cached = search_cache.get(provider_key, query, cfg.cache_ttl_seconds) if cfg.cache_ttl_seconds > 0 else None
+        if cached is not None:
+            return cached
+
+        search_stats.searches += 1
+        started = time.perf_counter()
         try:
-             return await provider.search(query)
+            if hedge:
+                search_stats.hedged += 1
+                winner, result = await hedged_search(providers, query, cfg.hedge_delay_ms / 1000.0)
+                search_stats.hedge_wins += winner != provider_id
+                if winner != provider_id:
+                    logger.debug(f"Search hedge answered first: {winner}")
+            else:
+                result = await provider.search(query)
         except Exception as e:
+             search_stats.failures += 1
              return f"Error executing search with {provider_id}: {e}"
+        finally:
+            search_stats.network_seconds += time.perf_counter() - started
+
+        if not is_good_result(result):
+            search_stats.failures += 1
+            return result or f"Error: {provider_key} returned no results"
+
+        capped = cap_result(result, cfg.max_result_chars)
+        search_stats.truncated += capped is not result
+        if cfg.cache_ttl_seconds > 0:
+            search_cache.put(provider_key, query, capped)
+        return capped
+
+
+def get_stats() -> Dict[str, Any]:
+    lookups = search_cache.hits + search_cache.misses
+    return {
+        "lookups": lookups,
+        "cache_hits": search_cache.hits,
+        "cache_hit_rate": round(search_cache.hits / lookups, 3) if lookups else 0.0,
+        "cached_results": len(search_cache),
+        "searches": search_stats.searches,
+        "hedged": search_stats.hedged,
+        "hedge_wins": search_stats.hedge_wins,
+        "failures": search_stats.failures,
+        "truncated": search_stats.truncated,
+        "avg_search_ms": round(search_stats.network_seconds / search_stats.searches * 1000, 1) if search_stats.searches else 0.0,
+    }
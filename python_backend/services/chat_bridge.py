@@ -1,66 +1,186 @@
 import logging
 import asyncio
+from typing import Any, Dict, List, Optional, Tuple
 from core.protocol import EventType, EventPacket
 from core.events.bus import get_event_bus
 from services.unified_chat import unified_chat
+from services.chat.single_flight import normalize_input
+from services.voice_pipeline import VoiceStream, resolve_tts_driver
 
 logger = logging.getLogger("ChatBridge")
 
+SessionKey = Tuple[str, str]
+
+
 class BasicChatBridge:
     """
     Core Service that bridges EventBus 'input_text' to UnifiedChat (LLM).
     This replaces the complex CognitivePlugin for the MVP.
+
+    Turns are tracked per session (user_id, character_id): new input only
+    interrupts its own session's reply, independent sessions stream in
+    parallel, and at most `max_concurrent_turns` generate at once. Each
+    session holds at most one turn, so the FIFO slot queue is round-robin
+    across sessions.
     """
-    def __init__(self):
+    MAX_CONCURRENT_TURNS = 4
+    DEDUP_WINDOW = 2.0
+
+    def __init__(self, max_concurrent_turns: Optional[int] = None):
         self.bus = get_event_bus()
         self.subscribed = False
+        self.max_concurrent_turns = max_concurrent_turns or self.MAX_CONCURRENT_TURNS
+        self._slots = asyncio.Semaphore(self.max_concurrent_turns)
+        self._turns: Dict[SessionKey, asyncio.Task] = {}
+        self._last_req: Dict[SessionKey, Tuple[str, float]] = {}
+
+        # Stats
+        self.turns_started = 0
+        self.interrupts = 0
+        self.duplicates_ignored = 0
+        self.active = 0
+        self.waiting = 0
+        self.peak_active = 0
+        self._slot_waits: List[float] = []
 
     def start(self):
         if not self.subscribed:
             self.bus.subscribe(EventType.INPUT_TEXT, self.handle_input_text)
+            self.bus.subscribe(EventType.INPUT_TEXT_PARTIAL, self.handle_partial_text)
             self.subscribed = True
             logger.info("✅ Basic Chat Bridge Started (Listening to input_text)")
 
+    @staticmethod
+    def _to_packet(data: Any) -> Optional[EventPacket]:
+        if isinstance(data, EventPacket):
+            return data
+        if isinstance(data, dict):
+            return EventPacket(**data)
+        return None
+
+    @staticmethod
+    def session_key(payload: Dict[str, Any]) -> SessionKey:
+        return (payload.get("user_id", "default_user"), payload.get("character_id", "default_char"))
+
+    async def handle_partial_text(self, event):
+        """Speculatively prefetch RAG results from partial transcripts / typing activity."""
+        packet = event.data
+        payload = packet.payload if isinstance(packet, EventPacket) else (packet or {})
+        text = payload.get("text", "")
+        if not text:
+            return
+        try:
+            from services.chat.providers import rag_prefetcher
+            user_id, character_id = self.session_key(payload)
+            rag_prefetcher.prefetch(user_id, character_id, text)
+        except Exception as e:
+            logger.debug(f"Prefetch skipped: {e}")
+
     async def handle_input_text(self, event):
-        # [Interruption Logic]
-        # If a task is running, cancel it to allow new input to take over (user interrupt)
-        if hasattr(self, "current_task") and self.current_task and not self.current_task.done():
-            logger.info("🛑 Interrupting previous LLM task for new input...")
-            self.current_task.cancel()
-            
+        packet = self._to_packet(event.data)
+        if packet is None or not packet.payload.get("text"):
+            return
+        key = self.session_key(packet.payload)
+
+        # --- DEDUPLICATION GUARD ---
+        # Double-submission from frontend, event bus echo or an STT repeat
+        # (compared normalized); checked before the interrupt so a duplicate
+        # cannot cancel the reply it duplicates. Replies go out on the bus,
+        # so the in-flight turn already reaches every listener.
+        now = asyncio.get_running_loop().time()
+        text = normalize_input(packet.payload["text"])
+        last = self._last_req.get(key)
+        if last and last[0] == text and now - last[1] < self.DEDUP_WINDOW:
+            self.duplicates_ignored += 1
+            logger.warning(f"⚠️ Duplicate request detected for {key}. Ignoring.")
+            return
+        self._last_req[key] = (text, now)
+
+        # [Interruption Logic] New input replaces only this session's running/queued turn
+        previous = self._turns.get(key)
+        if previous and not previous.done():
+            logger.info(f"🛑 Interrupting previous LLM task for {key}...")
+            self.interrupts += 1
+            previous.cancel()
+
         # Spawn new task non-blocking so Gateway isn't frozen
-        self.current_task = asyncio.create_task(self._process_chat(event))
+        self.turns_started += 1
+        task = asyncio.create_task(self._run_turn(packet))
+        self._turns[key] = task
+        task.add_done_callback(lambda t, k=key: self._turns.pop(k, None) if self._turns.get(k) is t else None)
 
-    async def _process_chat(self, event):
-        """Internal worker for chat processing"""
+    async def _run_turn(self, packet: EventPacket):
+        """Waits for a global generation slot, then processes the turn."""
+        loop = asyncio.get_running_loop()
+        queued_at = loop.time()
+        self.waiting += 1
         try:
-            print(f"DEBUG: ChatBridge Processing Event: {event.type}")
-            logger.info(f"BRIDGE PROCESSING: {event.data}")
-            packet = event.data
-            if not isinstance(packet, EventPacket):
-                if isinstance(packet, dict):
-                    packet = EventPacket(**packet)
-                else:
-                    return
-
-            # --- DEDUPLICATION GUARD ---
-            # Detect double-submission from frontend or event bus echo
-            current_time = asyncio.get_event_loop().time()
-            text_content = packet.payload.get("text", "")
-            
-            # Simple signature: Text + SessionID
-            req_sig = f"{packet.session_id}:{text_content}"
-            
-            if hasattr(self, "_last_req_sig") and self._last_req_sig == req_sig:
-                # Check time delta
-                if hasattr(self, "_last_req_time") and (current_time - self._last_req_time) < 2.0:
-                    logger.warning(f"⚠️ Duplicate request detected (sig={req_sig}). Ignoring.")
-                    return
-            
-            self._last_req_sig = req_sig
-            self._last_req_time = current_time
-            # ---------------------------
+            await self._slots.acquire()
+        except asyncio.CancelledError:
+            return  # interrupted while still queued
+        finally:
+            self.waiting -= 1
+
+        self._slot_waits.append(loop.time() - queued_at)
+        if len(self._slot_waits) > 1000:
+            del self._slot_waits[:500]
+        self.active += 1
+        self.peak_active = max(self.peak_active, self.active)
+        try:
+            await self._process_chat(packet)
+        finally:
+            self.active -= 1
+            self._slots.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        waits = sorted(self._slot_waits)
+        return {
+            "max_concurrent_turns": self.max_concurrent_turns,
+            "active": self.active,
+            "waiting": self.waiting,
+            "peak_active": self.peak_active,
+            "sessions": len(self._turns),
+            "turns_started": self.turns_started,
+            "interrupts": self.interrupts,
+            "duplicates_ignored": self.duplicates_ignored,
+            "avg_slot_wait_ms": round(sum(waits) / len(waits) * 1000, 2) if waits else 0.0,
+            "p95_slot_wait_ms": round(waits[int(len(waits) * 0.95) if len(waits) > 1 else 0] * 1000, 2) if waits else 0.0,
+        }
+
+    async def _open_voice_stream(self, packet: EventPacket) -> Optional[VoiceStream]:
+        """Server-side TTS for this turn if enabled (config `tts.server_pipeline` or payload `server_tts`)."""
+        from app_config import config as app_config
+        if not packet.payload.get("server_tts", app_config.tts.server_pipeline):
+            return None
+        try:
+            driver = await resolve_tts_driver(packet.payload.get("engine"))
+        except Exception as e:
+            logger.warning(f"Server-side TTS unavailable, falling back to text only: {e}")
+            return None
+        if driver is None:
+            return None
+
+        session_id = packet.session_id
 
+        async def emit(payload: Dict[str, Any]):
+            await self.bus.emit(EventType.OUTPUT_AUDIO, EventPacket(
+                session_id=session_id,
+                type=EventType.OUTPUT_AUDIO,
+                source="core.voice_pipeline",
+                payload=payload
+            ))
+
+        return VoiceStream(
+            driver,
+            emit,
+            voice=packet.payload.get("voice") or app_config.tts.voice,
+            concurrency=app_config.tts.pipeline_concurrency,
+        )
+
+    async def _process_chat(self, packet: EventPacket):
+        """Internal worker for chat processing"""
+        try:
+            logger.info(f"BRIDGE PROCESSING: {packet.payload}")
             session_id = packet.session_id
             text = packet.payload.get("text", "")
             
@@ -83,11 +203,19 @@ class BasicChatBridge:
             char_id = packet.payload.get("character_id", "default_char")
             
             messages = []
+            history_trimmed = False
             if session_manager:
                 try:
                     state = session_manager.load_session(user_id, char_id)
                     if hasattr(state, "short_term_history"):
-                        messages = [{"role": m["role"], "content": m["content"]} for m in state.short_term_history[-10:]]
+                        # Stable prompt layout: pass the whole (token-capped) history and let the
+                        # context budgeter trim at cut points; a fixed window moves the prefix every turn
+                        route = services.get_llm_manager().get_route("chat")
+                        window = None if route and route.prompt_layout == "stable" else -10
+                        recent = state.short_term_history[window:] if window else state.short_term_history
+                        messages = [{"role": m["role"], "content": m["content"]} for m in recent]
+                        history_trimmed = (len(recent) < len(state.short_term_history)
+                                           or session_manager.is_history_trimmed(user_id, char_id))
                 except Exception as e:
                     logger.error(f"Failed to load session: {e}")
 
@@ -96,8 +224,9 @@ class BasicChatBridge:
             # Extract model from payload if present (dynamic model switching)
             model = packet.payload.get("model")
             
-            # 3. Stream Response
+            # 3. Stream Response (and optionally speak it)
             final_response = ""
+            voice = await self._open_voice_stream(packet)
             
             try:
                 async for token in unified_chat.process(
@@ -105,9 +234,12 @@ class BasicChatBridge:
                     user_id=user_id,
                     character_id=char_id,
                     stream=True,
-                    model=model
+                    model=model,
+                    history_trimmed=history_trimmed
                 ):
                     final_response += token
+                    if voice:
+                        voice.feed(token)
                     await self.bus.emit(EventType.BRAIN_RESPONSE, EventPacket(
                         session_id=session_id,
                         type=EventType.BRAIN_RESPONSE,
@@ -137,6 +269,11 @@ class BasicChatBridge:
                 except Exception as log_e:
                     logger.error(f"Failed to log to SurrealDB: {log_e}")
 
+                # 5. Remaining audio (the turn holds its session until speech is sent)
+                if voice:
+                    await voice.finish()
+                    voice = None
+
             except asyncio.CancelledError:
                 logger.info("⚠️ Chat Task Cancelled by User Interrupt")
                 # Optional: Emit a "silence" or "stop" event? 
@@ -151,6 +288,10 @@ class BasicChatBridge:
                     source="core.chat_bridge",
                     payload={"error": str(e)}
                 ))
+
+            finally:
+                if voice:
+                    voice.cancel()
                 
         except asyncio.CancelledError:
             pass # Clean exit
@@ -4,6 +4,8 @@ from typing import List, Dict, Any, AsyncGenerator, Optional
 from services.container import services
 # from llm.manager import llm_manager
 from services.session_manager import session_manager
+from services.chat.summary_scheduler import summary_scheduler
+from services.chat.token_budget import ContextBudgeter, SUMMARY_PREFIX, count_message_tokens, fit_history, is_summary_message
 from fastapi import HTTPException
 
 logger = logging.getLogger("ChatService")
@@ -105,7 +107,7 @@ class ChatService:
 
             # 2. Build Prompt (System + Context + History + User)
             # A. System
-            final_messages.append({"role": "system", "content": soul.get_system_prompt({"user_name": user_name})})
+            final_messages.append({"role": "system", "content": await soul.get_system_prompt({"user_name": user_name})})
             
             # B. Context
             if rag_context:
@@ -114,34 +116,31 @@ class ChatService:
             # C. History (Session)
             session_history = session_manager.get_history(user_id, character_id)
             
-            # [Configurable History Limit]
-            # 1. Get user config or default
-            history_limit = int(params.get("history_limit", 20))
+            # [Token Budget]
+            # History gets whatever the model's window leaves after the prompt,
+            # memories, current input and the reserved completion.
             overflow_strategy = params.get("overflow_strategy", "slide") # Default to slide
-            
-            # 2. Check for Free Tier (Force strict limit)
-            route = llm_manager.get_route(FEATURE)
-            if route and route.provider_id == "free_tier":
-                 history_limit = 5 # Strict limit for free tier
-                 logger.info(f"🔒 Free Tier Detected: Enforcing history limit = {history_limit}")
+            budgeter = ContextBudgeter(llm_manager.get_context_window(FEATURE, model_name))
+            fitted, trimmed_history, report = budgeter.assemble(
+                system=final_messages[0]["content"],
+                dynamic={"rag": rag_context} if rag_context else {},
+                history=session_history,
+                current={"role": role_override, "content": user_input}
+            )
+            if rag_context:
+                final_messages[1]["content"] = f"## Related Memories\n{fitted['rag']}"
+            logger.info(f"[Chat] Context tokens: {report.summary()}")
 
-            # 3. Apply Overflow Strategy
-            if len(session_history) >= history_limit:
-                 if overflow_strategy == "reset":
-                     # [Strategy: Reset]
-                     # Clear history (simulating archive/dreaming handoff) and start fresh.
-                     # This preserves Prefix Cache stability for the previous N turns.
-                     logger.info(f"🌊 Overflow Reset Triggered (Limit {history_limit}). Clearing Session History.")
-                     session_manager.clear_history(user_id, character_id)
-                     session_history = [] 
-                     # Note: We do NOT create a summary here synchronously. 
-                     # The assumption is Dreaming runs periodically or we trigger it async.
-                     # If we want to trigger generic archival, we could:
-                     # asyncio.create_task(self._archive_session(user_id, character_id, ...))
-                 else:
-                     # [Strategy: Slide] (Default)
-                     # Standard FIFO
-                     session_history = session_history[-history_limit:]
+            if report.dropped_messages and overflow_strategy == "reset":
+                # [Strategy: Reset]
+                # Clear history (simulating archive/dreaming handoff) and start fresh.
+                # This preserves Prefix Cache stability for the previous turns.
+                logger.info(f"🌊 Overflow Reset Triggered (budget {report.budget} tokens). Clearing Session History.")
+                session_manager.clear_history(user_id, character_id)
+                session_history = []
+            else:
+                # [Strategy: Slide] (Default): oldest messages fall out of the budget
+                session_history = trimmed_history
                  
             final_messages.extend(session_history)
             
@@ -152,7 +151,7 @@ class ChatService:
             
         else:
             # [Legacy Mode] Client Managed
-            system_prompt = soul.get_system_prompt(user_context={"user_name": user_name})
+            system_prompt = await soul.get_system_prompt({"user_name": user_name})
             
             # Check for existing system prompt
             has_system = False
@@ -191,10 +190,14 @@ class ChatService:
             if is_server_side:
                 session_manager.add_turn(user_id, character_id, user_input, full_response)
                 # Background Summarization Check
-                # If history gets too long (> 20 messages), trigger summarization
-                hist_len = len(session_manager.get_history(user_id, character_id))
-                if hist_len > 20:
-                     asyncio.create_task(self._summarize_session(user_id, character_id, soul, model_name))
+                # If stored history outgrows half the model's window, compress the oldest part
+                history = session_manager.get_history(user_id, character_id)
+                if sum(count_message_tokens(m) for m in history) > self._summary_threshold(llm_manager, model_name):
+                     # Debounced & single-flight per session (rapid turns merge into one run)
+                     summary_scheduler.trigger(
+                         (user_id, character_id),
+                         lambda: self._summarize_session(user_id, character_id, soul, model_name)
+                     )
 
         except Exception as e:
             logger.error(f"Streaming error: {e}", exc_info=True)
@@ -207,11 +210,16 @@ class ChatService:
         """
         try:
              history = session_manager.get_history(user_id, char_id)
-             if len(history) < 20: return
+             llm_manager = services.get_llm_manager()
+             threshold = self._summary_threshold(llm_manager, model)
+             if sum(count_message_tokens(m) for m in history) <= threshold: return
              
-             # Slice old messages (keep last 10)
-             to_summarize = history[:-10]
-             keep_messages = history[-10:]
+             # Keep the newest messages within half the threshold, compress the rest
+             # (an existing summary is folded into the new one)
+             recent = [m for m in history if not is_summary_message(m)]
+             keep_messages, _, _ = fit_history(recent, threshold // 2)
+             to_summarize = history[:len(history) - len(keep_messages)]
+             if not to_summarize: return
              
              context_text = "\n".join([f"{m['role']}: {m['content']}" for m in to_summarize])
              
@@ -220,10 +228,11 @@ class ChatService:
                  {"role": "user", "content": context_text}
              ]
              
-             # We need a non-streaming driver call
-             llm_manager = services.get_llm_manager()
-             driver = await llm_manager.get_driver("chat")
-             summary = await driver.chat_completion(prompt, model=model, stream=False)
+             # Non-streaming call on the "memory" route: queued behind interactive chat by the LLM scheduler
+             driver = await llm_manager.get_driver("memory")
+             parts = [c async for c in driver.stream_chat(prompt, model=llm_manager.get_model_name("memory"), stream=False)
+                      if isinstance(c, str)]
+             summary = "".join(parts)
              
              if summary:
                  # Clean summary
@@ -234,11 +243,21 @@ class ChatService:
                  # SessionManager API might need update to support 'set_history' or we manually construct
                  # Note: SessionManager is ephemeral or persistent? it's in-memory + json.
                  # Let's verify session_manager API. For now, we update in-place if possible.
+                 # Turns added while the summary was generated are carried over;
+                 # if the history was rewritten meanwhile, skip (a follow-up run will redo it).
+                 current = session_manager.get_history(user_id, char_id)
+                 if current[:len(history)] != history:
+                     logger.info("Session changed during summarization, skipping update.")
+                     return
                  session_manager.update_history(user_id, char_id, 
-                     [{"role": "system", "content": f"## Previous Summary\n{summary_text}"}] + keep_messages
+                     [{"role": "system", "content": f"{SUMMARY_PREFIX}\n{summary_text}"}] + keep_messages + current[len(history):]
                  )
 
         except Exception as e:
             logger.error(f"Session Summarization Failed: {e}")
 
+    @staticmethod
+    def _summary_threshold(llm_manager: Any, model: str) -> int:
+        return llm_manager.get_context_window("chat", model) // 2
+
 chat_service = ChatService()
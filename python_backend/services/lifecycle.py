@@ -90,6 +90,12 @@ async def lifespan(app: FastAPI):
 
     if service_instance.ticker:
         service_instance.ticker.stop()
+
+    from llm.http_pool import http_pool
+    await http_pool.close()
+
+    from services.session_manager import session_manager
+    session_manager.flush()
         
     logger.info("Lifecycle: Shutdown complete.")
 
@@ -6,96 +6,271 @@ from pathlib import Path
 from typing import List, Dict, Any
 from pydantic import BaseModel, Field
 
+from services.chat.token_budget import count_message_tokens, fit_history, is_summary_message
+
 # Define SessionState locally since core.cognitive is missing
 class SessionState(BaseModel):
     session_id: int = 0
     short_term_history: List[Dict[str, Any]] = Field(default_factory=list)
     metadata: Dict[str, Any] = Field(default_factory=dict)
+    journal_seq: int = 0  # Last journal entry folded into this snapshot
 
 logger = logging.getLogger("SessionManager")
 
+
+class _CachedSession:
+    """In-memory session plus journal bookkeeping."""
+    def __init__(self, state: SessionState, seq: int):
+        self.state = state
+        self.seq = seq              # last journal sequence number applied
+        self.pending = seq - state.journal_seq  # journal entries since the snapshot
+        self.tokens = sum(count_message_tokens(m) for m in state.short_term_history)
+
+
+def _apply_trim(history: List[Dict[str, Any]], count: int, pinned: bool) -> List[Dict[str, Any]]:
+    return history[:1] + history[1 + count:] if pinned else history[count:]
+
+
 class SessionManager:
+    """
+    Sessions are held in memory. Each change is appended to a per-session
+    journal (`{char}_{user}.journal.jsonl`, one line per message/op) and
+    folded into the JSON snapshot every COMPACT_EVERY entries (and on
+    clear/replace/shutdown). On load the snapshot is read and newer journal
+    entries replayed; a torn last line from a crash is discarded.
+    """
+    # Stored short-term history is bounded by tokens, not message count
+    MAX_HISTORY_TOKENS = 12000
+    COMPACT_EVERY = 256
+    FSYNC_JOURNAL = False  # True: survive power loss too, at a per-turn fsync cost
+
     def __init__(self, data_dir: str = "data/sessions"):
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(parents=True, exist_ok=True)
-        self._cache = {} # Optional memory cache
+        self._cache: Dict[Path, _CachedSession] = {}
+
+        # Stats
+        self.bytes_written = 0
+        self.journal_appends = 0
+        self.compactions = 0
 
     def _get_path(self, user_id: str, char_id: str) -> Path:
         # Sanitize IDs to avoid path traversal
         import re
         def sanitize(s):
             return re.sub(r'[^a-zA-Z0-9_\-]', '_', str(s)) or "default"
-            
+
         u_id = sanitize(user_id) if user_id else "default_user"
         c_id = sanitize(char_id) if char_id else "default_char"
         return self.data_dir / f"{c_id}_{u_id}.json"
 
-    def load_session(self, user_id: str, char_id: str) -> SessionState:
-        """
-        Loads the session state from disk.
-        If file doesn't exist, returns a new (default) SessionState.
-        """
+    @staticmethod
+    def _journal_path(path: Path) -> Path:
+        return path.with_suffix(".journal.jsonl")
+
+    # ==================== LOAD / REPLAY ====================
+
+    def _session(self, user_id: str, char_id: str) -> _CachedSession:
         path = self._get_path(user_id, char_id)
-        
+        cached = self._cache.get(path)
+        if cached is None:
+            cached = self._load_from_disk(path, user_id, char_id)
+            self._cache[path] = cached
+        return cached
+
+    def _load_from_disk(self, path: Path, user_id: str, char_id: str) -> _CachedSession:
+        state = SessionState(session_id=0)
         if path.exists():
             try:
                 with open(path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                state = SessionState(**data)
-                # logger.info(f"Loaded session for {user_id}:{char_id}")
-                return state
+                    state = SessionState(**json.load(f))
             except Exception as e:
                 logger.error(f"Failed to load session from {path}: {e}")
-                # Fallback to new session on error (or raise?)
-                return SessionState(session_id=0) # Reset
-        else:
+                # Fallback to new session on error
+                state = SessionState(session_id=0) # Reset
+        elif not self._journal_path(path).exists():
             logger.info(f"No existing session for {user_id}:{char_id}, creating new.")
-            return SessionState(session_id=0)
+
+        seq = self._replay_journal(path, state)
+        return _CachedSession(state, seq)
+
+    def _replay_journal(self, path: Path, state: SessionState) -> int:
+        journal = self._journal_path(path)
+        seq = state.journal_seq
+        if not journal.exists():
+            return seq
+
+        good_offset = 0
+        with open(journal, "rb") as f:
+            for raw in f:
+                try:
+                    if not raw.endswith(b"\n"):
+                        raise ValueError("torn line")
+                    entry = json.loads(raw)
+                except ValueError:
+                    logger.warning(f"Discarding torn journal tail in {journal.name}")
+                    break
+                good_offset += len(raw)
+                if entry["seq"] <= state.journal_seq:
+                    continue  # already in the snapshot (crash between snapshot and truncate)
+                self._apply(state, entry)
+                seq = entry["seq"]
+
+        if good_offset < journal.stat().st_size:
+            # Cut the partial line so later appends start on a clean line
+            with open(journal, "r+b") as f:
+                f.truncate(good_offset)
+        return seq
+
+    @staticmethod
+    def _apply(state: SessionState, entry: Dict[str, Any]):
+        op = entry.get("op")
+        if op == "append":
+            state.short_term_history.append(entry["message"])
+        elif op == "trim":
+            state.short_term_history = _apply_trim(state.short_term_history, entry["count"], entry.get("pinned", False))
+            state.metadata["history_trimmed"] = True
+        elif op == "clear":
+            state.short_term_history = []
+            state.metadata.pop("history_trimmed", None)
+
+    # ==================== WRITE PATH ====================
+
+    def _journal(self, path: Path, session: _CachedSession, entries: List[Dict[str, Any]]):
+        lines = []
+        for entry in entries:
+            session.seq += 1
+            lines.append(json.dumps({"seq": session.seq, **entry}, ensure_ascii=False))
+        data = ("\n".join(lines) + "\n").encode("utf-8")
+        try:
+            with open(self._journal_path(path), "ab") as f:
+                f.write(data)
+                if self.FSYNC_JOURNAL:
+                    f.flush()
+                    os.fsync(f.fileno())
+            self.bytes_written += len(data)
+            self.journal_appends += len(entries)
+            session.pending += len(entries)
+        except Exception as e:
+            logger.error(f"Failed to append session journal for {path.name}: {e}")
+
+        if session.pending >= self.COMPACT_EVERY:
+            self._compact(path, session)
+
+    def _compact(self, path: Path, session: _CachedSession):
+        """Atomically write the snapshot, then drop the journal entries it covers."""
+        session.state.journal_seq = session.seq
+        tmp = path.with_suffix(".json.tmp")
+        try:
+            data = session.state.model_dump_json(indent=2).encode("utf-8")
+            with open(tmp, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+            journal = self._journal_path(path)
+            if journal.exists():
+                os.remove(journal)
+            self.bytes_written += len(data)
+            self.compactions += 1
+            session.pending = 0
+        except Exception as e:
+            logger.error(f"Failed to save session to {path}: {e}")
+
+    # ==================== PUBLIC API ====================
+
+    def load_session(self, user_id: str, char_id: str) -> SessionState:
+        """
+        Returns a copy of the session state (from memory; first access reads disk).
+        If nothing exists yet, returns a new (default) SessionState.
+        """
+        state = self._session(user_id, char_id).state
+        copy = state.model_copy()
+        copy.short_term_history = list(state.short_term_history)
+        return copy
 
     def save_session(self, user_id: str, char_id: str, state: SessionState):
         """
-        Persists the session state to disk.
+        Replaces the session state and persists it as a new snapshot.
         """
         path = self._get_path(user_id, char_id)
-        try:
-            with open(path, "w", encoding="utf-8") as f:
-                f.write(state.model_dump_json(indent=2))
-        except Exception as e:
-            logger.error(f"Failed to save session to {path}: {e}")
+        session = self._session(user_id, char_id)
+        state = state.model_copy()
+        state.short_term_history = list(state.short_term_history)
+        session.state = state
+        session.tokens = sum(count_message_tokens(m) for m in state.short_term_history)
+        self._compact(path, session)
 
     def clear_history(self, user_id: str, char_id: str):
         """Clear short-term history but keep session metadata"""
-        state = self.load_session(user_id, char_id)
-        state.short_term_history = []
-        self.save_session(user_id, char_id, state)
+        path = self._get_path(user_id, char_id)
+        session = self._session(user_id, char_id)
+        session.state.short_term_history = []
+        session.state.metadata.pop("history_trimmed", None)
+        session.tokens = 0
+        self._compact(path, session)
 
     def clear_session(self, user_id: str, char_id: str):
         path = self._get_path(user_id, char_id)
-        if path.exists():
-            try:
-                os.remove(path)
-            except Exception as e:
-                logger.error(f"Failed to delete session {path}: {e}")
+        self._cache.pop(path, None)
+        for target in (path, self._journal_path(path)):
+            if target.exists():
+                try:
+                    os.remove(target)
+                except Exception as e:
+                    logger.error(f"Failed to delete session {target}: {e}")
+
+    def flush(self):
+        """Fold all journals into snapshots (shutdown / maintenance)."""
+        for path, session in list(self._cache.items()):
+            if session.pending:
+                self._compact(path, session)
 
     # --- Compatibility Methods (Legacy Support) ---
     def add_turn(self, user_id: str, char_id: str, user_msg: str, ai_msg: str):
-        state = self.load_session(user_id, char_id)
-        state.short_term_history.append({"role": "user", "content": user_msg})
-        state.short_term_history.append({"role": "assistant", "content": ai_msg})
-        # Limit history size
-        if len(state.short_term_history) > 40: # default threshold
-            state.short_term_history = state.short_term_history[-40:]
-        self.save_session(user_id, char_id, state)
+        path = self._get_path(user_id, char_id)
+        session = self._session(user_id, char_id)
+        history = session.state.short_term_history
+        new_messages = [{"role": "user", "content": user_msg}, {"role": "assistant", "content": ai_msg}]
+        history.extend(new_messages)
+        session.tokens += sum(count_message_tokens(m) for m in new_messages)
+        entries = [{"op": "append", "message": m} for m in new_messages]
+
+        # Limit history size (newest messages that fit; a leading summary stays pinned)
+        if session.tokens > self.MAX_HISTORY_TOKENS:
+            kept, session.tokens, dropped = fit_history(history, self.MAX_HISTORY_TOKENS)
+            if dropped:
+                pinned = bool(kept) and is_summary_message(kept[0]) and is_summary_message(history[0])
+                session.state.short_term_history = _apply_trim(history, dropped, pinned)
+                session.state.metadata["history_trimmed"] = True
+                entries.append({"op": "trim", "count": dropped, "pinned": pinned})
+                logger.info(f"Trimmed {dropped} old messages for {user_id}:{char_id} (token cap {self.MAX_HISTORY_TOKENS})")
+
+        self._journal(path, session, entries)
 
     def get_history(self, user_id: str, char_id: str):
-        state = self.load_session(user_id, char_id)
-        return state.short_term_history
+        return list(self._session(user_id, char_id).state.short_term_history)
+
+    def is_history_trimmed(self, user_id: str, char_id: str) -> bool:
+        """True once the stored history no longer starts at the session's first message (trimmed or summarized)."""
+        state = self._session(user_id, char_id).state
+        history = state.short_term_history
+        return bool(state.metadata.get("history_trimmed")) or (bool(history) and is_summary_message(history[0]))
 
     def update_history(self, user_id: str, char_id: str, new_history: list):
         """Replace history with new list (e.g. after summarization)"""
-        state = self.load_session(user_id, char_id)
-        state.short_term_history = new_history
-        self.save_session(user_id, char_id, state)
+        path = self._get_path(user_id, char_id)
+        session = self._session(user_id, char_id)
+        session.state.short_term_history = list(new_history)
+        session.tokens = sum(count_message_tokens(m) for m in new_history)
+        self._compact(path, session)
 
-session_manager = SessionManager()
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "cached_sessions": len(self._cache),
+            "journal_appends": self.journal_appends,
+            "compactions": self.compactions,
+            "bytes_written": self.bytes_written,
+        }
 
+session_manager = SessionManager()
@@ -1,9 +1,51 @@
 
+import copy
 import json
 import os
 import shutil
+import time
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Callable
+
+
+class CachedFile:
+    """
+    Parsed-file cache with mtime invalidation.
+    The file is stat'ed at most once per `check_interval` seconds, so hot paths
+    (one prompt render per turn) do no disk I/O in the steady state.
+    `version` increments on every (re)load so callers can key derived caches on it.
+    """
+    def __init__(self, path: Path, loader: Callable[[Path], Any], default: Any = None, check_interval: float = 1.0):
+        self.path = path
+        self._loader = loader
+        self._default = default
+        self.check_interval = check_interval
+        self.version = 0
+        self._value: Any = default
+        self._mtime: Optional[float] = None
+        self._checked_at: Optional[float] = None
+
+    def get(self) -> Any:
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return self._value
+        self._checked_at = now
+
+        try:
+            mtime = self.path.stat().st_mtime
+        except OSError:
+            mtime = None
+
+        if mtime != self._mtime or self.version == 0:
+            self._value = self._loader(self.path) if mtime is not None else self._default
+            self._mtime = mtime
+            self.version += 1
+        return self._value
+
+    def invalidate(self):
+        """Force a re-stat (and reload if changed) on next access."""
+        self._checked_at = None
+        self._mtime = None
 
 class SoulPersistence:
     """
@@ -17,6 +59,12 @@ class SoulPersistence:
     def __init__(self, base_dir: Path):
         self.base_dir = base_dir
         self.config_path = base_dir / "config.json"
+        self._config_cache = CachedFile(self.config_path, self._read_config, default={})
+
+    @property
+    def config_version(self) -> int:
+        """Changes whenever config.json is (re)loaded from disk."""
+        return self._config_cache.version
         
     def _resolve_data_root(self) -> Path:
         """Returns characters/{id}/data/"""
@@ -29,11 +77,12 @@ class SoulPersistence:
         return Path(name).name
 
     def load_config(self) -> Dict[str, Any]:
-        """Load character config"""
-        if not self.config_path.exists():
-            return {}
+        """Load character config (cached, mtime-invalidated; returns a private copy)"""
+        return copy.deepcopy(self._config_cache.get())
+
+    def _read_config(self, path: Path) -> Dict[str, Any]:
         try:
-            with open(self.config_path, 'r', encoding='utf-8') as f:
+            with open(path, 'r', encoding='utf-8') as f:
                 return json.load(f)
         except Exception as e:
             print(f"[SoulPersistence] Error loading config: {e}")
@@ -51,6 +100,8 @@ class SoulPersistence:
             os.replace(temp_path, self.config_path)
         except Exception as e:
             print(f"[SoulPersistence] Error saving config: {e}")
+        finally:
+            self._config_cache.invalidate()
 
     def load_module_data(self, module_name: str) -> Dict[str, Any]:
         """Load generic module data"""
@@ -15,6 +15,7 @@ class SoulService:
     2. Delegate Prompt Rendering to the Driver.
     3. Delegate Interaction Hooks to the Driver.
     """
+    _PROMPT_MEMO_SIZE = 64
     
     def __init__(self):
         self._drivers: Dict[str, BaseSoulDriver] = {}
@@ -33,6 +34,14 @@ class SoulService:
         self._active_character_id = "hiyori" # Default
         self._persistence: Optional[SoulPersistence] = None
         self._ensure_persistence()
+        
+        # Prompt caches: compiled system.yaml (mtime-invalidated) + rendered prompt memo
+        from services.soul.persistence import CachedFile
+        self._template_cache = CachedFile(
+            BASE_DIR / "prompts" / "chat" / "system.yaml", self._compile_system_template
+        )
+        self._state_version = 0
+        self._prompt_memo: Dict[tuple, str] = {}
 
     def _ensure_persistence(self):
         """Initialize persistence for active character."""
@@ -49,6 +58,7 @@ class SoulService:
             
         self._active_character_id = character_id
         self._ensure_persistence()
+        self.invalidate_prompt_cache()
         logger.info(f"🎭 Active Character Switched to: {character_id}")
         
     def register_driver(self, driver: BaseSoulDriver):
@@ -64,6 +74,7 @@ class SoulService:
     def set_active_driver(self, driver_id: str):
         if driver_id in self._drivers:
             self._active_driver = self._drivers[driver_id]
+            self.invalidate_prompt_cache()
             logger.info(f"馃憤 Active Soul Switched to: {driver_id}")
         else:
             logger.error(f"Cannot switch to unknown driver: {driver_id}")
@@ -81,22 +92,14 @@ class SoulService:
             if driver_prompt and len(driver_prompt) > 10:
                 return driver_prompt
 
-        # 2. Standard Logic: Load Template & Render
+        # 2. Standard Logic: Cached Template & Render
         try:
-            import yaml
-            from jinja2 import Template
-            from app_config import BASE_DIR
-            
-            # Load Template
-            template_path = BASE_DIR / "prompts" / "chat" / "system.yaml"
-            if not template_path.exists():
-                logger.warning(f"System template not found at {template_path}")
+            template = self._template_cache.get()
+            if not template:
+                logger.warning(f"System template not found at {self._template_cache.path}")
                 return "You are a helpful AI assistant."
-
-            with open(template_path, 'r', encoding='utf-8') as f:
-                raw_yaml = yaml.safe_load(f)
             
-            # Load Character Config
+            # Load Character Config (cached, mtime-invalidated)
             char_config = self.load_character_config()
             
             # Prepare Vars
@@ -107,17 +110,20 @@ class SoulService:
                 **context
             }
             
-            # Render Sections
-            parts = []
-            # Order matches YAML keys naturally or we enforce specific order?
-            # YAML 1.1+ preserves order usually, but safer to enforce key list if needed.
-            # For now, iterate:
-            for key, value in raw_yaml.items():
-                if isinstance(value, str):
-                    t = Template(value)
-                    parts.append(t.render(**render_vars))
+            # Memoize per (character, config/template/state version, variables the template actually uses)
+            memo_key = self._prompt_memo_key(template, render_vars)
+            if memo_key is not None and memo_key in self._prompt_memo:
+                return self._prompt_memo[memo_key]
             
-            return "\n\n".join(parts)
+            # Render Sections (YAML key order)
+            parts = [t.render(**render_vars) for t in template["sections"]]
+            prompt = "\n\n".join(parts)
+            
+            if memo_key is not None:
+                if len(self._prompt_memo) >= self._PROMPT_MEMO_SIZE:
+                    self._prompt_memo.clear()
+                self._prompt_memo[memo_key] = prompt
+            return prompt
             
         except Exception as e:
             logger.error(f"Failed to render system template: {e}")
@@ -125,12 +131,45 @@ class SoulService:
             config = self.load_character_config()
             return config.get("system_prompt", "You are a helpful AI assistant.")
 
+    @staticmethod
+    def _compile_system_template(path) -> Dict[str, Any]:
+        """Parse system.yaml once and compile each section into a Jinja Template."""
+        import yaml
+        from jinja2 import Environment, meta
+        
+        with open(path, 'r', encoding='utf-8') as f:
+            raw_yaml = yaml.safe_load(f) or {}
+        
+        env = Environment()
+        sections, variables = [], set()
+        for key, value in raw_yaml.items():
+            if isinstance(value, str):
+                variables |= meta.find_undeclared_variables(env.parse(value))
+                sections.append(env.from_string(value))
+        return {"sections": sections, "variables": sorted(variables)}
+
+    def _prompt_memo_key(self, template: Dict[str, Any], render_vars: Dict[str, Any]) -> Optional[tuple]:
+        values = []
+        for name in template["variables"]:
+            value = render_vars.get(name)
+            if not isinstance(value, (str, int, float, bool, type(None))):
+                return None # Unhashable / live object referenced by template: don't memoize
+            values.append(value)
+        config_version = self._persistence.config_version if self._persistence else 0
+        return (self._active_character_id, self._template_cache.version, config_version,
+                self._state_version, tuple(values))
+
+    def invalidate_prompt_cache(self):
+        """Bump the soul-state version so memoized prompts are re-rendered (call after state changes)."""
+        self._state_version += 1
+
     async def on_interaction(self, user_input: str, ai_response: str, context: Dict[str, Any] = {}):
         """
         Delegates interaction events to the driver (for XP/Memory/Mood updates).
         """
         if self._active_driver:
             await self._active_driver.on_interaction(user_input, ai_response, context)
+            self.invalidate_prompt_cache()
 
     # ================= Compatibility Layer (Facade) =================
     
@@ -196,6 +235,7 @@ class SoulService:
         """Delegate to active persistence."""
         if self._persistence:
             self._persistence.save_config(data)
+            self.invalidate_prompt_cache()
 
     def get_module_data_dir(self, module_id: str) -> Optional[Any]:
         # SoulPersistence._resolve_data_root returns Path
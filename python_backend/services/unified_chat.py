@@ -13,7 +13,7 @@ import logging
 import json
 
 import logging
-from typing import AsyncGenerator, List, Dict, Any
+from typing import AsyncGenerator, List, Dict, Any, Optional
 from services.chat.pipeline import ChatPipeline
 
 logger = logging.getLogger("UnifiedChat")
@@ -38,9 +38,13 @@ class UnifiedChatProcessor:
         model: str = None,
         temperature: float = 0.7,
         stream: bool = True,
+        trace: Optional[Dict[str, Any]] = None,
+        history_trimmed: bool = False,
     ) -> AsyncGenerator[str, None]:
         """
         Delegates to the Pipeline.
+        `trace`, if given, is filled with the turn trace (timing, usage, tools).
+        `history_trimmed`: `messages` no longer start at the session's first turn.
         """
         async for token in self.pipeline.run(
             messages,
@@ -50,7 +54,9 @@ class UnifiedChatProcessor:
             enable_tools=enable_tools,
             model=model,
             temperature=temperature,
-            stream=stream
+            stream=stream,
+            trace=trace,
+            history_trimmed=history_trimmed
         ):
             yield token
 
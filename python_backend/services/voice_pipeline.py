@@ -0,0 +1,256 @@
+"""
+Server-Side Streaming Voice Pipeline
+
+Optional alternative to the frontend's sentence_splitter + per-sentence
+`/generate` calls: LLM tokens are segmented into sentences as they arrive,
+up to `concurrency` sentences synthesize at once through the TTS driver,
+and audio is emitted in sentence order as OUTPUT_AUDIO events (forwarded
+to clients by the gateway). Sentence N+1 synthesizes while sentence N is
+still being sent, so the client rarely waits between sentences.
+
+Metrics: time-to-first-audio (turn start -> first audio chunk emitted) and
+inter-sentence gaps (last chunk of sentence N -> first chunk of N+1).
+"""
+import asyncio
+import base64
+import logging
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger("VoicePipeline")
+
+
+# ==================== TEXT ====================
+
+def clean_tts_text(text: str) -> str:
+    """Strip tags, brackets, emoji and markdown that TTS engines would read out."""
+    # 1. Remove [emotion] tags and brackets
+    clean_text = re.sub(r'\[[^\]]*\]', '', text)
+    # Fix: Properly close character set and use standard Chinese brackets
+    clean_text = re.sub(r'[()\[\]（）【】]', '', clean_text)
+
+    # 2. Remove emojis and symbols (Expanded Range)
+    # Covers: Spec. chars, Dingbats, Emoji, Transport, Symbols
+    # (astral-plane emoji are all inside the U+10000.. range; 4-digit escapes like
+    # \u1f300 parse as \u1f30 + '0' and open a range that swallows Latin text)
+    clean_text = re.sub(r'[\U00010000-\U0010ffff\u2600-\u26ff\u2700-\u27bf]', '', clean_text)
+
+    # 3. Fix All-Caps words (LUMINA -> Lumina) to prevent spelling out
+    def fix_caps(m):
+        return m.group(0)[0] + m.group(0)[1:].lower()
+    clean_text = re.sub(r'\b([A-Z]{2,})\b', fix_caps, clean_text)
+
+    # 4. Remove symbols like '&' and normalize whitespace
+    clean_text = re.sub(r'[&]', ' ', clean_text)
+
+    # 5. Remove Markdown symbols (*, #, `, ~)
+    # Avoid reading out "asterisks" or "hashtags"
+    clean_text = re.sub(r'[*#`~]', '', clean_text)
+
+    return re.sub(r'\s+', ' ', clean_text).strip()
+
+
+class SentenceSegmenter:
+    """
+    Incremental sentence splitter (same boundaries as the frontend's
+    SentenceSplitter): hard stops always split, soft pauses (commas, '&')
+    split once the segment has `min_soft_chars`, and never inside [tags].
+    """
+    HARD_STOPS = "。！？.!?\n"
+    SOFT_STOPS = ",，、；;&"
+
+    def __init__(self, min_soft_chars: int = 8):
+        self.min_soft_chars = min_soft_chars
+        self._buffer = ""
+
+    @staticmethod
+    def _balanced(text: str) -> bool:
+        return (text.count("[") == text.count("]")
+                and text.count("(") + text.count("（") == text.count(")") + text.count("）"))
+
+    def feed(self, token: str) -> List[str]:
+        sentences = []
+        for ch in token:
+            self._buffer += ch
+            if ch in self.HARD_STOPS or (ch in self.SOFT_STOPS and len(self._buffer.strip()) >= self.min_soft_chars):
+                segment = self._buffer.strip()
+                if segment and self._balanced(segment):
+                    sentences.append(segment)
+                    self._buffer = ""
+        return sentences
+
+    def flush(self) -> List[str]:
+        segment, self._buffer = self._buffer.strip(), ""
+        return [segment] if segment else []
+
+
+# ==================== METRICS ====================
+
+def _percentile(samples: List[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+class VoicePipelineStats:
+    def __init__(self, max_samples: int = 1000):
+        self.max_samples = max_samples
+        self.turns = 0
+        self.sentences = 0
+        self.failures = 0
+        self.ttfa: List[float] = []
+        self.gaps: List[float] = []
+
+    def _record(self, samples: List[float], value: float):
+        samples.append(value)
+        if len(samples) > self.max_samples:
+            del samples[:self.max_samples // 2]
+
+    def record_ttfa(self, seconds: float):
+        self._record(self.ttfa, seconds)
+
+    def record_gap(self, seconds: float):
+        self._record(self.gaps, seconds)
+
+    def get_stats(self) -> Dict[str, Any]:
+        def ms(samples, q):
+            return round(_percentile(samples, q) * 1000, 1)
+        return {
+            "turns": self.turns,
+            "sentences": self.sentences,
+            "failures": self.failures,
+            "ttfa_ms": {"p50": ms(self.ttfa, 0.5), "p95": ms(self.ttfa, 0.95)},
+            "gap_ms": {"p50": ms(self.gaps, 0.5), "p95": ms(self.gaps, 0.95), "max": ms(self.gaps, 1.0)},
+        }
+
+
+voice_stats = VoicePipelineStats()
+
+
+# ==================== PIPELINE ====================
+
+class VoiceStream:
+    """
+    One spoken reply. `feed()` tokens as they stream, `finish()` after the
+    last one (waits until all audio is emitted), `cancel()` on interrupt.
+
+    `emit(payload)` receives, in order: audio chunks
+    `{"index", "text" (first chunk of a sentence only), "audio" (base64), "media_type"}`
+    and finally `{"end": True, "sentences": n}`.
+    """
+
+    def __init__(self,
+                 driver,
+                 emit: Callable[[Dict[str, Any]], Awaitable[None]],
+                 voice: Optional[str] = None,
+                 concurrency: int = 3,
+                 stats: VoicePipelineStats = voice_stats,
+                 **tts_options):
+        self.driver = driver
+        self.emit = emit
+        self.voice = voice
+        self.tts_options = tts_options
+        self.media_type = getattr(driver, "media_type", "audio/mpeg")
+        self.stats = stats
+        self._segmenter = SentenceSegmenter()
+        self._slots = asyncio.Semaphore(max(1, concurrency))
+        self._order: asyncio.Queue = asyncio.Queue()
+        self._synth_tasks: List[asyncio.Task] = []
+        self._count = 0
+        self._started = time.monotonic()
+        self._emitter = asyncio.create_task(self._emit_loop())
+        stats.turns += 1
+
+    def feed(self, token: str):
+        for sentence in self._segmenter.feed(token):
+            self._enqueue(sentence)
+
+    async def finish(self):
+        for sentence in self._segmenter.flush():
+            self._enqueue(sentence)
+        self._order.put_nowait(None)
+        await self._emitter
+
+    def cancel(self):
+        self._emitter.cancel()
+        for task in self._synth_tasks:
+            task.cancel()
+
+    def _enqueue(self, sentence: str):
+        text = clean_tts_text(sentence)
+        if not text:
+            return
+        chunks: asyncio.Queue = asyncio.Queue()
+        task = asyncio.create_task(self._synthesize(text, chunks))
+        self._synth_tasks.append(task)
+        self._order.put_nowait((self._count, sentence, chunks))
+        self._count += 1
+
+    async def _synthesize(self, text: str, chunks: asyncio.Queue):
+        try:
+            async with self._slots:  # FIFO: earlier sentences get slots first
+                async for chunk in self.driver.generate_stream(text=text, voice=self.voice, **self.tts_options):
+                    if chunk:
+                        chunks.put_nowait(chunk)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.stats.failures += 1
+            logger.error(f"TTS failed for sentence '{text[:30]}': {e}")
+        finally:
+            chunks.put_nowait(None)
+
+    async def _emit_loop(self):
+        last_audio_at: Optional[float] = None
+        emitted = 0
+        while True:
+            item = await self._order.get()
+            if item is None:
+                break
+            index, sentence, chunks = item
+            first = True
+            done = False
+            while not done:
+                batch = [await chunks.get()]
+                while not chunks.empty():
+                    batch.append(chunks.get_nowait())
+                if batch[-1] is None:
+                    batch.pop()
+                    done = True
+                if not batch:
+                    continue
+
+                now = time.monotonic()
+                if first:
+                    if last_audio_at is None:
+                        self.stats.record_ttfa(now - self._started)
+                    else:
+                        self.stats.record_gap(now - last_audio_at)
+                await self.emit({
+                    "index": index,
+                    "text": sentence if first else None,
+                    "audio": base64.b64encode(b"".join(batch)).decode("ascii"),
+                    "media_type": self.media_type,
+                })
+                first = False
+                last_audio_at = time.monotonic()
+            if not first:
+                emitted += 1
+                self.stats.sentences += 1
+        await self.emit({"end": True, "sentences": emitted})
+
+
+async def resolve_tts_driver(engine: Optional[str] = None):
+    """Driver from the TTS manager; loads it on first use (main process registers drivers lazily)."""
+    from services.container import services
+    manager = services.get_tts()
+    engine = engine or manager.active_driver_id
+    if manager.active_driver is not None and engine == manager.active_driver_id:
+        return manager.active_driver
+    if engine not in manager.drivers:
+        from app_config import config as app_config
+        engine = app_config.tts.provider
+    await manager.activate(engine)
+    return manager.active_driver
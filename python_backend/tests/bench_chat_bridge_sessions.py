@@ -0,0 +1,82 @@
+"""
+Benchmark: Concurrent sessions through BasicChatBridge (services/chat_bridge.py)
+
+Several user/character sessions send input at the same time against a mock
+LLM that streams tokens with a fixed delay. With the old single
+`current_task`, each new message cancelled the other sessions' replies; now
+every session completes, bounded by the global turn cap. One session also
+interrupts itself mid-reply to show interrupts stay scoped.
+
+Usage: python tests/bench_chat_bridge_sessions.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import services.chat_bridge as chat_bridge_module
+from core.protocol import EventType, EventPacket
+from services.chat_bridge import BasicChatBridge
+
+SESSIONS = 12
+TOKENS = 40
+TOKEN_DELAY = 0.01
+
+
+class MockChat:
+    async def process(self, messages, **kwargs):
+        for i in range(TOKENS):
+            await asyncio.sleep(TOKEN_DELAY)
+            yield f"t{i} "
+
+
+class Event:
+    def __init__(self, data):
+        self.data = data
+
+
+class RecordingBus:
+    """Records when each session's reply finished (brain_response_end)."""
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.finished = {}
+
+    async def emit(self, event_type, packet):
+        if event_type == "brain_response_end":
+            self.finished[packet.session_id] = time.perf_counter() - self.started
+
+
+def input_event(session: int, text: str) -> Event:
+    return Event(EventPacket(session_id=session, type=EventType.INPUT_TEXT, source="bench",
+                             payload={"text": text, "user_id": f"user{session}", "character_id": "hiyori"}))
+
+
+async def run(cap: int):
+    bridge = BasicChatBridge(max_concurrent_turns=cap)
+    bus = bridge.bus = RecordingBus()
+
+    for s in range(SESSIONS):
+        await bridge.handle_input_text(input_event(s, "hello"))
+    await asyncio.sleep(TOKEN_DELAY * TOKENS / 2)
+    await bridge.handle_input_text(input_event(0, "wait, actually..."))
+
+    while bridge._turns:
+        await asyncio.sleep(0.01)
+    return time.perf_counter() - bus.started, bus.finished, bridge.get_stats()
+
+
+async def main():
+    chat_bridge_module.unified_chat = MockChat()
+    serial = SESSIONS * TOKENS * TOKEN_DELAY
+    print(f"{SESSIONS} sessions x {TOKENS} tokens @ {TOKEN_DELAY * 1000:.0f}ms/token (serial ≈ {serial:.1f}s)")
+    for cap in (1, 4, SESSIONS):
+        elapsed, finished, stats = await run(cap)
+        print(f"cap={cap:2}  wall={elapsed:.2f}s  completed={len(finished)}/{SESSIONS}  "
+              f"peak_active={stats['peak_active']}  interrupts={stats['interrupts']}  "
+              f"slot wait avg={stats['avg_slot_wait_ms']:.0f}ms p95={stats['p95_slot_wait_ms']:.0f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
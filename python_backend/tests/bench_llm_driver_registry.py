@@ -0,0 +1,79 @@
+"""
+Benchmark: LLM driver registry (llm/manager.py)
+
+Measures LLMManager startup, the first get_driver (class scan + one driver
+instance), a hit, and a miss: a route pointing at a provider that doesn't
+exist (typo) or is disabled. A miss used to rerun the full directory scan
+and re-instantiate every provider on every request; that cost is measured
+as "legacy per-miss rescan" (refresh + scan + instantiate all enabled).
+
+Runs against a throwaway data root (default llm_registry.json).
+
+Usage: python tests/bench_llm_driver_registry.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+os.environ["LUMINA_DATA_PATH"] = tempfile.mkdtemp()
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import logging
+logging.disable(logging.WARNING)
+
+from llm.manager import FeatureRoute, LLMManager
+
+REPEAT = 200
+
+
+def ms(seconds):
+    return f"{seconds * 1000:8.3f} ms"
+
+
+async def main():
+    started = time.perf_counter()
+    manager = LLMManager()
+    startup = time.perf_counter() - started
+
+    started = time.perf_counter()
+    await manager.get_driver("chat")
+    first = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(REPEAT):
+        await manager.get_driver("chat")
+    hit = (time.perf_counter() - started) / REPEAT
+
+    manager.config.routes["typo"] = FeatureRoute(feature="typo", provider_id="opnai", model="gpt-4o-mini")
+    started = time.perf_counter()
+    await manager.get_driver("typo")
+    first_miss = time.perf_counter() - started
+    started = time.perf_counter()
+    for _ in range(REPEAT):
+        await manager.get_driver("typo")
+    miss = (time.perf_counter() - started) / REPEAT
+    stats = manager.get_driver_stats()
+
+    def legacy_rescan():
+        manager.refresh_drivers()
+        for p_id in manager.config.providers:
+            manager._get_provider_driver(p_id)
+
+    started = time.perf_counter()
+    for _ in range(10):
+        legacy_rescan()
+    legacy = (time.perf_counter() - started) / 10
+
+    print(f"startup (LLMManager())       {ms(startup)}")
+    print(f"first get_driver (scan+init) {ms(first)}")
+    print(f"get_driver hit               {ms(hit)}")
+    print(f"get_driver miss, first       {ms(first_miss)}  (fallback resolved, miss cached)")
+    print(f"get_driver miss, cached      {ms(miss)}")
+    print(f"legacy per-miss rescan       {ms(legacy)}  ({legacy / miss:.0f}x the cached miss)")
+    print(f"\n{stats}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
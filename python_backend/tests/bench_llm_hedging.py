@@ -0,0 +1,81 @@
+"""
+Benchmark: Hedged streaming requests (llm/hedging.py)
+
+Two local mock providers with injected latency: the primary is usually fast
+but has a slow tail (and occasional errors); the fallback is steady. Reports
+time-to-first-token percentiles with hedging off and on.
+
+Usage: python tests/bench_llm_hedging.py
+"""
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.interfaces.driver import BaseLLMDriver
+from llm.hedging import HedgedLLMDriver
+
+REQUESTS = 200
+HEDGE_DELAY = 0.25
+
+
+class MockProvider(BaseLLMDriver):
+    def __init__(self, id, fast, slow, slow_ratio, error_ratio=0.0):
+        super().__init__(id, id)
+        self.fast, self.slow, self.slow_ratio, self.error_ratio = fast, slow, slow_ratio, error_ratio
+
+    async def load(self):
+        pass
+
+    async def list_models(self):
+        return ["mock"]
+
+    async def chat_completion(self, messages, model, temperature=0.7, stream=False, **kwargs):
+        roll = random.random()
+        if roll < self.error_ratio:
+            await asyncio.sleep(0.05)
+            raise ConnectionError("mock 503")
+        await asyncio.sleep(self.slow if roll < self.slow_ratio else self.fast)
+        for word in ("Hello", " there", "!"):
+            yield word
+            await asyncio.sleep(0.01)
+
+
+async def ttft(driver) -> float:
+    t0 = time.perf_counter()
+    gen = driver.stream_chat([{"role": "user", "content": "hi"}], model="mock")
+    try:
+        await gen.__anext__()
+    except ConnectionError:
+        return float("nan")
+    finally:
+        await gen.aclose()
+    return time.perf_counter() - t0
+
+
+def pct(values, p):
+    ordered = sorted(v for v in values if v == v)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))] * 1000
+
+
+async def main():
+    random.seed(7)
+    primary = MockProvider("primary", fast=0.08, slow=1.5, slow_ratio=0.1, error_ratio=0.02)
+    fallback = MockProvider("fallback", fast=0.15, slow=0.4, slow_ratio=0.05)
+    hedged = HedgedLLMDriver(primary, fallback, fallback_model="mock", delay=HEDGE_DELAY)
+
+    for name, driver in (("off", primary), ("on", hedged)):
+        results = await asyncio.gather(*(ttft(driver) for _ in range(REQUESTS)))
+        errors = sum(1 for r in results if r != r)
+        print(f"hedging={name:3}  TTFT p50={pct(results, 0.5):.0f}ms p95={pct(results, 0.95):.0f}ms "
+              f"p99={pct(results, 0.99):.0f}ms  errors={errors}")
+    print(f"hedge stats: {hedged.stats.snapshot()}")
+
+
+if __name__ == "__main__":
+    import logging
+    logging.basicConfig(level=logging.ERROR)
+    asyncio.run(main())
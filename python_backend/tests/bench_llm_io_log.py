@@ -0,0 +1,60 @@
+"""
+Benchmark: LLM I/O logging cost on the request path (llm/io_log.py)
+
+Compares the old inline logging (deepcopy + json.dumps(indent=2) of the full
+message list on every request) with the background sink's enqueue, for a
+turn with a large system prompt, RAG context and 40 history messages.
+
+Usage: python tests/bench_llm_io_log.py
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from copy import deepcopy
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from llm.io_log import LLMIOLogger
+
+ITERATIONS = 500
+
+
+def build_messages():
+    messages = [{"role": "system", "content": "You are Hiyori. " * 1500}]
+    for i in range(20):
+        messages.append({"role": "user", "content": f"Question {i}: " + "tell me more " * 30})
+        messages.append({"role": "assistant", "content": f"Answer {i}: " + "well, " * 80})
+    messages.append({"role": "user", "content": "What now?\n\n## Relevant Memories/Context:\n" + "- memory line\n" * 200})
+    return messages
+
+
+def bench(label, fn):
+    t0 = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn()
+    per_call = (time.perf_counter() - t0) / ITERATIONS * 1e6
+    print(f"{label:38} {per_call:9.1f} µs/request")
+
+
+def main():
+    messages = build_messages()
+    size = len(json.dumps(messages, ensure_ascii=False))
+    print(f"{len(messages)} messages, {size / 1024:.0f} KB per request\n")
+
+    bench("inline deepcopy + json.dumps (old)", lambda: json.dumps(deepcopy(messages), indent=2, ensure_ascii=False))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, options in (("enqueue, sample_rate=0.1", {"sample_rate": 0.1}),
+                               ("enqueue, full capture", {"full_capture": True})):
+            sink = LLMIOLogger(path=Path(tmp) / "io.jsonl", queue_size=ITERATIONS * 2, **options)
+            bench(label, lambda: sink.log_response(sink.log_request("chat", "bench", messages), "ok"))
+            t0 = time.perf_counter()
+            sink.flush(timeout=60)
+            print(f"{'':38} (background write drained in {time.perf_counter() - t0:.2f}s, written={sink.written})")
+
+
+if __name__ == "__main__":
+    main()
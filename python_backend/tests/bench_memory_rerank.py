@@ -0,0 +1,121 @@
+"""
+Benchmark: cross-encoder rerank of hybrid search results (memory/rerank.py)
+
+VectorStore.search_hybrid runs against a fake driver (20 ms per query,
+returns `limit` memory rows in RRF order) with the rerank stage over-fetching
+20, 50 and 100 candidates and keeping the top 5. Reports:
+- rerank stage latency p50/p95 per candidate count (one CPU batch),
+- behaviour under the 150 ms budget with a scorer too slow for it
+  (fallback to hybrid order; the call returns at the budget),
+- prompt tokens of the injected memories: hybrid top 10 vs reranked top 5.
+
+Scorer: cross-encoder/ms-marco-MiniLM-L-6-v2 on CPU when sentence-transformers
+is installed; otherwise a token-overlap stand-in (labelled in the output; its
+latency is stage overhead only, not model inference).
+
+Usage: python tests/bench_memory_rerank.py
+"""
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ["LUMINA_DATA_PATH"] = tempfile.mkdtemp()
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import logging
+logging.disable(logging.WARNING)
+
+from memory.rerank import CrossEncoderReranker
+from memory.vector_store import VectorStore
+from services.chat.token_budget import count_tokens
+
+SIZES = (20, 50, 100)
+REPEAT = 20
+QUERY = "what did I say about my sister's wedding in june?"
+WORDS = ("sister wedding june dress venue cake hiking work boss exam cat dog trip tokyo ramen birthday "
+         "movie game music guitar rain coffee train book mother father friend party gift flowers").split()
+
+
+class FakeDriver:
+    def __init__(self, rng):
+        self.rng = rng
+
+    async def search_hybrid(self, query, vector, table, limit, threshold, vector_weight, filter_criteria):
+        await asyncio.sleep(0.02)
+        return [{"id": f"episodic_memory:{i}",
+                 "content": "The user mentioned " + " ".join(self.rng.choice(WORDS) for _ in range(40)) + ".",
+                 "created_at": "2024-05-01T10:00:00"} for i in range(limit)]
+
+    async def mark_memories_hit(self, ids):
+        pass
+
+
+def overlap_scores(pairs):
+    scores = []
+    for query, text in pairs:
+        q = set(query.lower().replace("?", "").split())
+        scores.append(sum(w in q for w in text.lower().split()) / (1 + len(text) / 200))
+    return scores
+
+
+def slow_scores(pairs):
+    time.sleep(0.003 * len(pairs))  # 3 ms per pair: over budget from ~50 candidates
+    return overlap_scores(pairs)
+
+
+def configure_scorer():
+    try:
+        from sentence_transformers import CrossEncoder
+        model = CrossEncoder("cross-encoder/ms-marco-MiniLM-L-6-v2", device="cpu", max_length=256)
+        return lambda pairs: model.predict(pairs, batch_size=len(pairs), show_progress_bar=False), \
+            "cross-encoder/ms-marco-MiniLM-L-6-v2 (CPU)"
+    except Exception:
+        return overlap_scores, "token-overlap stand-in (sentence-transformers not installed)"
+
+
+def injected_tokens(rows):
+    return count_tokens("\n".join(f"- {r['content']} ({r['created_at']})" for r in rows))
+
+
+async def measure(score_fn, size, budget_ms=150):
+    reranker = CrossEncoderReranker(candidates=size, top_k=5, budget_ms=budget_ms, score_fn=score_fn)
+    store = VectorStore(FakeDriver(random.Random(size)), reranker=reranker)
+    totals, rows = [], []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        rows = await store.search_hybrid(QUERY, [0.0] * 384, "bench", limit=10, rerank=True)
+        totals.append((time.perf_counter() - started) * 1000)
+        while reranker._busy:  # let a timed-out batch finish before the next query
+            await asyncio.sleep(0.005)
+    return reranker.get_stats(), statistics.median(totals), rows
+
+
+async def main():
+    score_fn, label = configure_scorer()
+    store = VectorStore(FakeDriver(random.Random(0)))
+    baseline = await store.search_hybrid(QUERY, [0.0] * 384, "bench", limit=10)
+    print(f"Scorer: {label}. Keep top 5, budget 150 ms, {REPEAT} queries per size\n")
+
+    print(f"{'candidates':>10} | {'rerank p50':>10} | {'rerank p95':>10} | {'search total p50':>16} | {'fallbacks':>9}")
+    for size in SIZES:
+        stats, total, rows = await measure(score_fn, size)
+        lat = next(iter(stats["latency_ms"].values()), {"p50": 0.0, "p95": 0.0})
+        print(f"{size:>10} | {lat['p50']:>7.2f} ms | {lat['p95']:>7.2f} ms | {total:>13.1f} ms | "
+              f"{sum(stats['fallbacks'].values()):>9}")
+
+    print("\nBudget check (simulated 3 ms/pair scorer):")
+    for size in SIZES:
+        stats, total, _ = await measure(slow_scores, size)
+        print(f"{size:>10} candidates: search total p50 {total:6.1f} ms, reranked {stats['reranked']}, "
+              f"fallbacks {stats['fallbacks'] or 0}")
+
+    print(f"\nInjected memory tokens: hybrid top 10 = {injected_tokens(baseline)}, "
+          f"reranked top 5 = {injected_tokens(rows)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,88 @@
+"""
+Benchmark: SessionManager per-turn cost (services/session_manager.py)
+
+Per turn, ChatService reads the history (twice) and appends a user/assistant
+pair. Compares the previous whole-file JSON load/save per call against the
+in-memory store with an append-only journal, at 40 / 400 / 4000 messages.
+Bytes written include amortized snapshot compactions.
+
+Usage: python tests/bench_session_store.py
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.session_manager import SessionManager, SessionState
+
+TURNS = 200
+USER_MSG = "What did we talk about yesterday? " * 3
+AI_MSG = "We talked about your trip to Tokyo and the ramen place near the station. " * 4
+
+
+class LegacyJsonStore:
+    """Previous behaviour: every call parses and/or rewrites the whole session file."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.bytes_written = 0
+
+    def _load(self) -> SessionState:
+        return SessionState.model_validate_json(self.path.read_text(encoding="utf-8"))
+
+    def _save(self, state: SessionState):
+        data = state.model_dump_json(indent=2)
+        self.path.write_text(data, encoding="utf-8")
+        self.bytes_written += len(data.encode("utf-8"))
+
+    def get_history(self, user_id, char_id):
+        return self._load().short_term_history
+
+    def add_turn(self, user_id, char_id, user_msg, ai_msg):
+        state = self._load()
+        state.short_term_history += [{"role": "user", "content": user_msg}, {"role": "assistant", "content": ai_msg}]
+        self._save(state)
+
+
+def seed(size: int) -> SessionState:
+    history = []
+    for _ in range(size // 2):
+        history += [{"role": "user", "content": USER_MSG}, {"role": "assistant", "content": AI_MSG}]
+    return SessionState(short_term_history=history)
+
+
+def run_turns(store) -> float:
+    t0 = time.perf_counter()
+    for _ in range(TURNS):
+        store.get_history("u", "c")
+        store.add_turn("u", "c", USER_MSG, AI_MSG)
+        store.get_history("u", "c")
+    return (time.perf_counter() - t0) / TURNS
+
+
+def main():
+    print(f"{'messages':>8} | {'legacy ms/turn':>14} {'legacy KB/turn':>15} | {'journal ms/turn':>15} {'journal KB/turn':>16}")
+    for size in (40, 400, 4000):
+        with tempfile.TemporaryDirectory() as tmp:
+            legacy = LegacyJsonStore(Path(tmp) / "legacy.json")
+            legacy._save(seed(size))
+            legacy.bytes_written = 0
+            legacy_ms = run_turns(legacy) * 1000
+            legacy_kb = legacy.bytes_written / TURNS / 1024
+
+            store = SessionManager(tmp)
+            store.MAX_HISTORY_TOKENS = 10 ** 9  # measure storage cost, not trimming
+            store.save_session("u", "c", seed(size))
+            store.bytes_written = 0
+            store._cache.clear()  # first turn pays the cold load, like a restart
+            journal_ms = run_turns(store) * 1000
+            journal_kb = store.bytes_written / TURNS / 1024
+
+        print(f"{size:>8} | {legacy_ms:>14.2f} {legacy_kb:>15.1f} | {journal_ms:>15.3f} {journal_kb:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark: SSE relay for /v1/chat/completions (routers/completions.py)
+
+Feeds a bursty mock token stream (provider-style network reads: a few
+tokens every couple of milliseconds) through
+- legacy: one `_mock_chunk` (time.time + dict + json.dumps + str) per token
+- relay: `_batched` time-window frames encoded by `_ChunkEncoder`
+and reports CPU per 1k tokens (minus the cost of the source itself), frames
+sent, and p99 delay between consecutive frames.
+
+Usage: python tests/bench_sse_relay.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from routers.completions import SSE_BATCH_WINDOW, _ChunkEncoder, _batched, _mock_chunk
+
+TOKENS = 20000
+BURST = 4
+BURST_INTERVAL = 0.002
+MODEL = "deepseek-chat"
+
+
+async def token_source():
+    for i in range(TOKENS // BURST):
+        await asyncio.sleep(BURST_INTERVAL)
+        for j in range(BURST):
+            yield " token"
+
+
+async def baseline():
+    async for _ in token_source():
+        pass
+    return []
+
+
+async def legacy():
+    stamps = []
+    async for token in token_source():
+        frame = _mock_chunk(token, MODEL).encode()
+        stamps.append(time.perf_counter())
+    return stamps
+
+
+async def relay():
+    encoder = _ChunkEncoder(MODEL)
+    stamps = []
+    async for text in _batched(token_source(), SSE_BATCH_WINDOW):
+        frame = encoder.content(text)
+        stamps.append(time.perf_counter())
+    return stamps
+
+
+def p99_gap_ms(stamps):
+    gaps = sorted(b - a for a, b in zip(stamps, stamps[1:]))
+    return gaps[int(len(gaps) * 0.99)] * 1000 if gaps else 0.0
+
+
+async def measure(fn):
+    cpu = time.process_time()
+    stamps = await fn()
+    return time.process_time() - cpu, stamps
+
+
+async def main():
+    base_cpu, _ = await measure(baseline)
+    print(f"{TOKENS} tokens in bursts of {BURST} every {BURST_INTERVAL * 1000:.0f}ms, window={SSE_BATCH_WINDOW * 1000:.0f}ms")
+    for name, fn in (("legacy", legacy), ("relay", relay)):
+        cpu, stamps = await measure(fn)
+        per_1k = (cpu - base_cpu) / TOKENS * 1000 * 1000
+        print(f"{name:7} CPU/1k tokens={per_1k:6.2f}ms  frames={len(stamps):6}  p99 inter-chunk={p99_gap_ms(stamps):5.1f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
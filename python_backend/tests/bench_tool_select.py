@@ -0,0 +1,214 @@
+"""
+Benchmark: per-turn tool subset selection (services/chat/tool_select.py)
+
+A catalog of up to 100 realistic tool definitions (web search, calendar,
+music, smart home, files, ...; 4 actions per domain) is offered at 5, 10,
+25, 50 and 100 tools. For each size, 20 user requests that target a known
+tool run through ToolSelector (top_k=5, web_search pinned):
+- tool-section prompt tokens: all tools vs. selected subset,
+- selection latency: first turn (embeds all descriptions) and warm turns,
+- modeled TTFT: 80 ms + 0.05 ms per prompt token (1.5k-token base prompt),
+- recall: how often the targeted tool is in the subset.
+
+Encoder: all-MiniLM-L6-v2 when sentence-transformers is installed, otherwise
+a hashed bag-of-words stand-in (labelled in the output; recall numbers are
+then lexical, the token/latency numbers are unaffected).
+
+Usage: python tests/bench_tool_select.py
+"""
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+logging.disable(logging.WARNING)
+
+from services.chat.token_budget import count_tokens
+from services.chat.tool_select import ToolSelector
+
+BASE_PROMPT_TOKENS = 1500
+TTFT_BASE_MS, TTFT_MS_PER_TOKEN = 80.0, 0.05
+SIZES = (5, 10, 25, 50, 100)
+
+# domain -> (object, [(action, verb phrase, user request)])
+CATALOG = {
+    "web": ("the web", [("search", "Search the internet for up-to-date information", "search online for reviews of the new phone"),
+                        ("fetch_page", "Download and read a web page by URL", "read this article for me: example.com/post"),
+                        ("news", "Get the latest news headlines on a topic", "any news headlines about the election today"),
+                        ("images", "Find images on the internet matching a query", "find me some pictures of red pandas")]),
+    "weather": ("the weather", [("current", "Get the current weather conditions for a city", "how hot is it outside in Berlin right now"),
+                                ("forecast", "Get the multi-day weather forecast for a city", "will it rain in Tokyo this weekend forecast"),
+                                ("alerts", "List active severe weather alerts for a region", "are there any storm warnings alerts near me"),
+                                ("air_quality", "Get the air quality index and pollution level", "is the air pollution bad today in Delhi")]),
+    "calendar": ("calendar events", [("create_event", "Create a new event in the user's calendar", "put a dentist appointment in my calendar for friday"),
+                                     ("list_events", "List upcoming events from the user's calendar", "what's on my calendar schedule tomorrow"),
+                                     ("delete_event", "Delete an event from the user's calendar", "cancel and remove the team meeting event"),
+                                     ("move_event", "Reschedule an existing calendar event", "reschedule my lunch event to 2pm")]),
+    "timer": ("timers and alarms", [("set_timer", "Start a countdown timer", "set a timer for ten minutes for the pasta"),
+                                    ("set_alarm", "Set an alarm clock for a given time", "wake me up with an alarm at 7am"),
+                                    ("cancel_timer", "Cancel a running timer or alarm", "stop and cancel the timer"),
+                                    ("list_timers", "List running timers and alarms", "how many timers do I have running")]),
+    "music": ("music playback", [("play", "Play a song, album, artist or playlist", "play some jazz music"),
+                                 ("pause", "Pause the music that is currently playing", "pause the song"),
+                                 ("skip", "Skip to the next track", "skip this track, next song please"),
+                                 ("volume", "Change the playback volume", "turn the music volume down a bit")]),
+    "email": ("email", [("send", "Compose and send an email message", "send an email to Anna saying I'll be late"),
+                        ("search", "Search the user's mailbox for messages", "find the email from my landlord about rent"),
+                        ("summarize_inbox", "Summarize unread emails in the inbox", "summarize my unread inbox emails"),
+                        ("draft_reply", "Draft a reply to an email thread", "draft a reply to the last email from work")]),
+    "notes": ("notes", [("create", "Save a new note", "make a note that the wifi password is hunter2"),
+                        ("search", "Search the user's saved notes", "look through my notes for the recipe"),
+                        ("append", "Append text to an existing note", "add milk to my shopping list note"),
+                        ("delete", "Delete a saved note", "delete the note about the old project")]),
+    "smart_home": ("smart home devices", [("lights", "Turn lights on or off and set brightness", "turn off the living room lights"),
+                                          ("thermostat", "Set the thermostat temperature", "set the heating thermostat to 21 degrees"),
+                                          ("lock", "Lock or unlock smart door locks", "did I lock the front door, lock it"),
+                                          ("scene", "Activate a smart home scene", "activate movie night scene")]),
+    "files": ("local files", [("read", "Read a text file from disk", "open and read the file todo.txt"),
+                              ("write", "Write text to a file on disk", "save this text to a file called ideas.md"),
+                              ("list", "List files in a folder", "what files are in my downloads folder"),
+                              ("search", "Search for files by name or content", "search my files for the tax pdf")]),
+    "maps": ("maps and places", [("directions", "Get directions between two places", "how do I get to the train station, directions"),
+                                 ("nearby", "Find nearby places like restaurants or shops", "any good ramen restaurants nearby"),
+                                 ("travel_time", "Estimate travel time by car or transit", "how long is the drive to the airport"),
+                                 ("geocode", "Look up the address or coordinates of a place", "what's the address of the Louvre")]),
+    "finance": ("finance", [("stock_quote", "Get the current stock price for a ticker", "what's the stock price of NVDA"),
+                            ("currency_convert", "Convert an amount between currencies", "convert 100 dollars to euros"),
+                            ("crypto_price", "Get the current price of a cryptocurrency", "how much is bitcoin worth now"),
+                            ("expense_log", "Log a personal expense", "log an expense of 12 dollars for lunch")]),
+    "translate": ("translation", [("text", "Translate text between languages", "translate 'good morning' into Japanese"),
+                                  ("detect_language", "Detect the language of a text", "what language is 'obrigado'"),
+                                  ("pronounce", "Give pronunciation for a word", "how do you pronounce croissant"),
+                                  ("define", "Look up the dictionary definition of a word", "define the word serendipity")]),
+    "screen": ("the screen", [("screenshot", "Capture a screenshot of the desktop", "take a screenshot of my screen"),
+                              ("ocr", "Read text from the screen with OCR", "read the text on my screen"),
+                              ("describe", "Describe what is visible on the screen", "what am I looking at on screen"),
+                              ("record", "Start a screen recording", "start recording the screen")]),
+    "apps": ("desktop applications", [("open", "Launch a desktop application", "open the browser app"),
+                                      ("close", "Close a running application", "close spotify app"),
+                                      ("list_running", "List running applications", "which apps are running"),
+                                      ("focus", "Bring an application window to the front", "switch to the code editor window")]),
+    "reminders": ("reminders", [("create", "Create a reminder for a time or place", "remind me to call mom at 6"),
+                                ("list", "List pending reminders", "what reminders do I have"),
+                                ("complete", "Mark a reminder as done", "mark the gym reminder as done"),
+                                ("snooze", "Snooze a reminder", "snooze that reminder for an hour")]),
+    "math": ("math", [("calculate", "Evaluate a math expression", "calculate 17 percent of 2340"),
+                      ("unit_convert", "Convert between units", "how many miles is 42 kilometers"),
+                      ("solve_equation", "Solve an algebraic equation", "solve x squared minus 4 equals 0"),
+                      ("statistics", "Compute statistics over a list of numbers", "average and median of 3, 9, 12, 40")]),
+    "github": ("GitHub", [("list_issues", "List open issues in a repository", "show open github issues in my repo"),
+                          ("create_issue", "Open a new issue in a repository", "file a github issue about the login bug"),
+                          ("pr_status", "Check the status of pull requests", "did my pull request pass CI"),
+                          ("search_code", "Search code across repositories", "search github code for parse_config")]),
+    "shopping": ("shopping", [("search_product", "Search online stores for a product", "find a cheap mechanical keyboard to buy"),
+                              ("track_order", "Track the delivery status of an order", "where is my package delivery"),
+                              ("price_history", "Show the price history of a product", "has the price of the headphones dropped"),
+                              ("add_to_list", "Add an item to the shopping list", "add eggs to the shopping list")]),
+    "health": ("health and fitness", [("log_workout", "Log a workout session", "log a 5k run I did this morning"),
+                                      ("step_count", "Get today's step count", "how many steps did I walk today"),
+                                      ("sleep_summary", "Summarize last night's sleep", "how well did I sleep last night"),
+                                      ("water_log", "Log water intake", "log two glasses of water")]),
+    "photos": ("photos", [("search", "Search the user's photo library", "find my photos from the beach trip"),
+                          ("album_create", "Create a photo album", "make an album for the wedding photos"),
+                          ("share", "Share a photo with a contact", "share that photo with dad"),
+                          ("edit", "Apply simple edits to a photo", "crop and brighten the last photo")]),
+    "contacts": ("contacts", [("lookup", "Look up a contact's phone or email", "what's Sarah's phone number"),
+                              ("add", "Add a new contact", "save a new contact for the plumber"),
+                              ("birthday", "Get a contact's birthday", "when is Tom's birthday"),
+                              ("call", "Start a phone call to a contact", "call my brother")]),
+    "wiki": ("encyclopedia articles", [("summary", "Get an encyclopedia summary of a topic", "give me a wikipedia summary of the Roman empire"),
+                                       ("search", "Search encyclopedia articles", "search wikipedia for black holes"),
+                                       ("on_this_day", "Events that happened on this day in history", "what happened on this day in history"),
+                                       ("random", "Get a random encyclopedia article", "tell me a random wikipedia fact")]),
+    "transit": ("public transit", [("departures", "Next departures from a station", "when is the next bus from central station"),
+                                   ("delays", "Current delays on transit lines", "is the subway delayed right now"),
+                                   ("route", "Plan a public transit route", "which train gets me to the stadium"),
+                                   ("fares", "Look up transit fares", "how much is a metro ticket")]),
+    "food": ("food and recipes", [("recipe_search", "Find recipes by ingredients or dish", "find a recipe with chicken and lemon"),
+                                  ("nutrition", "Get nutrition facts for a food", "how many calories in an avocado"),
+                                  ("order_delivery", "Order food delivery from a restaurant", "order a pizza delivery"),
+                                  ("meal_plan", "Create a weekly meal plan", "make me a vegetarian meal plan for the week")]),
+    "system": ("the computer", [("battery", "Get the battery level", "how much battery is left"),
+                                ("disk_usage", "Show disk space usage", "how much disk space do I have left"),
+                                ("cpu_usage", "Show CPU and memory usage", "why is my computer slow, cpu usage"),
+                                ("shutdown", "Shut down or restart the computer", "restart the computer")]),
+}
+
+
+def build_catalog():
+    """(definition, user request) pairs; web_search first (it is pinned in the app)."""
+    entries = []
+    for domain, (obj, actions) in CATALOG.items():
+        for action, description, request in actions:
+            name = f"{domain}_{action}"
+            entries.append(({"type": "function", "function": {
+                "name": name,
+                "description": f"{description}. Works with {obj}; returns a short textual result for the assistant.",
+                "parameters": {"type": "object", "properties": {
+                    "query": {"type": "string", "description": f"What to do with {obj}, in natural language."},
+                    "options": {"type": "object", "description": "Optional provider-specific settings."}},
+                    "required": ["query"]}}}, request))
+    entries.sort(key=lambda e: e[0]["function"]["name"] != "web_search")
+    # Interleave domains so every size mixes tool kinds
+    by_action = [entries[i::4] for i in range(4)]
+    return [e for group in zip(*by_action) for e in group]
+
+
+def configure_encoder(selector: ToolSelector) -> str:
+    try:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+        selector.cache.encode_fn = model.encode
+        return "all-MiniLM-L6-v2"
+    except Exception:
+        from bench_history_select import hashed_bow
+        selector.cache.encode_fn = hashed_bow
+        return "hashed bag-of-words (sentence-transformers not installed)"
+
+
+def tokens(tool_defs) -> int:
+    return count_tokens(json.dumps(tool_defs, ensure_ascii=False)) if tool_defs else 0
+
+
+async def run_size(catalog, size: int, encode_fn):
+    selector = ToolSelector(encode_fn, top_k=5, pinned=("web_search",))
+    entries = catalog[:size]
+    tool_defs = [d for d, _ in entries]
+    requests = [(d["function"]["name"], r) for d, r in entries][:20]
+    requests = (requests * (20 // len(requests) + 1))[:20]
+
+    full = tokens(tool_defs)
+    sent_tokens, latencies, hits = [], [], 0
+    for target, request in requests:
+        started = time.perf_counter()
+        selected = await selector.select(tool_defs, [{"role": "user", "content": request}])
+        latencies.append((time.perf_counter() - started) * 1000)
+        sent_tokens.append(tokens(selected))
+        hits += any(d["function"]["name"] == target for d in selected)
+
+    sent = statistics.mean(sent_tokens)
+    ttft_all = TTFT_BASE_MS + TTFT_MS_PER_TOKEN * (BASE_PROMPT_TOKENS + full)
+    ttft_sel = TTFT_BASE_MS + TTFT_MS_PER_TOKEN * (BASE_PROMPT_TOKENS + sent) + statistics.mean(latencies[1:])
+    return (size, full, sent, latencies[0], statistics.median(latencies[1:]), ttft_all, ttft_sel,
+            hits / len(requests), selector.get_stats()["avg_tools_sent"])
+
+
+async def main():
+    probe = ToolSelector()
+    encoder = configure_encoder(probe)
+    catalog = build_catalog()
+    print(f"Encoder: {encoder}. top_k=5, pinned: web_search, all tools sent at <= 8 tools\n")
+    print(f"{'tools':>5} | {'sent':>5} | {'tool tok all':>12} | {'tool tok sel':>12} | {'select cold':>11} | "
+          f"{'select warm':>11} | {'TTFT all':>9} | {'TTFT sel':>9} | {'recall':>6}")
+    for size in SIZES:
+        (size, full, sent, cold, warm, ttft_all, ttft_sel, recall, avg_sent) = await run_size(catalog, size, probe.cache.encode_fn)
+        print(f"{size:>5} | {avg_sent:>5.1f} | {full:>12} | {sent:>12.0f} | {cold:>8.2f} ms | {warm:>8.2f} ms | "
+              f"{ttft_all:>6.1f} ms | {ttft_sel:>6.1f} ms | {recall:>5.0%}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,94 @@
+"""
+Benchmark: Early tool execution from streamed tool-call deltas (LLMExecutionStep)
+
+A local mock provider streams two web_search tool calls as OpenAI-style
+fragments, keeps streaming for a while (e.g. reasoning / trailing calls),
+then answers on the follow-up pass. Compares wall-clock per tool-using turn
+with EARLY_TOOL_EXECUTION on and off.
+
+Usage: python tests/bench_tool_stream.py
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.interfaces.driver import BaseLLMDriver
+from core.interfaces.tool import ToolProvider
+from services.container import services
+from services.chat.pipeline import LLMExecutionStep, PipelineContext
+
+TOKEN_DELAY = 0.02   # per streamed fragment
+TAIL_DELAY = 0.6     # stream keeps going after the last tool call is complete
+TOOL_LATENCY = 0.5   # web search round trip
+TURNS = 5
+
+
+class MockSearch(ToolProvider):
+    @property
+    def name(self) -> str:
+        return "web_search"
+
+    def get_definition(self):
+        return {"type": "function", "function": {"name": "web_search", "parameters": {}}}
+
+    async def execute(self, args):
+        await asyncio.sleep(TOOL_LATENCY)
+        return f"results for {args.get('query')}"
+
+
+class MockStreamingLLM(BaseLLMDriver):
+    def __init__(self):
+        super().__init__("mock", "Mock Streaming LLM")
+
+    async def load(self):
+        pass
+
+    async def list_models(self):
+        return ["mock"]
+
+    async def chat_completion(self, messages, model, temperature=0.7, stream=False, **kwargs):
+        if kwargs.get("tools") and not any(m.get("role") == "tool" for m in messages):
+            for index, query in enumerate(["tokyo weather", "tokyo events"]):
+                args = json.dumps({"query": query})
+                yield {"tool_call_deltas": [{"index": index, "id": f"call_{index}", "type": "function",
+                                             "function": {"name": "web_search", "arguments": ""}}]}
+                for i in range(0, len(args), 6):
+                    await asyncio.sleep(TOKEN_DELAY)
+                    yield {"tool_call_deltas": [{"index": index, "function": {"arguments": args[i:i + 6]}}]}
+            await asyncio.sleep(TAIL_DELAY)
+        else:
+            for word in "Here is what I found .".split():
+                await asyncio.sleep(TOKEN_DELAY)
+                yield word + " "
+
+
+async def run_turn(early: bool) -> float:
+    step = LLMExecutionStep()
+    step.EARLY_TOOL_EXECUTION = early
+    ctx = PipelineContext(original_messages=[], user_id="bench", character_id="bench", enable_rag=False,
+                          enable_tools=True, model_override=None, temperature=0.7, stream=True)
+    ctx.llm_driver = MockStreamingLLM()
+    ctx.target_model = "mock"
+    ctx.tools_def = [MockSearch().get_definition()]
+    ctx.final_messages = [{"role": "user", "content": "What's on in Tokyo this weekend?"}]
+    t0 = time.perf_counter()
+    async for _ in step.run_stream(ctx):
+        pass
+    return time.perf_counter() - t0
+
+
+async def main():
+    services.register_tool_provider(MockSearch())
+    for early in (False, True):
+        times = [await run_turn(early) for _ in range(TURNS)]
+        print(f"early_tool_execution={early!s:5}  mean turn wall-clock: {sum(times) / len(times) * 1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    import logging
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(main())
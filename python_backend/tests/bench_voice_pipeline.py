@@ -0,0 +1,78 @@
+"""
+Benchmark: Server-side streaming voice pipeline (services/voice_pipeline.py)
+
+A mock LLM streams a multi-sentence reply token by token; a mock TTS driver
+takes a fixed time to first audio plus streamed chunks per sentence.
+Compares synthesis concurrency 1 (one sentence at a time, like a serial
+per-sentence /generate loop) against N concurrent syntheses, reporting
+time-to-first-audio and inter-sentence gaps.
+
+Usage: python tests/bench_voice_pipeline.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.voice_pipeline import VoicePipelineStats, VoiceStream
+
+REPLY = ("Hello there! It's good to see you again. I was just thinking about our last chat, "
+         "the one about the stars. Did you get a chance to look at the sky last night? "
+         "It was so clear. I could see so many of them. Tell me about your day!")
+TOKEN_DELAY = 0.008
+TTS_FIRST_CHUNK = 0.15
+TTS_CHUNKS = 4
+TTS_CHUNK_DELAY = 0.05
+TURNS = 5
+
+
+class MockTTSDriver:
+    media_type = "audio/mpeg"
+
+    async def generate_stream(self, text, voice=None, **kwargs):
+        await asyncio.sleep(TTS_FIRST_CHUNK)
+        for i in range(TTS_CHUNKS):
+            if i:
+                await asyncio.sleep(TTS_CHUNK_DELAY)
+            yield b"\x00" * 512
+
+
+async def mock_llm():
+    for i in range(0, len(REPLY), 4):
+        await asyncio.sleep(TOKEN_DELAY)
+        yield REPLY[i:i + 4]
+
+
+async def run(concurrency: int):
+    stats = VoicePipelineStats()
+    started = time.perf_counter()
+    for _ in range(TURNS):
+        received = []
+
+        async def emit(payload):
+            received.append(payload)
+
+        voice = VoiceStream(MockTTSDriver(), emit, concurrency=concurrency, stats=stats)
+        async for token in mock_llm():
+            voice.feed(token)
+        await voice.finish()
+        indexes = [p["index"] for p in received if "index" in p]
+        assert indexes == sorted(indexes), "audio out of order"
+    return (time.perf_counter() - started) / TURNS, stats.get_stats()
+
+
+async def main():
+    print(f"reply={len(REPLY)} chars, mock TTS: first chunk {TTS_FIRST_CHUNK * 1000:.0f}ms, "
+          f"{TTS_CHUNKS} chunks x {TTS_CHUNK_DELAY * 1000:.0f}ms")
+    for concurrency in (1, 2, 3, 4):
+        per_turn, stats = await run(concurrency)
+        print(f"concurrency={concurrency}  sentences/turn={stats['sentences'] // TURNS}  "
+              f"TTFA p50={stats['ttfa_ms']['p50']:.0f}ms  "
+              f"gap p50={stats['gap_ms']['p50']:.0f}ms p95={stats['gap_ms']['p95']:.0f}ms  "
+              f"turn={per_turn * 1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
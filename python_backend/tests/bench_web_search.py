@@ -0,0 +1,106 @@
+"""
+Benchmark: web search result cache, hedged providers, result cap (services/chat/tools/search.py)
+
+Offline: two fake search providers registered in the service container.
+- "brave" (primary): usually 300 ms, 20% slow tail (1.5 s), 5% errors,
+- "duckduckgo" (hedge): steady 450 ms.
+Both return ~12k characters of markdown results.
+
+A conversation-like stream of 60 searches (repeats and follow-ups that
+differ only in case/punctuation/whitespace) runs through WebSearchTool in
+four setups: no cache, cache, cache + hedge (0 ms), cache + hedge (400 ms
+head start). Reports provider calls, latency percentiles, error answers and
+the size of what reaches the prompt.
+
+Usage: python tests/bench_web_search.py
+"""
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ["LUMINA_DATA_PATH"] = tempfile.mkdtemp()
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import logging
+logging.disable(logging.WARNING)
+
+from app_config import config as app_config
+from services.chat.tools import search
+from services.chat.tools.search import WebSearchTool
+from services.container import services
+
+TOPICS = ["mars mission news", "weather tokyo tomorrow", "best ramen in osaka", "python 3.13 release notes",
+          "nba finals score", "how to repot a monstera", "bitcoin price today", "jwst latest images"]
+
+
+class FakeProvider:
+    def __init__(self, id, fast, slow, slow_ratio, error_ratio, rng):
+        self._id, self.fast, self.slow = id, fast, slow
+        self.slow_ratio, self.error_ratio, self.rng = slow_ratio, error_ratio, rng
+        self.calls = 0
+
+    @property
+    def id(self):
+        return self._id
+
+    async def search(self, query):
+        self.calls += 1
+        roll = self.rng.random()
+        if roll < self.error_ratio:
+            await asyncio.sleep(0.1)
+            raise ConnectionError("HTTP 429")
+        await asyncio.sleep(self.slow if roll < self.error_ratio + self.slow_ratio else self.fast)
+        return "\n".join(f"{i + 1}. **{query} result {i}** - https://example.com/{i}\n   " + "snippet text " * 40
+                         for i in range(20))
+
+
+def make_queries(rng):
+    queries = []
+    for _ in range(60):
+        topic = rng.choice(TOPICS)
+        queries.append(rng.choice([topic, topic.capitalize(), f"{topic}?", f"  {topic.upper()} ", topic + "."]))
+    return queries
+
+
+async def run(label, queries, ttl, hedge, hedge_delay_ms):
+    rng = random.Random(7)
+    primary = FakeProvider("brave", 0.3, 1.5, 0.2, 0.05, rng)
+    fallback = FakeProvider("duckduckgo", 0.45, 0.45, 0.0, 0.0, rng)
+    services.register_search_provider(primary)
+    services.register_search_provider(fallback)
+    cfg = app_config.search
+    cfg.provider, cfg.cache_ttl_seconds, cfg.hedge_provider, cfg.hedge_delay_ms = "brave", ttl, hedge, hedge_delay_ms
+    search.search_cache.clear()
+
+    tool = WebSearchTool()
+    latencies, errors, sizes = [], 0, []
+    for query in queries:
+        started = time.perf_counter()
+        result = await tool.execute({"query": query})
+        latencies.append((time.perf_counter() - started) * 1000)
+        errors += result.startswith("Error")
+        sizes.append(len(result))
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+    print(f"{label:<24} | {primary.calls + fallback.calls:>5} | {statistics.mean(latencies):>7.0f} ms | "
+          f"{pct(0.5):>7.0f} ms | {pct(0.95):>7.0f} ms | {errors:>6} | {statistics.mean(sizes):>8.0f}")
+
+
+async def main():
+    queries = make_queries(random.Random(1))
+    print(f"{len(queries)} searches over {len(TOPICS)} topics, result cap {app_config.search.max_result_chars} chars "
+          f"(raw results ~12k chars)\n")
+    print(f"{'setup':<24} | {'calls':>5} | {'mean':>10} | {'p50':>10} | {'p95':>10} | {'errors':>6} | {'chars':>8}")
+    await run("no cache", queries, 0, "", 0)
+    await run("cache", queries, 600, "", 0)
+    await run("cache + hedge 0 ms", queries, 600, "duckduckgo", 0)
+    await run("cache + hedge 400 ms", queries, 600, "duckduckgo", 400)
+    print(f"\nStats (all setups): {search.get_stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,113 @@
+"""
+Driver wrappers keep the provider's calling convention (llm/manager.py _wrap_driver)
+
+A route with the response cache on, backed by an async-generator driver
+(pollinations style) or a coroutine driver (OpenAI style), goes through
+LLMManager._wrap_driver (scheduler -> cache). chat_completion, stream_chat and
+chat_completion(stream=True) must behave as they do on the bare driver.
+Hedging only applies to streaming calls.
+
+Usage: python -m pytest tests/test_llm_driver_wrapping.py
+   or: python tests/test_llm_driver_wrapping.py
+"""
+import asyncio
+import inspect
+import os
+import sys
+import tempfile
+
+os.environ["LUMINA_DATA_PATH"] = tempfile.mkdtemp()
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.interfaces.driver import BaseLLMDriver
+from llm.hedging import HedgedLLMDriver
+from llm.manager import FeatureRoute, LLMManager
+
+MESSAGES = [{"role": "user", "content": "hello"}]
+
+
+class GeneratorDriver(BaseLLMDriver):
+    def __init__(self):
+        super().__init__("gen", "Generator Driver")
+        self.calls = 0
+
+    async def load(self):
+        pass
+
+    async def list_models(self) -> list:
+        return []
+
+    async def chat_completion(self, messages, model, temperature=0.7, stream=False, **kwargs):
+        self.calls += 1
+        for chunk in ("Hi", " there"):
+            yield chunk
+
+
+class SlowDriver(GeneratorDriver):
+    async def chat_completion(self, messages, model, temperature=0.7, stream=False, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        yield "slow"
+
+
+class CoroutineDriver(GeneratorDriver):
+    async def chat_completion(self, messages, model, temperature=0.7, stream=False, **kwargs):
+        self.calls += 1
+        if stream:
+            return GeneratorDriver.chat_completion(self, messages, model)
+        return "Hi there"
+
+
+def wrap(driver):
+    manager = LLMManager()
+    manager.config.routes["memory"] = FeatureRoute(feature="memory", provider_id=driver.id, model="m",
+                                                   cache_enabled=True)
+    manager.get_response_cache().clear()
+    return manager._wrap_driver("memory", driver)
+
+
+async def collect(gen):
+    return "".join([c async for c in gen])
+
+
+def test_generator_driver_through_cache():
+    async def run():
+        driver = GeneratorDriver()
+        wrapped = wrap(driver)
+        assert inspect.isasyncgenfunction(wrapped._inner.chat_completion)
+        assert await collect(wrapped.chat_completion(MESSAGES, model="m")) == "Hi there"
+        assert await collect(wrapped.stream_chat(MESSAGES, model="m", stream=False)) == "Hi there"
+        assert driver.calls == 1  # second call is a cache hit
+        assert await collect(wrapped.chat_completion(MESSAGES, model="m", stream=True)) == "Hi there"
+    asyncio.run(run())
+
+
+def test_coroutine_driver_through_cache():
+    async def run():
+        driver = CoroutineDriver()
+        wrapped = wrap(driver)
+        assert await wrapped.chat_completion(MESSAGES, model="m") == "Hi there"
+        assert await collect(wrapped.stream_chat(MESSAGES, model="m", stream=False)) == "Hi there"
+        assert driver.calls == 1
+        # chat_service style: await, then iterate the stream
+        assert await collect(await wrapped.chat_completion(MESSAGES, model="m", stream=True)) == "Hi there"
+    asyncio.run(run())
+
+
+def test_hedge_skips_non_stream_calls():
+    async def run():
+        primary, fallback = SlowDriver(), GeneratorDriver()
+        hedged = HedgedLLMDriver(primary, fallback, fallback_model="m", delay=0.01)
+        assert inspect.isasyncgenfunction(hedged.chat_completion)
+        assert await collect(hedged.stream_chat(MESSAGES, model="m", stream=False)) == "slow"
+        assert (primary.calls, fallback.calls, hedged.stats.requests) == (1, 0, 0)
+        assert await collect(hedged.stream_chat(MESSAGES, model="m")) == "Hi there"
+        assert fallback.calls == 1
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    test_generator_driver_through_cache()
+    test_coroutine_driver_through_cache()
+    test_hedge_skips_non_stream_calls()
+    print("OK")
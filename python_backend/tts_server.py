@@ -16,6 +16,7 @@ from routers.deps import get_tts_service
 
 # Plugin System
 from core.interfaces.driver import BaseTTSDriver
+from services.voice_pipeline import clean_tts_text
 # Concrete drivers will be loaded dynamically
 
 from app_config import config as app_settings
@@ -186,30 +187,8 @@ async def generate_tts(request: TTSRequest, manager: Any = Depends(get_tts_servi
              await driver.load()
 
     try:
-        # Backend Text Cleaning
-        # 1. Remove [emotion] tags and brackets
-        # 1. Remove [emotion] tags and brackets
-        clean_text = re.sub(r'\[[^\]]*\]', '', request.text)
-        # Fix: Properly close character set and use standard Chinese brackets
-        clean_text = re.sub(r'[()\[\]（）【】]', '', clean_text)
-        
-        # 2. Remove emojis and symbols (Expanded Range)
-        # Covers: Spec. chars, Dingbats, Emoji, Transport, Symbols
-        clean_text = re.sub(r'[\U00010000-\U0010ffff\u2600-\u26ff\u2700-\u27bf\u1f300-\u1f9ff\u1f600-\u1f64f]', '', clean_text) 
-        
-        # 3. Fix All-Caps words (LUMINA -> Lumina) to prevent spelling out
-        def fix_caps(m):
-            return m.group(0)[0] + m.group(0)[1:].lower()
-        clean_text = re.sub(r'\b([A-Z]{2,})\b', fix_caps, clean_text)
-        
-        # 4. Remove symbols like '&' and normalize whitespace
-        clean_text = re.sub(r'[&]', ' ', clean_text)
-        
-        # 5. Remove Markdown symbols (*, #, `, ~)
-        # Avoid reading out "asterisks" or "hashtags"
-        clean_text = re.sub(r'[*#`~]', '', clean_text)
-        
-        clean_text = re.sub(r'\s+', ' ', clean_text).strip()
+        # Backend Text Cleaning (shared with the server-side voice pipeline)
+        clean_text = clean_tts_text(request.text)
         
         # Stream response
         generator = driver.generate_stream(